@@ -0,0 +1,214 @@
+"""
+Headless batch reconstruction of a k-space dataset.
+
+Reconstructs RSS (and optionally per-coil magnitude) images for a range of
+time frames and slices with the same math as `utils.load_slice`, without
+starting the GUI. Work is split into (slice, block of time frames) tasks
+run in a process pool; results are streamed to disk as they complete, so
+memory stays bounded by the number of tasks in flight.
+
+Example:
+    python batch_recon.py scan.mat scan_recon.h5 --coils --slices 0:10 --workers 8
+"""
+import argparse
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+import h5py
+import numpy as np
+
+from recon import ReconEngine, IMAGE
+from utils import load_kdata
+
+# Per-process state set up by _init_worker
+_worker_kdata = None
+_worker_engine = None
+
+
+def parse_range(text, n):
+    """
+    Parse a 'start:stop' range (Python slice semantics) into a range object.
+
+    Args:
+        text (str): Range such as '0:10', '5:', ':3' or a single index '4';
+            None selects everything.
+        n (int): Length of the axis.
+
+    Returns:
+        range: Selected indices.
+    """
+    if text is None:
+        return range(n)
+    if ':' not in text:
+        i = int(text)
+        return range(n)[i:i + 1 or None]
+    start, stop = text.split(':', 1)
+    return range(n)[slice(int(start) if start else None, int(stop) if stop else None)]
+
+
+def _init_worker(filename, fft_workers, cache_bytes):
+    global _worker_kdata, _worker_engine
+    # Each process opens its own handle; h5py files cannot be shared across forks
+    _worker_kdata = load_kdata(filename, cache_bytes=cache_bytes)
+    _worker_engine = ReconEngine(workers=fft_workers)
+
+
+def _reconstruct_block(z, t_start, t_stop, coils):
+    """Reconstruct time frames [t_start, t_stop) of slice z in a worker process."""
+    kslab = _worker_kdata[t_start:t_stop, z]  # [nb, nc, ny, nx]
+    composite, coil_images = _worker_engine.reconstruct(kslab, IMAGE)
+    return z, t_start, t_stop, composite, coil_images if coils else None
+
+
+class _NpyWriter:
+    """Writes the outputs to .npy files through memory maps."""
+
+    def __init__(self, path, shape, nc, coils):
+        self.rss = np.lib.format.open_memmap(path, mode='w+', dtype=np.float32, shape=shape)
+        self.coils = None
+        if coils:
+            root, ext = os.path.splitext(path)
+            nt, nz, ny, nx = shape
+            self.coils = np.lib.format.open_memmap(
+                f"{root}_coils{ext}", mode='w+', dtype=np.float32, shape=(nt, nz, nc, ny, nx)
+            )
+
+    def write(self, t_idx, z_idx, composite, coil_images):
+        self.rss[t_idx, z_idx] = composite
+        if self.coils is not None:
+            self.coils[t_idx, z_idx] = coil_images
+
+    def close(self):
+        self.rss.flush()
+        if self.coils is not None:
+            self.coils.flush()
+
+
+class _H5Writer:
+    """Writes the outputs to an HDF5 file with one chunk per frame."""
+
+    def __init__(self, path, shape, nc, coils):
+        nt, nz, ny, nx = shape
+        self.file = h5py.File(path, 'w')
+        self.rss = self.file.create_dataset(
+            'rss', shape=shape, dtype=np.float32, chunks=(1, 1, ny, nx)
+        )
+        self.coils = None
+        if coils:
+            self.coils = self.file.create_dataset(
+                'coils', shape=(nt, nz, nc, ny, nx), dtype=np.float32,
+                chunks=(1, 1, 1, ny, nx)
+            )
+
+    def write(self, t_idx, z_idx, composite, coil_images):
+        self.rss[t_idx, z_idx] = composite
+        if self.coils is not None:
+            self.coils[t_idx, z_idx] = coil_images
+
+    def close(self):
+        self.file.close()
+
+
+def batch_reconstruct(input_path, output_path, times=None, slices=None, coils=False,
+                      workers=None, fft_workers=1, block_size=8,
+                      cache_bytes=64 * 1024 ** 2, progress=None):
+    """
+    Reconstruct a dataset to disk.
+
+    Args:
+        input_path (str): Source .mat/.h5 file.
+        output_path (str): Destination ending in .npy, .h5 or .hdf5. The RSS
+            images are stored as [nt, nz, ny, nx]; with `coils`, per-coil
+            magnitudes [nt, nz, nc, ny, nx] go to dataset 'coils' (HDF5) or
+            to '<name>_coils.npy'.
+        times (range): Time frames to reconstruct (default: all).
+        slices (range): Slices to reconstruct (default: all).
+        coils (bool): Also write per-coil magnitude images.
+        workers (int): Worker processes (default: CPU count).
+        fft_workers (int): FFT threads per worker process.
+        block_size (int): Time frames per task.
+        cache_bytes (int): HDF5 chunk cache size per worker.
+        progress (callable): Called with (done, total) after each task.
+    """
+    with load_kdata(input_path) as kdata:
+        nt, nz, nc, ny, nx = kdata.shape
+    times = times if times is not None else range(nt)
+    slices = slices if slices is not None else range(nz)
+    if times.step != 1:
+        raise ValueError("time ranges must be contiguous")
+
+    ext = os.path.splitext(output_path)[1].lower()
+    if ext == '.npy':
+        writer_cls = _NpyWriter
+    elif ext in ('.h5', '.hdf5'):
+        writer_cls = _H5Writer
+    else:
+        raise ValueError(f"Unsupported output format '{ext}' (use .npy or .h5)")
+    writer = writer_cls(output_path, (len(times), len(slices), ny, nx), nc, coils)
+
+    tasks = [
+        (z, t, min(t + block_size, times.stop), coils)
+        for z in slices for t in range(times.start, times.stop, block_size)
+    ]
+    workers = workers or os.cpu_count() or 1
+    max_inflight = 2 * workers  # bounds memory held by finished-but-unwritten blocks
+
+    try:
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker,
+            initargs=(input_path, fft_workers, cache_bytes)
+        ) as pool:
+            pending = set()
+            done = 0
+            task_iter = iter(tasks)
+            while True:
+                for task in task_iter:
+                    pending.add(pool.submit(_reconstruct_block, *task))
+                    if len(pending) >= max_inflight:
+                        break
+                if not pending:
+                    break
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    z, t_start, t_stop, composite, coil_images = future.result()
+                    t_idx = slice(t_start - times.start, t_stop - times.start)
+                    writer.write(t_idx, slices.index(z), composite, coil_images)
+                    done += 1
+                    if progress is not None:
+                        progress(done, len(tasks))
+    finally:
+        writer.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Reconstruct a k-space dataset to RSS (and coil) images without the GUI."
+    )
+    parser.add_argument('input', help="k-space .mat/.h5 file")
+    parser.add_argument('output', help="output .npy or .h5 file")
+    parser.add_argument('--times', help="time frame range start:stop (default: all)")
+    parser.add_argument('--slices', help="slice range start:stop (default: all)")
+    parser.add_argument('--coils', action='store_true', help="also write per-coil magnitude images")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument('--fft-workers', type=int, default=1, help="FFT threads per worker process")
+    parser.add_argument('--block-size', type=int, default=8, help="time frames per task")
+    args = parser.parse_args(argv)
+
+    with load_kdata(args.input) as kdata:
+        nt, nz = kdata.shape[:2]
+
+    def report(done, total):
+        print(f"\r{done}/{total} blocks", end='', file=sys.stderr, flush=True)
+
+    batch_reconstruct(
+        args.input, args.output,
+        times=parse_range(args.times, nt), slices=parse_range(args.slices, nz),
+        coils=args.coils, workers=args.workers, fft_workers=args.fft_workers,
+        block_size=args.block_size, progress=report,
+    )
+    print(file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
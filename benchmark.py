@@ -0,0 +1,312 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import h5py
+import numpy as np
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+# Named dataset sizes (nt, nz, nc, ny, nx)
+PRESETS = {
+    'small': (16, 2, 4, 128, 128),
+    'medium': (32, 2, 8, 256, 256),
+    'large': (64, 4, 16, 256, 256),
+}
+
+# MATLAB v7.3 layout of complex single-precision data
+_COMPLEX_COMPOUND = np.dtype([('real', '<f4'), ('imag', '<f4')])
+
+
+def parse_shape(text):
+    """Parse a preset name or 'nt,nz,nc,ny,nx' into a shape tuple."""
+    if text in PRESETS:
+        return PRESETS[text]
+    shape = tuple(int(n) for n in text.split(','))
+    if len(shape) != 5:
+        raise argparse.ArgumentTypeError(f"expected a preset or nt,nz,nc,ny,nx, got '{text}'")
+    return shape
+
+
+def make_synthetic_kspace(path, shape, key='kspace_full', seed=0):
+    """
+    Write a synthetic k-space file in the layout load_kdata expects.
+
+    The data is complex Gaussian noise stored as a MATLAB-style compound
+    (real, imag) float32 dataset [nt, nz, nc, ny, nx], one chunk per
+    [t, z] slab. It is written one time frame at a time, so files larger
+    than memory can be generated.
+
+    Args:
+        path (str): Output file.
+        shape (tuple): (nt, nz, nc, ny, nx).
+        key (str): Dataset name.
+        seed (int): Random seed.
+    """
+    nt, nz, nc, ny, nx = shape
+    rng = np.random.default_rng(seed)
+    with h5py.File(path, 'w') as f:
+        dset = f.create_dataset(key, shape=shape, dtype=_COMPLEX_COMPOUND,
+                                chunks=(1, 1, nc, ny, nx))
+        frame = np.empty((nz, nc, ny, nx), dtype=_COMPLEX_COMPOUND)
+        for t in range(nt):
+            frame['real'] = rng.standard_normal(frame.shape, dtype=np.float32)
+            frame['imag'] = rng.standard_normal(frame.shape, dtype=np.float32)
+            dset[t] = frame
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far, in MiB (None if unknown)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak / (1024 ** 2 if sys.platform == 'darwin' else 1024)
+
+
+def summarize(times, items_per_op=1, bytes_per_op=0):
+    """
+    Wall-time summary of repeated operations.
+
+    Args:
+        times (list of float): Seconds per operation.
+        items_per_op (int): Frames (or other items) handled per operation.
+        bytes_per_op (int): Bytes read per operation, for MB/s.
+
+    Returns:
+        dict: Total, mean, median and min time, throughput and peak RSS.
+    """
+    total = sum(times)
+    result = {
+        'ops': len(times),
+        'total_s': total,
+        'mean_ms': 1e3 * statistics.mean(times),
+        'median_ms': 1e3 * statistics.median(times),
+        'min_ms': 1e3 * min(times),
+        'items_per_s': len(times) * items_per_op / total if total else None,
+    }
+    if bytes_per_op:
+        result['mb_per_s'] = len(times) * bytes_per_op / total / 1024 ** 2 if total else None
+    result['peak_rss_mb'] = peak_rss_mb()
+    return result
+
+
+def _frames(shape, count):
+    """Up to `count` distinct (t, z) pairs spread over the dataset."""
+    nt, nz = shape[:2]
+    return [(i % nt, (i // nt) % nz) for i in range(min(count, nt * nz))]
+
+
+def bench_load_kdata(path, repeats):
+    from utils import load_kdata
+
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        kdata = load_kdata(path)
+        times.append(time.perf_counter() - start)
+        kdata.close()
+    return summarize(times)
+
+
+def bench_load_slice(path, frames):
+    from utils import load_kdata, load_slice
+
+    times = []
+    with load_kdata(path) as kdata:
+        slab_bytes = int(np.prod(kdata.shape[2:])) * kdata.dtype.itemsize
+        for t, z in frames:
+            start = time.perf_counter()
+            load_slice(kdata, t, z)
+            times.append(time.perf_counter() - start)
+    return summarize(times, bytes_per_op=slab_bytes)
+
+
+def _wait_until(app, condition, timeout):
+    """Run the Qt event loop until condition() is true; False on timeout."""
+    deadline = time.perf_counter() + timeout
+    while not condition():
+        if time.perf_counter() > deadline:
+            return False
+        app.processEvents()
+        time.sleep(0.0005)
+    return True
+
+
+def bench_viewer(path, frames, playback_seconds, timeout=60.0):
+    """
+    Time MRIViewer.update_slice (cold and cached), the coil grid and mosaic
+    refresh, and sustained playback, with Qt on the offscreen platform.
+    """
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from PyQt5.QtWidgets import QApplication, QSlider
+    app = QApplication.instance() or QApplication([])
+    from mri_viewer import MRIViewer
+
+    viewer = MRIViewer()
+    viewer.resize(1200, 800)
+    viewer.show()
+    shown = []
+    show_frame = viewer.show_frame
+    viewer.show_frame = lambda t, z: (show_frame(t, z), shown.append((t, z)))
+    results = {}
+    try:
+        # Opened in the background; the first frame also needs the dataset statistics
+        start = time.perf_counter()
+        viewer.open_file(path)
+        if not _wait_until(app, lambda: shown, timeout):
+            raise RuntimeError(f"timed out waiting for the first frame of {path}")
+        results['first_frame'] = summarize([time.perf_counter() - start])
+
+        time_slider = viewer.time_slider.findChild(QSlider)
+        slice_slider = viewer.slice_slider.findChild(QSlider)
+
+        def show(t, z):
+            # Set the position without the sliders' own update_slice calls
+            for slider, value in ((time_slider, t), (slice_slider, z)):
+                slider.blockSignals(True)
+                slider.setValue(value)
+                slider.blockSignals(False)
+            shown.clear()
+            start = time.perf_counter()
+            viewer.update_slice()
+            if not _wait_until(app, lambda: (t, z) in shown, timeout):
+                raise RuntimeError(f"timed out waiting for frame ({t}, {z})")
+            return time.perf_counter() - start
+
+        # Composite only, then with the coil grid visible
+        viewer.frame_cache.clear()
+        results['update_slice_cold'] = summarize([show(t, z) for t, z in frames])
+        results['update_slice_cached'] = summarize([show(t, z) for t, z in frames])
+
+        viewer.tab_widget.setCurrentWidget(viewer.coil_tab)
+        app.processEvents()
+        viewer.frame_cache.clear()
+        results['update_slice_coils_cold'] = summarize([show(t, z) for t, z in frames])
+
+        # Display cost only: frames are cached at this point
+        nc = viewer.nc
+        for name, mosaic in (('coil_grid_refresh', False), ('coil_mosaic_refresh', True)):
+            viewer.mosaic_checkbox.setChecked(mosaic)
+            app.processEvents()
+            times = []
+            for t, z in frames:
+                start = time.perf_counter()
+                viewer.update_coil_images(t, z)
+                times.append(time.perf_counter() - start)
+            results[name] = summarize(times, items_per_op=nc)
+        viewer.mosaic_checkbox.setChecked(False)
+
+        # Sustained playback at the highest selectable frame rate, cold cache
+        viewer.tab_widget.setCurrentWidget(viewer.composite_tab)
+        viewer.fps_spinbox.setValue(viewer.fps_spinbox.maximum())
+        viewer.frame_cache.clear()
+        shown.clear()
+        viewer.toggle_playback()
+        start = time.perf_counter()
+        _wait_until(app, lambda: time.perf_counter() - start >= playback_seconds, playback_seconds + 1)
+        elapsed = time.perf_counter() - start
+        viewer.toggle_playback()
+        results['playback'] = {
+            'target_fps': viewer.playback_fps,
+            'duration_s': elapsed,
+            'frames_shown': len(shown),
+            'frames_dropped': viewer.dropped_frames,
+            'fps': len(shown) / elapsed,
+            'peak_rss_mb': peak_rss_mb(),
+        }
+        results['cache'] = viewer.frame_cache.stats()
+    finally:
+        viewer.close()
+        app.processEvents()
+    return results
+
+
+def run_dataset(shape, workdir, repeats, frame_count, playback_seconds, gui):
+    """Generate one synthetic dataset and run every benchmark on it."""
+    name = 'x'.join(str(n) for n in shape)
+    path = os.path.join(workdir, f"kspace_{name}.mat")
+    start = time.perf_counter()
+    make_synthetic_kspace(path, shape)
+    result = {
+        'shape': list(shape),
+        'kspace_bytes': int(np.prod(shape)) * np.dtype(np.complex64).itemsize,
+        'file_bytes': os.path.getsize(path),
+        'generate_s': time.perf_counter() - start,
+        'results': {},
+    }
+    frames = _frames(shape, frame_count)
+    try:
+        result['results']['load_kdata'] = bench_load_kdata(path, repeats)
+        result['results']['load_slice'] = bench_load_slice(path, frames)
+        if gui:
+            result['results'].update(bench_viewer(path, frames, playback_seconds))
+    finally:
+        os.remove(path)
+    return result
+
+
+def git_revision():
+    """The current git commit of the source tree, or None."""
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Benchmark loading, reconstruction and display on synthetic k-space data."
+    )
+    parser.add_argument('--sizes', type=parse_shape, nargs='+',
+                        default=[PRESETS['small'], PRESETS['medium']],
+                        help=f"presets ({', '.join(PRESETS)}) or nt,nz,nc,ny,nx (default: small medium)")
+    parser.add_argument('--output', default='benchmark.json', help="JSON results file")
+    parser.add_argument('--workdir', default=None, help="directory for the synthetic files (default: temp)")
+    parser.add_argument('--repeats', type=int, default=5, help="repetitions of load_kdata")
+    parser.add_argument('--frames', type=int, default=16, help="frames timed per benchmark")
+    parser.add_argument('--playback-seconds', type=float, default=5.0, help="duration of the playback run")
+    parser.add_argument('--no-gui', action='store_true', help="skip the viewer benchmarks")
+    args = parser.parse_args(argv)
+
+    report = {
+        'revision': git_revision(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'datasets': [],
+    }
+    with tempfile.TemporaryDirectory(dir=args.workdir) as workdir:
+        for shape in args.sizes:
+            print(f"Benchmarking {shape}...", file=sys.stderr)
+            # A fresh process per dataset keeps the peak RSS figures separate
+            with ProcessPoolExecutor(max_workers=1, mp_context=get_context('spawn')) as pool:
+                result = pool.submit(
+                    run_dataset, shape, workdir, args.repeats, args.frames,
+                    args.playback_seconds, not args.no_gui,
+                ).result()
+            report['datasets'].append(result)
+
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
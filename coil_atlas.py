@@ -0,0 +1,61 @@
+import math
+
+import numpy as np
+
+
+class CoilAtlas:
+    """
+    Preallocated uint8 mosaic of all coil images of a frame.
+
+    Coils are laid out row by row in tiles of the image size separated by
+    `gap` pixels. `update` writes the display values of every coil straight
+    into its tile through the window lookup tables, so refreshing the
+    mosaic allocates nothing and needs a single QImage upload.
+    """
+
+    def __init__(self, nc, ny, nx, cols=None, gap=2):
+        """
+        Args:
+            nc (int): Number of coils.
+            ny, nx (int): Image size of one coil.
+            cols (int): Tiles per row (default: close to square).
+            gap (int): Pixels between tiles.
+        """
+        self.nc, self.ny, self.nx, self.gap = nc, ny, nx, gap
+        self.cols = cols or max(1, math.ceil(math.sqrt(nc * ny / nx)))
+        self.rows = math.ceil(nc / self.cols)
+        self.array = np.zeros(
+            (self.rows * (ny + gap) - gap, self.cols * (nx + gap) - gap), dtype=np.uint8
+        )
+        self.tiles = []
+        for c in range(nc):
+            y0, x0 = self.tile_origin(c)
+            self.tiles.append(self.array[y0:y0 + ny, x0:x0 + nx])
+
+    def tile_origin(self, coil):
+        """Top-left pixel (y, x) of a coil's tile."""
+        row, col = divmod(coil, self.cols)
+        return row * (self.ny + self.gap), col * (self.nx + self.gap)
+
+    def update(self, coil_codes, luts):
+        """
+        Write the display images of all coils into the atlas in place.
+
+        Args:
+            coil_codes (list of np.ndarray): uint16 codes [ny, nx] per coil.
+            luts (list of np.ndarray): uint8 lookup table per coil.
+        """
+        for tile, codes, lut in zip(self.tiles, coil_codes, luts):
+            # mode='clip' writes into the strided tile without a buffer copy
+            np.take(lut, codes, out=tile, mode='clip')
+
+    def coil_at(self, x, y):
+        """Index of the coil whose tile contains atlas pixel (x, y), or None."""
+        if x < 0 or y < 0:
+            return None
+        col, dx = divmod(int(x), self.nx + self.gap)
+        row, dy = divmod(int(y), self.ny + self.gap)
+        coil = row * self.cols + col
+        if dx >= self.nx or dy >= self.ny or col >= self.cols or coil >= self.nc:
+            return None
+        return coil
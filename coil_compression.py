@@ -0,0 +1,150 @@
+import threading
+
+import numpy as np
+
+from windowing import sample_frames
+
+# Side of the central k-space square used as calibration data
+DEFAULT_CALIB_SIZE = 24
+# Frames sampled for the calibration data
+DEFAULT_CALIB_FRAMES = 8
+
+
+def calibration_data(kslab, size=DEFAULT_CALIB_SIZE):
+    """
+    Central (fully sampled, high-SNR) k-space region of a slab.
+
+    Args:
+        kslab (np.ndarray): Complex k-space [nc, ny, nx].
+        size (int): Side of the square region (clipped to the image size).
+
+    Returns:
+        np.ndarray: complex64 samples [nc, size * size].
+    """
+    nc, ny, nx = kslab.shape
+    hy, hx = min(size, ny) // 2, min(size, nx) // 2
+    cy, cx = ny // 2, nx // 2
+    region = kslab[:, cy - hy:cy + hy or None, cx - hx:cx + hx or None]
+    return np.asarray(region, dtype=np.complex64).reshape(nc, -1)
+
+
+def compression_matrix(calib, n_virtual):
+    """
+    SVD coil compression matrix from calibration samples.
+
+    The virtual coils are the leading left singular vectors of the
+    calibration data, so they are orthonormal combinations of the physical
+    coils ordered by the signal energy they capture.
+
+    Args:
+        calib (np.ndarray): Calibration samples [nc, n_samples].
+        n_virtual (int): Number of virtual coils.
+
+    Returns:
+        tuple: (matrix [n_virtual, nc] complex64, retained energy fraction).
+    """
+    u, s, _ = np.linalg.svd(calib, full_matrices=False)
+    n_virtual = min(n_virtual, len(s))
+    energy = np.square(s.astype(np.float64))
+    retained = float(energy[:n_virtual].sum() / max(energy.sum(), 1e-30))
+    return np.ascontiguousarray(u[:, :n_virtual].conj().T, dtype=np.complex64), retained
+
+
+class CompressedKSpace:
+    """
+    K-space seen through SVD coil compression.
+
+    Wraps a k-space store [nt, nz, nc, ny, nx] and presents it as
+    [nt, nz, n_virtual, ny, nx]: every slab read is projected onto the
+    virtual coils before any transform, so everything downstream (RSS,
+    coil views, statistics, ROI curves) works on n_virtual channels.
+
+    The compression matrix is computed once for the whole dataset from the
+    central k-space of evenly spaced frames, or, with `per_slice`, once per
+    slice on first use from that slice's frames.
+    """
+
+    def __init__(self, kdata, n_virtual, per_slice=False, calib_size=DEFAULT_CALIB_SIZE,
+                 calib_frames=DEFAULT_CALIB_FRAMES):
+        """
+        Args:
+            kdata (KSpaceStore or np.ndarray): Complex k-space [nt, nz, nc, ny, nx].
+            n_virtual (int): Number of virtual coils (at most nc).
+            per_slice (bool): Compute a separate matrix for every slice.
+            calib_size (int): Side of the central k-space calibration region.
+            calib_frames (int): Frames sampled for each matrix.
+        """
+        nt, nz, nc, ny, nx = kdata.shape
+        self.kdata = kdata
+        self.n_virtual = max(1, min(n_virtual, nc))
+        self.per_slice = per_slice
+        self.calib_size = calib_size
+        self.calib_frames = calib_frames
+        self.shape = (nt, nz, self.n_virtual, ny, nx)
+        self.dtype = np.dtype(np.complex64)
+        self._matrices = {}  # slice (or None) -> (matrix, retained energy)
+        self._lock = threading.Lock()
+        if not per_slice:
+            self._calibrate(None)
+
+    @property
+    def source_nc(self):
+        return self.kdata.shape[2]
+
+    def _calibrate(self, z):
+        entry = self._matrices.get(z)
+        if entry is None:
+            with self._lock:
+                entry = self._matrices.get(z)
+                if entry is None:
+                    nt, nz = self.kdata.shape[:2]
+                    if z is None:
+                        frames = sample_frames(nt, nz, self.calib_frames)
+                    else:
+                        frames = [(t, z) for t, _ in sample_frames(nt, 1, self.calib_frames)]
+                    calib = np.concatenate(
+                        [calibration_data(self.kdata[t, fz], self.calib_size) for t, fz in frames],
+                        axis=1,
+                    )
+                    entry = self._matrices[z] = compression_matrix(calib, self.n_virtual)
+        return entry
+
+    def matrix(self, z):
+        """Compression matrix [n_virtual, nc] used for slice z."""
+        return self._calibrate(z if self.per_slice else None)[0]
+
+    def retained_energy(self, z=None):
+        """
+        Fraction of the calibration signal energy kept by the virtual coils:
+        of the whole dataset, or of slice z with `per_slice`.
+        """
+        return self._calibrate(z if self.per_slice else None)[1]
+
+    def compress(self, kslab, z):
+        """Project k-space [..., nc, ny, nx] of slice z onto the virtual coils."""
+        kslab = np.asarray(kslab, dtype=np.complex64)
+        *lead, nc, ny, nx = kslab.shape
+        out = np.matmul(self.matrix(z), kslab.reshape(*lead, nc, ny * nx))
+        return out.reshape(*lead, self.n_virtual, ny, nx)
+
+    def __getitem__(self, key):
+        """
+        Index time and slice, e.g. [t, z] or [t0:t1, z], optionally followed
+        by [:, y, x] k-space ranges; the slice must be an integer.
+        """
+        if (not isinstance(key, tuple) or len(key) < 2 or not isinstance(key[1], (int, np.integer))
+                or (len(key) > 2 and key[2] != slice(None))):
+            raise IndexError("compressed k-space is indexed as [t, z] or [t, z, :, y, x] "
+                             "with an integer slice")
+        return self.compress(self.kdata[key], key[1])
+
+    @property
+    def ndim(self):
+        return len(self.shape)
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __repr__(self):
+        return (f"CompressedKSpace({self.kdata!r}, {self.source_nc} -> "
+                f"{self.n_virtual} virtual coils)")
@@ -0,0 +1,254 @@
+"""
+Streaming export of whole cine series.
+
+Frames are reconstructed in blocks of time frames on a thread pool and
+written as they complete, so memory is bounded by the blocks in flight
+rather than the size of the series. Image formats (PNG series, multi-frame
+TIFF) hold display images windowed like the viewer; array formats (.npy,
+HDF5) hold the float32 reconstructed values.
+"""
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import h5py
+import numpy as np
+from PyQt5.QtGui import QImage
+
+from recon import ReconEngine, IMAGE
+from windowing import WindowLevel, compute_dataset_stats
+
+try:
+    import tifffile
+except ImportError:  # multi-frame TIFF export is optional
+    tifffile = None
+
+FORMATS = ('png', 'tiff', 'npy', 'h5')
+IMAGE_FORMATS = ('png', 'tiff')
+
+
+def _channel_name(prefix, coil):
+    return prefix if coil is None else f"{prefix}_coil{coil + 1:02d}"
+
+
+class _PngWriter:
+    """One 8-bit PNG per frame and channel: '<prefix>[_coilNN]_zZZZ_tTTTT.png'."""
+    parallel = True  # frames are independent files, written on the pool threads
+
+    def __init__(self, directory, prefix):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.prefix = prefix
+
+    def write(self, z, t, coil, frames):
+        name = _channel_name(self.prefix, coil)
+        for i, frame in enumerate(frames):
+            h, w = frame.shape
+            path = os.path.join(self.directory, f"{name}_z{z:03d}_t{t + i:04d}.png")
+            if not QImage(frame.data, w, h, w, QImage.Format_Grayscale8).save(path):
+                raise OSError(f"Could not write {path}")
+
+    def close(self):
+        pass
+
+
+class _TiffWriter:
+    """One multi-frame 8-bit TIFF per slice and channel: '<prefix>[_coilNN]_zZZZ.tif'."""
+    parallel = False  # pages are appended in time order
+
+    def __init__(self, directory, prefix, frame_bytes, nt):
+        if tifffile is None:
+            raise ImportError("Multi-frame TIFF export requires the 'tifffile' package")
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.prefix = prefix
+        self.bigtiff = frame_bytes * nt >= 2 ** 31
+        self.z = None
+        self.files = {}
+
+    def write(self, z, t, coil, frames):
+        if z != self.z:
+            # Slices are written one after another; finish the previous one
+            self.close()
+            self.z = z
+        tif = self.files.get(coil)
+        if tif is None:
+            path = os.path.join(self.directory, f"{_channel_name(self.prefix, coil)}_z{z:03d}.tif")
+            tif = self.files[coil] = tifffile.TiffWriter(path, bigtiff=self.bigtiff)
+        for frame in frames:
+            tif.write(frame, photometric='minisblack', contiguous=True)
+
+    def close(self):
+        for tif in self.files.values():
+            tif.close()
+        self.files = {}
+
+
+class _ArrayWriter:
+    """
+    float32 stacks: composite [nt, nz, ny, nx] and coils [nt, nz, nc, ny, nx],
+    as datasets 'rss' and 'coils' of an HDF5 file (one chunk per frame) or
+    as '<name>.npy' and '<name>_coils.npy' memory maps.
+    """
+    parallel = False
+
+    def __init__(self, path, fmt, shape, nc, composite, coils, times, slices):
+        nt, nz, ny, nx = shape
+        self.times = times
+        self.slices = slices
+        self.file = None
+        self.rss = self.coils = None
+        if fmt == 'h5':
+            self.file = h5py.File(path, 'w')
+            if composite:
+                self.rss = self.file.create_dataset(
+                    'rss', shape=shape, dtype=np.float32, chunks=(1, 1, ny, nx))
+            if coils:
+                self.coils = self.file.create_dataset(
+                    'coils', shape=(nt, nz, nc, ny, nx), dtype=np.float32,
+                    chunks=(1, 1, 1, ny, nx))
+        else:
+            root, ext = os.path.splitext(path)
+            if composite:
+                self.rss = np.lib.format.open_memmap(
+                    path, mode='w+', dtype=np.float32, shape=shape)
+            if coils:
+                coil_path = f"{root}_coils{ext}" if composite else path
+                self.coils = np.lib.format.open_memmap(
+                    coil_path, mode='w+', dtype=np.float32, shape=(nt, nz, nc, ny, nx))
+
+    def write_block(self, z, t, composite, coil_data):
+        nb = len(composite if composite is not None else coil_data)
+        t_idx = slice(t - self.times.start, t - self.times.start + nb)
+        z_idx = self.slices.index(z)
+        if self.rss is not None:
+            self.rss[t_idx, z_idx] = composite
+        if self.coils is not None:
+            self.coils[t_idx, z_idx] = coil_data
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            return
+        for array in (self.rss, self.coils):
+            if array is not None:
+                array.flush()
+
+
+def export_cine(kdata, path, fmt, mode=IMAGE, times=None, slices=None, composite=True,
+                coils=False, stats=None, window=None, prefix='frame', engine=None,
+                workers=None, block_size=8, progress=None, should_stop=None):
+    """
+    Reconstruct and write a cine series.
+
+    Args:
+        kdata (KSpaceStore or np.ndarray): Complex k-space [nt, nz, nc, ny, nx].
+        path (str): Output directory for 'png' and 'tiff'; output file for
+            'npy' (coils go to '<name>_coils.npy') and 'h5'.
+        fmt (str): One of FORMATS.
+        mode (str): Display mode (KSPACE or IMAGE).
+        times (range): Contiguous time frames to export (default: all).
+        slices (range): Slices to export (default: all).
+        composite (bool): Export the RSS composite.
+        coils (bool): Export every coil.
+        stats (DatasetStats): Statistics of `mode` of `kdata` (one channel
+            per coil of it) for image formats; computed if omitted.
+        window (WindowLevel): Display window for image formats (default:
+            the dataset's default window). It is copied, so later changes
+            do not affect a running export.
+        prefix (str): File name prefix for image formats.
+        engine (ReconEngine): Engine for the reconstruction (default: a
+            single-threaded-FFT engine per export, since the blocks are
+            already spread over threads).
+        workers (int): Reconstruction threads (default: CPU count).
+        block_size (int): Time frames reconstructed per task.
+        progress (callable): Called with (done, total) frames after each block.
+        should_stop (callable): Returns True to abandon the export; files
+            written so far are kept.
+
+    Returns:
+        bool: True if the export completed, False if it was stopped.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format '{fmt}' (use one of {', '.join(FORMATS)})")
+    if not (composite or coils):
+        raise ValueError("Nothing to export: select the composite and/or the coils")
+    nt, nz, nc, ny, nx = kdata.shape
+    times = times if times is not None else range(nt)
+    slices = slices if slices is not None else range(nz)
+    if times.step != 1:
+        raise ValueError("time ranges must be contiguous")
+    engine = engine or ReconEngine(workers=1)
+    workers = workers or os.cpu_count() or 1
+
+    luts = None
+    if fmt in IMAGE_FORMATS:
+        if stats is None:
+            stats = compute_dataset_stats(kdata, engine, mode)
+        elif len(stats.lo) != nc + 1:
+            raise ValueError(f"Statistics of {len(stats.lo) - 1} coils do not match "
+                             f"the {nc} coils being exported")
+        window = WindowLevel(window.level, window.width) if window is not None else WindowLevel()
+        luts = [window.lut(stats, None)] + [window.lut(stats, c) for c in range(nc)]
+
+    if fmt == 'png':
+        writer = _PngWriter(path, prefix)
+    elif fmt == 'tiff':
+        writer = _TiffWriter(path, prefix, ny * nx, len(times))
+    else:
+        writer = _ArrayWriter(path, fmt, (len(times), len(slices), ny, nx), nc,
+                              composite, coils, times, slices)
+
+    def write(z, t, composite_block, coil_block):
+        if luts is None:
+            writer.write_block(z, t, composite_block, coil_block)
+            return
+        if composite_block is not None:
+            writer.write(z, t, None, np.take(luts[0], stats.quantize(composite_block)))
+        if coil_block is not None:
+            codes = stats.quantize_coils(coil_block)
+            for c in range(nc):
+                writer.write(z, t, c, np.take(luts[c + 1], codes[:, c]))
+
+    def job(z, t_start, t_stop):
+        composite_block, coil_block = engine.reconstruct(kdata[t_start:t_stop, z], mode)
+        composite_block = composite_block if composite else None
+        coil_block = coil_block if coils else None
+        if writer.parallel:
+            write(z, t_start, composite_block, coil_block)
+            return z, t_start, None, None
+        return z, t_start, composite_block, coil_block
+
+    tasks = [(z, t, min(t + block_size, times.stop))
+             for z in slices for t in range(times.start, times.stop, block_size)]
+    total = len(times) * len(slices)
+    done = 0
+    stopped = False
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            # Results are consumed in submission order (TIFF pages must be
+            # appended in time order); at most 2 * workers blocks are held
+            pending = deque()
+            task_iter = iter(tasks)
+            while True:
+                for task in task_iter:
+                    pending.append((task, pool.submit(job, *task)))
+                    if len(pending) >= 2 * workers:
+                        break
+                if not pending:
+                    break
+                (z, t_start, t_stop), future = pending.popleft()
+                result = future.result()
+                if not writer.parallel:
+                    write(*result)
+                done += t_stop - t_start
+                if progress is not None:
+                    progress(done, total)
+                if should_stop is not None and should_stop():
+                    stopped = True
+                    for _, future in pending:
+                        future.cancel()
+                    break
+    finally:
+        writer.close()
+    return not stopped
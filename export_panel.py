@@ -0,0 +1,121 @@
+import threading
+
+from PyQt5.QtWidgets import QDialog, QDialogButtonBox, QFormLayout, QComboBox, QCheckBox
+from PyQt5.QtCore import QObject, QRunnable, pyqtSignal
+
+from coil_compression import CompressedKSpace
+from export import export_cine, tifffile
+from recon import KSPACE, IMAGE
+from utils import load_kdata
+
+# (label, format) in the order shown in the dialog
+FORMAT_CHOICES = (
+    ("PNG series", 'png'),
+    ("Multi-frame TIFF", 'tiff'),
+    ("NumPy stack (.npy)", 'npy'),
+    ("HDF5 stack (.h5)", 'h5'),
+)
+
+
+class ExportSignals(QObject):
+    progress = pyqtSignal(int, int)    # frames done, total
+    finished = pyqtSignal(bool, str)   # completed (False if cancelled), output path
+    failed = pyqtSignal(str)
+
+
+class ExportTask(QRunnable):
+    """
+    Runs export_cine on a worker thread.
+
+    The task opens its own handle on the file, so loading another dataset
+    in the viewer does not affect a running export. With `n_virtual`, it
+    exports the same SVD virtual coils as the viewer shows.
+    """
+
+    def __init__(self, file_name, path, fmt, n_virtual=0, **options):
+        """
+        Args:
+            file_name (str): k-space file.
+            path (str): Output directory or file, see export_cine.
+            fmt (str): One of FORMATS.
+            n_virtual (int): Compress to this many virtual coils (0: the
+                physical coils). `stats`, if given, must be of that source.
+            **options: Further export_cine arguments.
+        """
+        super().__init__()
+        self.file_name = file_name
+        self.path = path
+        self.fmt = fmt
+        self.n_virtual = n_virtual
+        self.options = options
+        self.signals = ExportSignals()
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def run(self):
+        try:
+            with load_kdata(self.file_name) as kdata:
+                source = CompressedKSpace(kdata, self.n_virtual) if self.n_virtual else kdata
+                completed = export_cine(
+                    source, self.path, self.fmt, progress=self.signals.progress.emit,
+                    should_stop=self._cancelled.is_set, **self.options
+                )
+        except Exception as e:
+            self.signals.failed.emit(str(e))
+            return
+        self.signals.finished.emit(completed, self.path)
+
+
+class ExportDialog(QDialog):
+    """Options of a cine export: format, slices, channels and display mode."""
+
+    def __init__(self, mode, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Export Cine")
+        layout = QFormLayout(self)
+
+        self.format_box = QComboBox()
+        for label, fmt in FORMAT_CHOICES:
+            self.format_box.addItem(label, fmt)
+        if tifffile is None:
+            # Optional dependency; keep the entry visible but disabled
+            index = self.format_box.findData('tiff')
+            self.format_box.model().item(index).setEnabled(False)
+            self.format_box.setItemText(index, "Multi-frame TIFF (requires tifffile)")
+        layout.addRow("Format", self.format_box)
+
+        self.mode_box = QComboBox()
+        self.mode_box.addItem("Image space", IMAGE)
+        self.mode_box.addItem("K-space", KSPACE)
+        self.mode_box.setCurrentIndex(self.mode_box.findData(mode))
+        layout.addRow("Data", self.mode_box)
+
+        self.slices_box = QComboBox()
+        self.slices_box.addItems(["All slices", "Current slice"])
+        layout.addRow("Slices", self.slices_box)
+
+        self.composite_checkbox = QCheckBox("RSS composite")
+        self.composite_checkbox.setChecked(True)
+        self.coils_checkbox = QCheckBox("Individual coils")
+        layout.addRow("Channels", self.composite_checkbox)
+        layout.addRow("", self.coils_checkbox)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+        layout.addRow(buttons)
+
+    def fmt(self):
+        return self.format_box.currentData()
+
+    def mode(self):
+        return self.mode_box.currentData()
+
+    def current_slice_only(self):
+        return self.slices_box.currentIndex() == 1
+
+    def accept(self):
+        if self.composite_checkbox.isChecked() or self.coils_checkbox.isChecked():
+            super().accept()
@@ -0,0 +1,133 @@
+import threading
+
+from PyQt5.QtCore import QObject, QRunnable, pyqtSignal
+
+from sidecar import ReconSidecar
+from utils import load_kdata
+from windowing import compute_dataset_stats, preview_image
+
+
+class LoadCancelled(Exception):
+    pass
+
+
+class LoadedDataset:
+    """An opened dataset, ready to be shown: k-space store, sidecar and statistics."""
+
+    def __init__(self, file_name, kdata, sidecar, mode, stats):
+        self.file_name = file_name
+        self.kdata = kdata
+        self.sidecar = sidecar
+        self.mode = mode
+        self.stats = stats
+
+    def close(self):
+        if self.sidecar is not None:
+            self.sidecar.close()
+        self.kdata.close()
+
+
+class LoadSignals(QObject):
+    progress = pyqtSignal(int, str, int, int)  # request id, message, done, total
+    firstFrame = pyqtSignal(int, object)       # request id, uint8 preview image
+    finished = pyqtSignal(int, object)         # request id, LoadedDataset
+    failed = pyqtSignal(int, str)
+    cancelled = pyqtSignal(int)
+
+
+class LoadTask(QRunnable):
+    """
+    Opens a k-space file on a worker thread.
+
+    The store is opened lazily, then the requested first frame is
+    reconstructed and sent as a preview windowed to its own range, so it
+    can be shown before the dataset-wide statistics (which sample frames
+    across the whole file) are ready. `cancel()` stops the task at the
+    next frame boundary; its store and sidecar are closed.
+    """
+
+    def __init__(self, request_id, file_name, engine, mode, first_frame=(0, 0),
+                 use_sidecar=False, stats_frames=16):
+        """
+        Args:
+            request_id (int): Echoed in every signal, to drop stale results.
+            file_name (str): k-space file to open.
+            engine (ReconEngine): Engine for the preview and the statistics.
+            mode (str): Display mode the statistics are computed for.
+            first_frame (tuple): (t, z) shown first, clamped to the data.
+            use_sidecar (bool): Also open the on-disk frame cache; stored
+                statistics are reused when present.
+            stats_frames (int): Frames sampled for the statistics.
+        """
+        super().__init__()
+        self.request_id = request_id
+        self.file_name = file_name
+        self.engine = engine
+        self.mode = mode
+        self.first_frame = first_frame
+        self.use_sidecar = use_sidecar
+        self.stats_frames = stats_frames
+        self.signals = LoadSignals()
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def _check_cancelled(self):
+        if self._cancelled.is_set():
+            raise LoadCancelled()
+
+    def _progress(self, message, done=0, total=0):
+        self._check_cancelled()
+        self.signals.progress.emit(self.request_id, message, done, total)
+
+    def run(self):
+        kdata = sidecar = None
+        profiler = self.engine.profiler
+        try:
+            self._progress("Opening file")
+            with profiler.stage('open'):
+                kdata = load_kdata(self.file_name)
+            nt, nz = kdata.shape[:2]
+
+            stats = None
+            if self.use_sidecar:
+                try:
+                    sidecar = ReconSidecar(self.file_name, kdata.shape)
+                    stats = sidecar.read_stats(self.mode)
+                except OSError as e:
+                    print(f"Disk cache unavailable: {e}")
+
+            if stats is None:
+                # Show something while the statistics are computed
+                self._progress("Reconstructing first frame")
+                t, z = (min(self.first_frame[0], nt - 1), min(self.first_frame[1], nz - 1))
+                composite, _ = self.engine.reconstruct(kdata[t, z], self.mode)
+                self._check_cancelled()
+                self.signals.firstFrame.emit(self.request_id, preview_image(composite))
+
+                def report(done, total):
+                    self._progress("Computing display statistics", done, total)
+
+                with profiler.stage('stats'), profiler.suppressed():
+                    stats = compute_dataset_stats(kdata, self.engine, self.mode,
+                                                  max_frames=self.stats_frames, progress=report)
+            self._check_cancelled()
+        except LoadCancelled:
+            self._close(kdata, sidecar)
+            self.signals.cancelled.emit(self.request_id)
+            return
+        except Exception as e:
+            self._close(kdata, sidecar)
+            self.signals.failed.emit(self.request_id, str(e))
+            return
+        self.signals.finished.emit(
+            self.request_id, LoadedDataset(self.file_name, kdata, sidecar, self.mode, stats)
+        )
+
+    @staticmethod
+    def _close(kdata, sidecar):
+        if sidecar is not None:
+            sidecar.close()
+        if kdata is not None:
+            kdata.close()
@@ -0,0 +1,99 @@
+import threading
+from collections import OrderedDict
+
+# Default memory budget for cached display frames (256 MiB)
+DEFAULT_MAX_BYTES = 256 * 1024 ** 2
+
+
+class FrameCache:
+    """
+    LRU cache of display-ready frames bounded by their total size in bytes.
+
+    Keys are tuples such as (time, slice, mode, coil), where `coil` is None
+    for the composite image. Values are NumPy arrays; when adding a frame
+    would exceed the budget, the least recently used frames are evicted.
+    All methods are thread-safe.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._frames = OrderedDict()
+        self._nbytes = 0
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = 0
+
+    def get(self, key):
+        """Return the cached frame for `key` (marking it recently used), or None."""
+        with self._lock:
+            frame = self._frames.get(key)
+            if frame is None:
+                self.misses += 1
+                return None
+            self._frames.move_to_end(key)
+            self.hits += 1
+            return frame
+
+    def put(self, key, frame):
+        """Add or replace a frame, evicting old frames to stay within budget."""
+        if frame.nbytes > self.max_bytes:
+            return
+        with self._lock:
+            old = self._frames.pop(key, None)
+            if old is not None:
+                self._nbytes -= old.nbytes
+            self._frames[key] = frame
+            self._nbytes += frame.nbytes
+            self._evict()
+
+    def resize(self, max_bytes):
+        """Change the memory budget, evicting frames if it shrank."""
+        with self._lock:
+            self.max_bytes = max_bytes
+            self._evict()
+
+    def _evict(self):
+        while self._nbytes > self.max_bytes and self._frames:
+            _, frame = self._frames.popitem(last=False)
+            self._nbytes -= frame.nbytes
+            self.evictions += 1
+
+    def clear(self):
+        """Drop all frames and reset the statistics."""
+        with self._lock:
+            self._frames.clear()
+            self._nbytes = 0
+            self.hits = self.misses = self.evictions = 0
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._frames
+
+    def __len__(self):
+        return len(self._frames)
+
+    @property
+    def nbytes(self):
+        return self._nbytes
+
+    def stats(self):
+        """
+        Returns:
+            dict: Hit/miss counts, hit rate, evictions and memory usage.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'frames': len(self._frames),
+                'nbytes': self._nbytes,
+                'max_bytes': self.max_bytes,
+            }
+
+    def __repr__(self):
+        s = self.stats()
+        return (f"FrameCache({s['frames']} frames, "
+                f"{s['nbytes'] / 1024 ** 2:.1f}/{s['max_bytes'] / 1024 ** 2:.0f} MiB, "
+                f"hits={s['hits']}, misses={s['misses']}, hit rate={s['hit_rate']:.0%})")
@@ -0,0 +1,234 @@
+import math
+
+import h5py
+import numpy as np
+
+# HDF5 chunk cache defaults. 64 MiB holds a few [t, z] slabs of a typical
+# multi-coil cine; the slot count should be a prime ~100x the number of
+# chunks that fit in the cache.
+DEFAULT_CACHE_BYTES = 64 * 1024 ** 2
+DEFAULT_CACHE_SLOTS = 10007
+DEFAULT_CACHE_W0 = 0.75
+# Upper bound of the per-dataset chunk cache grown to fit a slab
+MAX_CACHE_BYTES = 1024 ** 3
+
+# Dataset names tried when the requested key is missing
+KSPACE_KEYS = ('kspace_full', 'kspace', 'kdata', 'data')
+
+
+def _is_complex_compound(dtype):
+    """Whether a compound dtype holds (real, imag) or h5py-style (r, i) fields."""
+    names = set(dtype.names or ())
+    return {'real', 'imag'} <= names or {'r', 'i'} <= names
+
+
+def _complex_fields(dtype):
+    return ('real', 'imag') if 'real' in dtype.names else ('r', 'i')
+
+
+def _is_complex64_layout(dtype):
+    """Compound of two little-endian float32 fields at offsets 0 and 4."""
+    if dtype.itemsize != 8:
+        return False
+    re, im = (dtype.fields[name] for name in _complex_fields(dtype))
+    f4 = np.dtype('<f4')
+    return re[0] == f4 and re[1] == 0 and im[0] == f4 and im[1] == 4
+
+
+def _next_prime(n):
+    n = max(n, 2) | 1
+    while any(n % p == 0 for p in range(3, int(math.isqrt(n)) + 1, 2)):
+        n += 2
+    return n
+
+
+def slab_chunk_count(shape, chunks):
+    """
+    Number of chunks read for one [t, z] slab of a dataset.
+
+    Args:
+        shape (tuple): Dataset shape [nt, nz, nc, ny, nx, ...].
+        chunks (tuple): Chunk shape, or None for a contiguous dataset.
+
+    Returns:
+        int: Chunks touched by one slab (1 for contiguous data).
+    """
+    if chunks is None:
+        return 1
+    return int(np.prod([math.ceil(n / c) for n, c in zip(shape[2:], chunks[2:])]))
+
+
+def slab_cache_bytes(dset, minimum=DEFAULT_CACHE_BYTES, maximum=MAX_CACHE_BYTES):
+    """
+    Chunk cache size holding every chunk of two [t, z] slabs of a dataset,
+    so stepping through time re-reads no chunk that spans several frames.
+    """
+    if dset.chunks is None:
+        return minimum
+    chunk_bytes = int(np.prod(dset.chunks)) * dset.dtype.itemsize
+    needed = 2 * slab_chunk_count(dset.shape, dset.chunks) * chunk_bytes
+    return int(min(max(needed, minimum), max(maximum, minimum)))
+
+
+class KSpaceStore:
+    """
+    Lazy, read-only view of the k-space data stored in an HDF5 file.
+
+    The HDF5 file stays open for the lifetime of the store and indexing
+    reads only the requested hyperslab from disk, so opening a file costs
+    nothing up front and files larger than physical memory can be browsed.
+
+    The data is presented as a complex64 array [nt, nz, nc, ny, nx], e.g.
+    `store[t, z]` returns the [nc, ny, nx] slab of one time frame and slice.
+    Supported layouts are a MATLAB v7.3 group with 'real' and 'imag'
+    datasets, a compound (real, imag) or (r, i) dataset, a native complex
+    dataset, and a float dataset [nt, nz, nc, ny, nx, 2]. Single-precision
+    data is viewed as complex64 without a copy; other layouts are converted
+    one slab at a time as they are read.
+
+    Each dataset gets its own chunk cache, grown so that the chunks of a
+    slab fit in it (see slab_cache_bytes). `chunks_per_frame` reports how
+    many chunks one slab read touches; repack.py rewrites a file so that it
+    is 1.
+    """
+
+    def __init__(self, filename, key='kspace_full',
+                 cache_bytes=DEFAULT_CACHE_BYTES,
+                 cache_slots=DEFAULT_CACHE_SLOTS,
+                 cache_w0=DEFAULT_CACHE_W0):
+        """
+        Args:
+            filename (str): Path to the .mat or .h5 file.
+            key (str): Name of the k-space dataset or group in the file; if
+                missing, the names in KSPACE_KEYS are tried.
+            cache_bytes (int): Minimum size of each dataset's chunk cache.
+            cache_slots (int): Minimum number of hash slots in the chunk cache.
+            cache_w0 (float): Chunk preemption policy (0 to 1), see h5py.
+        """
+        self.filename = filename
+        self._file = h5py.File(filename, 'r')
+        self._cache = (cache_bytes, cache_slots, cache_w0)
+        self._real = self._imag = self._compound = self._complex = self._pairs = None
+        try:
+            key = self._find_key(key)
+            node = self._file[key]
+            if isinstance(node, h5py.Group):
+                # Real and imaginary parts stored as separate datasets
+                self._real = self._open(key + '/real')
+                self._imag = self._open(key + '/imag')
+                shape = self._real.shape
+                self.source_dtype = self._real.dtype
+                source = self._real
+            elif node.dtype.names and _is_complex_compound(node.dtype):
+                # MATLAB or h5py compound complex dataset
+                self._compound = source = self._open(key)
+                shape = node.shape
+                self.source_dtype = node.dtype
+            elif node.dtype.kind == 'c':
+                self._complex = source = self._open(key)
+                shape = node.shape
+                self.source_dtype = node.dtype
+            elif node.dtype.kind == 'f' and node.ndim == 6 and node.shape[-1] == 2:
+                # Real/imaginary pairs on a trailing axis
+                self._pairs = source = self._open(key)
+                shape = node.shape[:-1]
+                self.source_dtype = node.dtype
+            else:
+                raise KeyError(f"'{key}' does not contain complex k-space data")
+        except Exception:
+            self._file.close()
+            raise
+
+        self.key = key
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(np.complex64)
+        self.chunks = source.chunks
+        self.chunks_per_frame = slab_chunk_count(source.shape, source.chunks)
+
+    def _find_key(self, key):
+        if key in self._file:
+            return key
+        for name in KSPACE_KEYS:
+            if name in self._file:
+                return name
+        raise KeyError(f"No k-space data ('{key}') in {self.filename}")
+
+    def _open(self, path):
+        """Open a dataset with a chunk cache sized for slab reads."""
+        dset = self._file[path]
+        if dset.chunks is None:
+            return dset
+        cache_bytes, cache_slots, cache_w0 = self._cache
+        nbytes = slab_cache_bytes(dset, cache_bytes)
+        chunk_bytes = int(np.prod(dset.chunks)) * dset.dtype.itemsize
+        nslots = max(cache_slots, _next_prime(100 * (nbytes // chunk_bytes)))
+        dapl = h5py.h5p.create(h5py.h5p.DATASET_ACCESS)
+        dapl.set_chunk_cache(nslots, nbytes, cache_w0)
+        return h5py.Dataset(h5py.h5d.open(self._file.id, path.encode(), dapl=dapl))
+
+    @property
+    def ndim(self):
+        return len(self.shape)
+
+    @property
+    def nbytes(self):
+        return int(np.prod(self.shape)) * self.dtype.itemsize
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __getitem__(self, key):
+        if self._compound is not None:
+            raw = self._compound[key]
+            if _is_complex64_layout(raw.dtype):
+                # Same memory layout as complex64: reinterpret in place
+                return raw.view(np.complex64)
+            re, im = _complex_fields(raw.dtype)
+            data = np.empty(raw.shape, dtype=np.complex64)
+            data.real = raw[re]
+            data.imag = raw[im]
+            return data
+
+        if self._complex is not None:
+            return self._complex[key].astype(np.complex64, copy=False)
+
+        if self._pairs is not None:
+            if not isinstance(key, tuple):
+                key = (key,)
+            if not any(k is Ellipsis for k in key):
+                key += (Ellipsis,)  # keep the real/imaginary axis
+            raw = self._pairs[key]
+            if raw.dtype == np.float32 and raw.flags.c_contiguous:
+                return raw.view(np.complex64)[..., 0]
+            data = np.empty(raw.shape[:-1], dtype=np.complex64)
+            data.real = raw[..., 0]
+            data.imag = raw[..., 1]
+            return data
+
+        real = self._real[key]
+        data = np.empty(real.shape, dtype=np.complex64)
+        data.real = real
+        data.imag = self._imag[key]
+        return data
+
+    def __array__(self, dtype=None, copy=None):
+        data = self[...]
+        return data if dtype is None else data.astype(dtype)
+
+    @property
+    def closed(self):
+        return not self._file.id.valid
+
+    def close(self):
+        """Close the underlying HDF5 file."""
+        if not self.closed:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __repr__(self):
+        return f"KSpaceStore('{self.filename}', shape={self.shape}, dtype={self.dtype})"
@@ -0,0 +1,59 @@
+import math
+
+import numpy as np
+
+
+def block_mean_downsample(image, factor):
+    """
+    Downsample a 2D image by averaging non-overlapping factor x factor blocks.
+
+    Rows/columns that do not fill a whole block are dropped. The result has
+    the input's dtype.
+
+    Args:
+        image (np.ndarray): Image [ny, nx].
+        factor (int): Integer downsampling factor (1 returns the input).
+
+    Returns:
+        np.ndarray: Image [ny // factor, nx // factor].
+    """
+    if factor <= 1:
+        return image
+    ny, nx = image.shape
+    h, w = ny // factor, nx // factor
+    blocks = image[:h * factor, :w * factor].reshape(h, factor, w, factor)
+    return blocks.mean(axis=(1, 3), dtype=np.float32).astype(image.dtype)
+
+
+def fit_factor(shape, target_width, target_height):
+    """Largest integer factor that keeps an image at least as big as the target."""
+    ny, nx = shape
+    return max(1, min(ny // max(target_height, 1), nx // max(target_width, 1)))
+
+
+class ImagePyramid:
+    """
+    Lazily built multi-resolution pyramid of one image.
+
+    Level k is the base image downsampled by 2**k with block means; each
+    level is computed from the previous one the first time it is asked for.
+    """
+
+    def __init__(self, base, min_size=32):
+        self.levels = [base]
+        self.min_size = min_size
+        self.max_level = max(0, int(math.log2(max(min(base.shape) / min_size, 1))))
+
+    def level(self, k):
+        """The image at level k (clamped to the available levels)."""
+        k = min(max(k, 0), self.max_level)
+        while len(self.levels) <= k:
+            self.levels.append(block_mean_downsample(self.levels[-1], 2))
+        return self.levels[k]
+
+    @staticmethod
+    def level_for_scale(scale):
+        """Pyramid level whose resolution best matches a view scale (< 1 zooms out)."""
+        if scale >= 1:
+            return 0
+        return int(math.floor(math.log2(1 / scale)))
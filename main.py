@@ -1,10 +1,11 @@
 import sys
 from PyQt5.QtWidgets import QApplication
-from mri_viewer import MRIViewer
+from mri_viewer import MRIViewer, parse_args
 
 def main():
-    app = QApplication(sys.argv)
-    viewer = MRIViewer()
+    args, qt_args = parse_args(sys.argv[1:])
+    app = QApplication(sys.argv[:1] + qt_args)
+    viewer = MRIViewer(recon_processes=args.recon_processes)
     viewer.show()
     sys.exit(app.exec_())
 
@@ -0,0 +1,98 @@
+"""
+M-mode (x-t) reformats of a slice along a line.
+
+The composite frames of the current slice are reconstructed once into a
+float32 volume [nt, ny, nx] held in a memory-mapped temporary file, filled
+lazily the first time a line is drawn. Every line after that, or a moved
+line, is sampled straight from the volume without any reconstruction.
+"""
+import math
+import tempfile
+
+import numpy as np
+
+
+class SliceVolume:
+    """
+    Reconstructed composite frames of one slice in a float32 memory map.
+
+    Frames are written as they are filled; `filled` records which ones
+    hold data. The backing file is anonymous and removed when the volume
+    is closed or garbage collected.
+    """
+
+    def __init__(self, shape, slice_index, mode, directory=None):
+        """
+        Args:
+            shape (tuple): (nt, ny, nx).
+            slice_index (int): Slice the frames belong to.
+            mode (str): Display mode of the frames (KSPACE or IMAGE).
+            directory (str): Directory of the backing file (default: the
+                system temporary directory).
+        """
+        self.slice_index = slice_index
+        self.mode = mode
+        self._file = tempfile.TemporaryFile(prefix='slice_volume_', dir=directory)
+        self.data = np.memmap(self._file, dtype=np.float32, mode='w+', shape=tuple(shape))
+        self.filled = np.zeros(shape[0], dtype=bool)
+
+    @property
+    def complete(self):
+        return bool(self.filled.all())
+
+    def fill(self, renderer, progress=None, should_stop=None):
+        """
+        Fill the missing frames through the renderer, which reuses cached
+        frames unless they are saturated (see FrameRenderer.slice_frames),
+        so profiles are not clipped to the display range.
+
+        Args:
+            renderer (FrameRenderer): Source of frames.
+            progress (callable): Called with (done, total) frames.
+            should_stop (callable): Returns True to abandon filling; frames
+                filled so far are kept.
+
+        Returns:
+            bool: True if the volume is complete.
+        """
+        missing = np.flatnonzero(~self.filled)
+        nt = len(self.filled)
+        for t, composite, _ in renderer.slice_frames(self.slice_index, self.mode,
+                                                      times=missing.tolist(), coils=False):
+            if should_stop is not None and should_stop():
+                return False
+            self.data[t] = composite
+            self.filled[t] = True
+            if progress is not None:
+                progress(int(self.filled.sum()), nt)
+        return self.complete
+
+    def line_profile(self, x0, y0, x1, y1):
+        """
+        Intensities along a line over time, with bilinear interpolation.
+
+        Points are in pixel-center coordinates (pixel (x, y) spans
+        [x - 0.5, x + 0.5)); the line is sampled about once per pixel of
+        its length and clipped to the image.
+
+        Returns:
+            np.ndarray: float32 [nt, n_points], time along the first axis.
+        """
+        nt, ny, nx = self.data.shape
+        n = max(2, int(math.ceil(math.hypot(x1 - x0, y1 - y0))) + 1)
+        xs = np.clip(np.linspace(x0, x1, n), 0, nx - 1)
+        ys = np.clip(np.linspace(y0, y1, n), 0, ny - 1)
+        xi = np.minimum(xs.astype(int), nx - 2) if nx > 1 else np.zeros(n, dtype=int)
+        yi = np.minimum(ys.astype(int), ny - 2) if ny > 1 else np.zeros(n, dtype=int)
+        wx = (xs - xi).astype(np.float32)
+        wy = (ys - yi).astype(np.float32)
+        xj = np.minimum(xi + 1, nx - 1)
+        yj = np.minimum(yi + 1, ny - 1)
+        data = self.data
+        top = data[:, yi, xi] * (1 - wx) + data[:, yi, xj] * wx
+        bottom = data[:, yj, xi] * (1 - wx) + data[:, yj, xj] * wx
+        return (top * (1 - wy) + bottom * wy).astype(np.float32)
+
+    def close(self):
+        self.data = None
+        self._file.close()
@@ -0,0 +1,90 @@
+import numpy as np
+from PyQt5.QtWidgets import QWidget, QVBoxLayout, QLabel, QSizePolicy
+from PyQt5.QtCore import QObject, QRunnable, QRectF, QPointF, Qt, pyqtSignal
+from PyQt5.QtGui import QImage, QPainter, QPen
+
+
+class VolumeSignals(QObject):
+    progress = pyqtSignal(int, int, int)  # request id, frames done, total
+    finished = pyqtSignal(int, bool)      # request id, complete
+    failed = pyqtSignal(int, str)
+
+
+class VolumeTask(QRunnable):
+    """Fills a SliceVolume on a worker thread."""
+
+    def __init__(self, request_id, volume, renderer, should_stop=None):
+        super().__init__()
+        self.request_id = request_id
+        self.volume = volume
+        self.renderer = renderer
+        self.should_stop = should_stop
+        self.signals = VolumeSignals()
+
+    def run(self):
+        try:
+            complete = self.volume.fill(
+                self.renderer,
+                progress=lambda done, total: self.signals.progress.emit(self.request_id, done, total),
+                should_stop=self.should_stop,
+            )
+        except Exception as e:
+            self.signals.failed.emit(self.request_id, str(e))
+            return
+        self.signals.finished.emit(self.request_id, complete)
+
+
+class XtView(QWidget):
+    """An x-t image stretched to the widget, time along x, with a marker at the current frame."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.image = None
+        self.marker = None
+        self.setMinimumHeight(150)
+        self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+
+    def set_image(self, array_2d, marker=None):
+        """Show a uint8 image [n_points, nt]."""
+        array_2d = np.ascontiguousarray(array_2d)
+        h, w = array_2d.shape
+        self.image = QImage(array_2d.data, w, h, w, QImage.Format_Grayscale8).copy()
+        self.marker = marker
+        self.update()
+
+    def clear(self):
+        self.image = None
+        self.update()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), Qt.black)
+        if self.image is None:
+            return
+        # Nearest-neighbour stretch keeps every frame a sharp column
+        painter.drawImage(QRectF(self.rect()), self.image)
+        nt = self.image.width()
+        if self.marker is not None and 0 <= self.marker < nt:
+            x = (self.marker + 0.5) * self.width() / nt
+            painter.setPen(QPen(Qt.darkYellow))
+            painter.drawLine(QPointF(x, 0), QPointF(x, self.height()))
+
+
+class MModePanel(QWidget):
+    """M-mode panel: the x-t image of the line drawn on the composite view."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        layout = QVBoxLayout(self)
+        self.info_label = QLabel("Check 'M-mode Line' and drag a line on the composite image.")
+        self.info_label.setWordWrap(True)
+        layout.addWidget(self.info_label)
+        self.view = XtView()
+        layout.addWidget(self.view, stretch=1)
+
+    def set_busy(self, text):
+        self.info_label.setText(text)
+
+    def set_image(self, array_2d, marker, text):
+        self.view.set_image(array_2d, marker)
+        self.info_label.setText(text)
@@ -1,3 +1,5 @@
+import argparse
+import math
 import sys
 import numpy as np
 from PyQt5.QtWidgets import (
@@ -13,20 +15,61 @@ from PyQt5.QtWidgets import (
     QTabWidget,
     QGridLayout,
     QLineEdit,
-    QTabBar
+    QTabBar,
+    QSpinBox,
+    QCheckBox,
+    QDockWidget,
+    QStackedWidget,
+    QProgressBar,
+    QDialog,
+    QComboBox
 )
-from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtCore import Qt, QTimer, QElapsedTimer, QThreadPool
 from PyQt5.QtGui import QPixmap, QImage
 
-# Utilities: load_kdata, load_slice, etc.
-from utils import load_kdata, load_slice  # You can remove make_3d_volume, numpy_to_vtk_image if no longer needed.
+# Background file loading and cine export
+from file_loader import LoadTask
+from export_panel import ExportDialog, ExportTask
+
+# Cached frame rendering
+from frame_cache import FrameCache, DEFAULT_MAX_BYTES
+from renderer import FrameRenderer
+from recon import ReconEngine, KSPACE, IMAGE
+from shm_pool import SharedMemoryEngine
+from render_scheduler import RenderScheduler
+from sidecar import ReconSidecar, SIDECAR_SUFFIX
+from windowing import WindowLevel
+
+# ROI time-intensity analysis
+from roi import roi_box
+from roi_panel import RoiPanel, RoiTask
+
+# Indexed study folders
+from study_browser import StudyBrowser
 
 # Zoom/Pan composite view
 from zoom_pan import ZoomPanGraphicsView
+from coil_atlas import CoilAtlas
+from lod import ImagePyramid, block_mean_downsample, fit_factor
+from coil_compression import CompressedKSpace
+
+# Per-stage timing overlay and trace
+from profiling import StageProfiler
+
+# Temporal mean/std/MIP maps
+from temporal_stats import MAP_KINDS, TemporalTask
+
+# M-mode (x-t) views along a line
+from mmode import SliceVolume
+from mmode_panel import MModePanel, VolumeTask
+
+# Temporal maps kept, by (slice, mode)
+MAX_TEMPORAL_MAPS = 4
 
 
 class MRIViewer(QMainWindow):
-    def __init__(self):
+    def __init__(self, cache_bytes=DEFAULT_MAX_BYTES, fft_backend=None, fft_workers=None,
+                 recon_processes=None):
         super().__init__()
         self.setWindowTitle("Dynamic MRI Viewer")
         self.setGeometry(100, 100, 1200, 800)
@@ -53,6 +96,11 @@ class MRIViewer(QMainWindow):
 
         # Zoom/pan composite view
         self.image_view = ZoomPanGraphicsView()
+        self.image_view.roiSelected.connect(self.analyze_roi)
+        self.image_view.lineSelected.connect(self.set_mmode_line)
+        self.image_view.zoomChanged.connect(self.display_composite_pyramid)
+        self.composite_pyramid = None  # resolution levels of the shown frame
+        self.composite_stats = None
         self.composite_layout.addWidget(self.image_view, stretch=1)
 
         # Annotation input
@@ -67,8 +115,33 @@ class MRIViewer(QMainWindow):
         self.coil_tab = QWidget()
         self.tab_widget.addTab(self.coil_tab, "Coil Images")
         self.tab_widget.currentChanged.connect(self.on_tab_change)
-        self.coil_layout = QGridLayout(self.coil_tab)
+        coil_tab_layout = QVBoxLayout(self.coil_tab)
+
+        self.mosaic_checkbox = QCheckBox("Mosaic view (zoomable, double-click a coil to open it)")
+        self.mosaic_checkbox.toggled.connect(self.set_coil_mosaic)
+        coil_tab_layout.addWidget(self.mosaic_checkbox)
+
+        self.coil_stack = QStackedWidget()
+        coil_tab_layout.addWidget(self.coil_stack, stretch=1)
+
+        # Grid of one label per coil
+        self.coil_grid_widget = QWidget()
+        self.coil_stack.addWidget(self.coil_grid_widget)
+        self.coil_layout = QGridLayout(self.coil_grid_widget)
         self.coil_layout.setAlignment(Qt.AlignTop)
+        # Must match the margin/spacing assumed by ensure_coil_grid, or the
+        # fixed-size labels push the tab (and window) wider on every rebuild
+        self.coil_layout.setContentsMargins(5, 5, 5, 5)
+        self.coil_layout.setSpacing(5)
+        self.coil_labels = []        # persistent coil image widgets
+        self.coil_grid_key = None    # (grid size, nc, ny, nx) the grid was built for
+        self.coil_grid_widget.resizeEvent = lambda e: self.on_coil_tab_resize()
+
+        # Mosaic of all coils in one zoomable image
+        self.coil_atlas_view = ZoomPanGraphicsView()
+        self.coil_atlas_view.imageDoubleClicked.connect(self.on_atlas_double_click)
+        self.coil_stack.addWidget(self.coil_atlas_view)
+        self.coil_atlas = None
 
         # Disable close buttons for the first two tabs (Composite & Coil Images)
         tab_bar = self.tab_widget.tabBar()
@@ -82,28 +155,114 @@ class MRIViewer(QMainWindow):
         self.controls = QHBoxLayout()
         self.layout.addLayout(self.controls)
 
+        # Second row: cache, profiling and analysis options
+        self.options = QHBoxLayout()
+        self.layout.addLayout(self.options)
+
         self.load_button = QPushButton("Load MRI Image")
         self.load_button.clicked.connect(self.load_image)
         self.controls.addWidget(self.load_button)
 
+        self.browse_button = QPushButton("Browse Studies")
+        self.browse_button.clicked.connect(self.show_study_browser)
+        self.controls.addWidget(self.browse_button)
+        self.study_browser = None  # created with its dock on first use
+
         self.save_button = QPushButton("Save Image")
         self.save_button.clicked.connect(self.save_image)
         self.save_button.setEnabled(False)
         self.controls.addWidget(self.save_button)
 
+        self.export_button = QPushButton("Export Cine")
+        self.export_button.clicked.connect(self.export_cine)
+        self.export_button.setEnabled(False)
+        self.controls.addWidget(self.export_button)
+
         self.play_button = QPushButton("Play")
         self.play_button.clicked.connect(self.toggle_playback)
         self.play_button.setEnabled(False)
         self.controls.addWidget(self.play_button)
 
+        self.fps_spinbox = QSpinBox()
+        self.fps_spinbox.setRange(1, 60)
+        self.fps_spinbox.setValue(10)
+        self.fps_spinbox.setSuffix(" fps")
+        self.fps_spinbox.valueChanged.connect(self.set_playback_fps)
+        self.controls.addWidget(self.fps_spinbox)
+
         self.timer = QTimer(self)
+        self.timer.setTimerType(Qt.PreciseTimer)
         self.timer.timeout.connect(self.playback_next_frame)
+        self.play_clock = QElapsedTimer()
+        self.play_origin = 0
+        self.dropped_frames = 0
+        self.playback_fps = self.fps_spinbox.value()
+        self.prefetch_frames = 8  # frames rendered ahead during playback
+
+        self.sidecar_checkbox = QCheckBox("Disk cache")
+        self.sidecar_checkbox.setToolTip(
+            f"Keep reconstructed frames in a '<name>{SIDECAR_SUFFIX}' file next to "
+            "the dataset so it reopens without reconstruction"
+        )
+        self.sidecar_checkbox.toggled.connect(self.set_sidecar_enabled)
+        self.options.addWidget(self.sidecar_checkbox)
+
+        self.progressive_checkbox = QCheckBox("Progressive")
+        self.progressive_checkbox.setToolTip(
+            "Show a fast low-resolution preview while dragging the slice or time "
+            "slider, refined to full resolution on release"
+        )
+        self.progressive_checkbox.setChecked(True)
+        self.options.addWidget(self.progressive_checkbox)
+
+        self.profile_checkbox = QCheckBox("Profile")
+        self.profile_checkbox.setToolTip("Show live FPS and per-stage timings, and record a timing trace")
+        self.profile_checkbox.toggled.connect(self.set_profiling)
+        self.options.addWidget(self.profile_checkbox)
+
+        self.save_trace_button = QPushButton("Save Timings")
+        self.save_trace_button.clicked.connect(self.save_timing_trace)
+        self.save_trace_button.setEnabled(False)
+        self.options.addWidget(self.save_trace_button)
+
+        self.virtual_coils_spinbox = QSpinBox()
+        self.virtual_coils_spinbox.setRange(0, 0)
+        self.virtual_coils_spinbox.setSpecialValueText("All coils")
+        self.virtual_coils_spinbox.setSuffix(" virtual coils")
+        self.virtual_coils_spinbox.setToolTip(
+            "Compress the coils to fewer SVD virtual coils before reconstruction"
+        )
+        self.virtual_coils_spinbox.setKeyboardTracking(False)
+        self.virtual_coils_spinbox.setEnabled(False)
+        self.virtual_coils_spinbox.valueChanged.connect(self.set_coil_compression)
+        self.options.addWidget(self.virtual_coils_spinbox)
+        self.compression_label = QLabel()  # retained signal energy
+        self.options.addWidget(self.compression_label)
 
         self.switch_space_button = QPushButton("Switch to Image Space")
         self.switch_space_button.clicked.connect(self.toggle_space)
         self.switch_space_button.setEnabled(False)
         self.controls.addWidget(self.switch_space_button)
 
+        # Frames, or one of the temporal maps of the current slice
+        self.map_box = QComboBox()
+        self.map_box.addItem("Frames", None)
+        for label, kind in MAP_KINDS:
+            self.map_box.addItem(label, kind)
+        self.map_box.setToolTip("Show the frames, or a map over all time frames of the slice")
+        self.map_box.currentIndexChanged.connect(self.set_map_kind)
+        self.map_box.setEnabled(False)
+        self.options.addWidget(self.map_box)
+
+        # Left-drag on the composite draws the M-mode line while checked
+        self.mmode_button = QPushButton("M-mode Line")
+        self.mmode_button.setCheckable(True)
+        self.mmode_button.setToolTip("Drag a line on the composite image to show it over time")
+        self.mmode_button.toggled.connect(self.set_mmode_line_mode)
+        self.mmode_button.setEnabled(False)
+        self.options.addWidget(self.mmode_button)
+        self.options.addStretch()
+
         # Sliders (slice, time)
         self.slider_layout = QHBoxLayout()
         self.layout.addLayout(self.slider_layout)
@@ -114,11 +273,103 @@ class MRIViewer(QMainWindow):
         self.time_slider = self.create_labeled_slider("Time", self.update_slice)
         self.slider_layout.addWidget(self.time_slider)
 
+        # Previews shown while dragging are refined when the slider is released
+        for slider in (self.slice_slider, self.time_slider):
+            slider.findChild(QSlider).sliderReleased.connect(self.update_slice)
+
+        # Window/level, relative to the dataset's default window (percent)
+        self.window_level = WindowLevel()
+        self.window_layout = QHBoxLayout()
+        self.layout.addLayout(self.window_layout)
+
+        self.level_slider = self.create_labeled_slider(
+            "Level %", self.update_window, minimum=0, maximum=100, value=50
+        )
+        self.window_layout.addWidget(self.level_slider)
+
+        self.width_slider = self.create_labeled_slider(
+            "Width %", self.update_window, minimum=1, maximum=200, value=100
+        )
+        self.window_layout.addWidget(self.width_slider)
+
         # MRI data placeholders
         self.kdata = None
+        self.file_name = None
+        self.sidecar = None
+        self.coil_compression = None  # CompressedKSpace view, if enabled
         self.nt = self.nz = self.nc = 0
         self.show_kspace = True  # Start in k-space mode
 
+        # Reconstructed display frames, shared by all views
+        self.frame_cache = FrameCache(cache_bytes)
+        self.profiler = StageProfiler()
+        if recon_processes:
+            # Transforms in worker processes, slabs exchanged in shared memory
+            self.engine = SharedMemoryEngine(recon_processes, fft_backend, profiler=self.profiler)
+        else:
+            self.engine = ReconEngine(fft_backend, fft_workers, profiler=self.profiler)
+        self.renderer = None
+
+        # Frames are reconstructed on a worker pool, latest request wins
+        self.scheduler = RenderScheduler(parent=self)
+        self.scheduler.frameReady.connect(self.on_frame_ready)
+        self.scheduler.renderFailed.connect(
+            lambda msg: print(f"Failed to render frame: {msg}")
+        )
+
+        # Files are opened and cines exported on a pool of our own: Qt
+        # converts large images on the global pool, which must not wait
+        # behind Python tasks (they need the GIL the GUI thread holds)
+        self.task_pool = QThreadPool(self)
+        self.load_task = None
+        self.load_request = 0
+        self.load_progress = QProgressBar()
+        self.load_progress.setMaximumWidth(200)
+        self.load_cancel_button = QPushButton("Cancel")
+        self.load_cancel_button.clicked.connect(self.cancel_load)
+        self.statusBar().addPermanentWidget(self.load_progress)
+        self.statusBar().addPermanentWidget(self.load_cancel_button)
+        self.load_progress.hide()
+        self.load_cancel_button.hide()
+
+        # A cine export runs in the background, one at a time
+        self.export_task = None
+        self.export_progress = QProgressBar()
+        self.export_progress.setMaximumWidth(200)
+        self.export_progress.setFormat("Export %p%")
+        self.export_cancel_button = QPushButton("Cancel Export")
+        self.export_cancel_button.clicked.connect(self.cancel_export)
+        self.statusBar().addPermanentWidget(self.export_progress)
+        self.statusBar().addPermanentWidget(self.export_cancel_button)
+        self.export_progress.hide()
+        self.export_cancel_button.hide()
+
+        # ROI analysis panel, shown once an ROI is selected
+        self.roi_panel = RoiPanel()
+        self.roi_dock = QDockWidget("ROI Analysis", self)
+        self.roi_dock.setWidget(self.roi_panel)
+        self.addDockWidget(Qt.RightDockWidgetArea, self.roi_dock)
+        self.roi_dock.hide()
+        self.roi_request = 0
+        self.roi_task = None
+
+        # Temporal maps by (slice, mode), computed in the background
+        self.temporal_maps = {}
+        self.temporal_request = 0
+        self.temporal_pending = None  # (slice, mode) being computed
+
+        # M-mode panel: a line sampled from a memory-mapped volume of the slice
+        self.mmode_panel = MModePanel()
+        self.mmode_dock = QDockWidget("M-mode", self)
+        self.mmode_dock.setWidget(self.mmode_panel)
+        self.addDockWidget(Qt.BottomDockWidgetArea, self.mmode_dock)
+        self.mmode_dock.hide()
+        self.mmode_dock.visibilityChanged.connect(lambda visible: visible and self.update_mmode())
+        self.mmode_line = None     # QLineF in scene (pixel) coordinates
+        self.mmode_profile = None  # float32 [nt, n_points] of the line
+        self.slice_volume = None   # SliceVolume of the current slice and mode
+        self.volume_request = 0
+
         # Hover label
         self.hover_label = QLabel(self)
         self.hover_label.setStyleSheet(
@@ -127,15 +378,26 @@ class MRIViewer(QMainWindow):
         self.hover_label.setAlignment(Qt.AlignCenter)
         self.hover_label.hide()
 
-    def create_labeled_slider(self, label_text, callback):
+        # Profiling overlay on the composite view
+        self.profile_label = QLabel(self.image_view)
+        self.profile_label.setStyleSheet(
+            "background-color: rgba(0, 0, 0, 0.6); color: lime; padding: 4px; font-family: monospace;"
+        )
+        self.profile_label.move(8, 8)
+        self.profile_label.hide()
+        self.profile_timer = QTimer(self)
+        self.profile_timer.timeout.connect(self.update_profile_overlay)
+
+    def create_labeled_slider(self, label_text, callback, minimum=0, maximum=0, value=0):
         w = QWidget()
         layout = QHBoxLayout(w)
         lbl = QLabel(label_text)
         sldr = QSlider(Qt.Horizontal)
-        sldr.setMinimum(0)
-        sldr.setMaximum(0)
+        sldr.setMinimum(minimum)
+        sldr.setMaximum(maximum)
+        sldr.setValue(value)
         sldr.valueChanged.connect(callback)
-        val_lbl = QLabel("0")
+        val_lbl = QLabel(str(value))
         sldr.valueChanged.connect(lambda v: val_lbl.setText(str(v)))
         layout.addWidget(lbl)
         layout.addWidget(sldr, stretch=1)
@@ -143,47 +405,337 @@ class MRIViewer(QMainWindow):
         return w
 
     def load_image(self):
-        """Load .mat file containing k-space data, then show it."""
+        """Load a .mat or .h5 file containing k-space data, then show it."""
         file_name, _ = QFileDialog.getOpenFileName(
-            self, "Open MRI File", "", "MATLAB Files (*.mat);;All Files (*)"
+            self, "Open MRI File", "",
+            "K-space Files (*.mat *.h5 *.hdf5);;MATLAB Files (*.mat);;HDF5 Files (*.h5 *.hdf5);;All Files (*)"
         )
         if file_name:
+            self.open_file(file_name)
+
+    def show_study_browser(self):
+        """Show the study folder browser; double-clicking a dataset opens it."""
+        if self.study_browser is None:
             try:
-                self.kdata = load_kdata(file_name)  # shape [nt, nz, nc, ny, nx, 2]
-                self.nt, self.nz, self.nc, *_ = self.kdata.shape[:3]
+                self.study_browser = StudyBrowser(self.task_pool)
+            except Exception as e:
+                print(f"Failed to open the study index: {e}")
+                self.statusBar().showMessage(f"Failed to open the study index: {e}")
+                return
+            self.study_browser.studySelected.connect(self.open_file)
+            self.study_dock = QDockWidget("Studies", self)
+            self.study_dock.setWidget(self.study_browser)
+            self.addDockWidget(Qt.LeftDockWidgetArea, self.study_dock)
+        self.study_dock.show()
+        if self.study_browser.directory is None:
+            self.study_browser.choose_directory()
+
+    def open_file(self, file_name):
+        """
+        Open a k-space file in the background. The current dataset is
+        closed right away; a preview of the current frame is shown as soon
+        as it is reconstructed, and the dataset once its statistics are ready.
+        """
+        self.cancel_load()
+        self.close_dataset()
+        self.load_request += 1
+        self.load_task = LoadTask(
+            self.load_request, file_name, self.engine, self.display_mode(),
+            first_frame=(self.time_slider.findChild(QSlider).value(),
+                         self.slice_slider.findChild(QSlider).value()),
+            use_sidecar=self.sidecar_checkbox.isChecked(),
+        )
+        signals = self.load_task.signals
+        signals.progress.connect(self.on_load_progress)
+        signals.firstFrame.connect(self.on_load_first_frame)
+        signals.finished.connect(self.on_load_finished)
+        signals.failed.connect(self.on_load_failed)
+        signals.cancelled.connect(self.on_load_cancelled)
+        self.on_load_progress(self.load_request, "Opening file", 0, 0)
+        self.load_progress.show()
+        self.load_cancel_button.show()
+        self.task_pool.start(self.load_task)
+
+    def cancel_load(self):
+        if self.load_task is not None:
+            self.load_task.cancel()
+
+    def on_load_progress(self, request_id, message, done, total):
+        if request_id != self.load_request:
+            return
+        self.load_progress.setRange(0, total)
+        self.load_progress.setValue(done)
+        self.statusBar().showMessage(f"{message}...")
+
+    def on_load_first_frame(self, request_id, image):
+        if request_id == self.load_request:
+            self.display_composite_image(image)
+
+    def end_load(self, request_id, message):
+        """Hide the load progress if `request_id` is the current load."""
+        if request_id != self.load_request:
+            return False
+        self.load_task = None
+        self.load_progress.hide()
+        self.load_cancel_button.hide()
+        self.statusBar().showMessage(message, 5000)
+        return True
+
+    def on_load_failed(self, request_id, message):
+        if self.end_load(request_id, ""):
+            print(f"Failed to load image: {message}")
+
+    def on_load_cancelled(self, request_id):
+        self.end_load(request_id, "Loading cancelled")
+
+    def on_load_finished(self, request_id, dataset):
+        """Show a dataset opened by the LoadTask."""
+        message = f"Loaded {dataset.file_name}"
+        if dataset.kdata.chunks_per_frame > 1:
+            message += f" ({dataset.kdata.chunks_per_frame} chunks read per frame; repack.py can fix this)"
+        if not self.end_load(request_id, message):
+            dataset.close()  # superseded by a newer load
+            return
+        self.kdata = dataset.kdata
+        self.file_name = dataset.file_name
+        self.set_render_source(self.kdata, stats={dataset.mode: dataset.stats})
+        if dataset.sidecar is not None:
+            self.sidecar = dataset.sidecar
+            self.renderer.attach_sidecar(self.sidecar)
+        # The checkbox may have changed while loading
+        self.set_sidecar_enabled(self.sidecar_checkbox.isChecked())
+        self.nt, self.nz = self.kdata.shape[:2]
+
+        self.virtual_coils_spinbox.blockSignals(True)
+        self.virtual_coils_spinbox.setRange(0, self.nc)
+        self.virtual_coils_spinbox.setValue(0)
+        self.virtual_coils_spinbox.blockSignals(False)
+        self.virtual_coils_spinbox.setEnabled(True)
+
+        # Enable buttons
+        self.switch_space_button.setEnabled(True)
+        self.map_box.setEnabled(True)
+        self.mmode_button.setEnabled(True)
+        self.save_button.setEnabled(True)
+        self.export_button.setEnabled(self.export_task is None)
+        self.play_button.setEnabled(self.map_kind() is None)
+        self.tab_widget.setTabEnabled(1, True)
+
+        # Update the slice/time sliders
+        self.time_slider.findChild(QSlider).setMaximum(self.nt - 1)
+        self.slice_slider.findChild(QSlider).setMaximum(self.nz - 1)
+
+        # Update 2D composite view
+        self.update_slice()
 
-                # Enable buttons
-                self.switch_space_button.setEnabled(True)
-                self.save_button.setEnabled(True)
-                self.play_button.setEnabled(True)
-                self.tab_widget.setTabEnabled(1, True)
+    def close_dataset(self):
+        """Stop using the current dataset and close its file."""
+        if self.timer.isActive():
+            self.toggle_playback()
+        if self.kdata is None:
+            return
+        # Let in-flight renders finish before closing their file
+        self.scheduler.set_renderer(None)
+        self.roi_request += 1       # stops an ROI computation,
+        self.temporal_request += 1  # a temporal map computation
+        self.volume_request += 1    # and filling the M-mode volume
+        self.scheduler.wait()
+        self.drop_slice_volume()
+        self.close_sidecar()
+        self.kdata.close()
+        self.kdata = None
+        self.renderer = None
+        self.coil_compression = None
+        self.virtual_coils_spinbox.setEnabled(False)
+        self.compression_label.clear()
+        self.composite_pyramid = None
+        self.frame_cache.clear()
+        self.switch_space_button.setEnabled(False)
+        self.map_box.setEnabled(False)
+        self.mmode_button.setChecked(False)
+        self.mmode_button.setEnabled(False)
+        self.mmode_line = None
+        self.image_view.show_line(None)
+        self.save_button.setEnabled(False)
+        self.export_button.setEnabled(False)
+        self.play_button.setEnabled(False)
 
-                # Update the slice/time sliders
-                self.time_slider.findChild(QSlider).setMaximum(self.nt - 1)
-                self.slice_slider.findChild(QSlider).setMaximum(self.nz - 1)
+    def save_image(self):
+        """Save the current composite image at full resolution."""
+        if self.composite_pyramid is None:
+            return
+        file_name, _ = QFileDialog.getSaveFileName(
+            self, "Save Image", "", "PNG Files (*.png);;All Files (*)"
+        )
+        if file_name:
+            # The view may show a reduced-resolution level
+            array_2d = self.window_level.apply(self.composite_pyramid.level(0), self.composite_stats)
+            h, w = array_2d.shape
+            QImage(array_2d.data, w, h, w, QImage.Format_Grayscale8).save(file_name)
+
+    def export_cine(self):
+        """Export the time series of the current dataset in the background."""
+        if self.kdata is None or self.export_task is not None:
+            return
+        dialog = ExportDialog(self.display_mode(), self)
+        if dialog.exec_() != QDialog.Accepted:
+            return
+        fmt = dialog.fmt()
+        if fmt in ('png', 'tiff'):
+            path = QFileDialog.getExistingDirectory(self, "Export Cine To Folder")
+        else:
+            filters = {'npy': "NumPy Files (*.npy)", 'h5': "HDF5 Files (*.h5 *.hdf5)"}
+            path, _ = QFileDialog.getSaveFileName(self, "Export Cine", "", filters[fmt])
+        if not path:
+            return
 
-                # Possibly reset coil grid layout
-                if hasattr(self, 'grid_rows'):
-                    del self.grid_rows
-                    del self.grid_cols
+        mode = dialog.mode()
+        slices = None
+        if dialog.current_slice_only():
+            z = self.slice_slider.findChild(QSlider).value()
+            slices = range(z, z + 1)
+        # Same source as the renderer, so its statistics apply
+        n_virtual = self.coil_compression.n_virtual if self.coil_compression is not None else 0
+        self.export_task = ExportTask(
+            self.file_name, path, fmt, n_virtual=n_virtual, mode=mode, slices=slices,
+            composite=dialog.composite_checkbox.isChecked(),
+            coils=dialog.coils_checkbox.isChecked(),
+            stats=self.renderer.stats.get(mode), window=self.window_level,
+        )
+        signals = self.export_task.signals
+        signals.progress.connect(self.on_export_progress)
+        signals.finished.connect(self.on_export_finished)
+        signals.failed.connect(self.on_export_failed)
+        self.export_button.setEnabled(False)
+        self.export_progress.setRange(0, 0)
+        self.export_progress.show()
+        self.export_cancel_button.show()
+        self.task_pool.start(self.export_task)
+
+    def cancel_export(self):
+        if self.export_task is not None:
+            self.export_task.cancel()
+
+    def on_export_progress(self, done, total):
+        self.export_progress.setRange(0, total)
+        self.export_progress.setValue(done)
+
+    def end_export(self, message):
+        self.export_task = None
+        self.export_progress.hide()
+        self.export_cancel_button.hide()
+        self.export_button.setEnabled(self.kdata is not None)
+        self.statusBar().showMessage(message, 5000)
+
+    def on_export_finished(self, completed, path):
+        self.end_export(f"Exported to {path}" if completed else "Export cancelled")
+
+    def on_export_failed(self, message):
+        self.end_export("")
+        print(f"Failed to export: {message}")
+
+    def set_profiling(self, enabled):
+        """Start or stop stage timing, the overlay and the trace."""
+        if enabled:
+            self.profiler.clear()
+        self.profiler.set_enabled(enabled)
+        self.save_trace_button.setEnabled(enabled)
+        self.profile_label.setVisible(enabled)
+        if enabled:
+            self.update_profile_overlay()
+            self.profile_timer.start(500)
+        else:
+            self.profile_timer.stop()
 
-                # Update 2D composite view
-                self.update_slice()
+    def update_profile_overlay(self):
+        self.profile_label.setText(self.profiler.overlay_text())
+        self.profile_label.adjustSize()
 
+    def save_timing_trace(self):
+        """Write the per-frame timing trace to CSV or JSON."""
+        file_name, _ = QFileDialog.getSaveFileName(
+            self, "Save Timings", "", "CSV Files (*.csv);;JSON Files (*.json);;All Files (*)"
+        )
+        if file_name:
+            try:
+                self.profiler.dump(file_name)
+            except OSError as e:
+                print(f"Failed to save timings: {e}")
+
+    def set_render_source(self, source, stats=None):
+        """
+        Render frames from `source` k-space (the dataset or a compressed view
+        of it) with a new renderer; cached frames of the old one are dropped.
+        """
+        self.roi_request += 1       # ROI curves of the old source are stale,
+        self.temporal_request += 1  # as are its temporal maps
+        self.volume_request += 1    # and its M-mode volume
+        if self.renderer is not None:
+            self.scheduler.set_renderer(None)
+            self.scheduler.wait()
+        self.drop_slice_volume()
+        self.frame_cache.clear()
+        self.temporal_maps.clear()
+        self.temporal_pending = None
+        self.composite_pyramid = None
+        self.renderer = FrameRenderer(source, self.frame_cache, self.engine, stats=stats)
+        self.scheduler.set_renderer(self.renderer)
+        self.nc = self.renderer.nc
+        # Drop single-coil tabs of coils the new source does not have
+        for i in reversed(range(2, self.tab_widget.count())):
+            if getattr(self.tab_widget.widget(i), 'coil_index', -1) >= self.nc:
+                self.tab_widget.removeTab(i)
+
+    def set_coil_compression(self, n_virtual):
+        """Reconstruct from `n_virtual` SVD virtual coils (0 uses the physical coils)."""
+        if self.kdata is None:
+            return
+        compression = None
+        if 0 < n_virtual < self.kdata.shape[2]:
+            try:
+                compression = CompressedKSpace(self.kdata, n_virtual)
             except Exception as e:
-                print(f"Failed to load image: {e}")
+                print(f"Failed to compress coils: {e}")
+                return
+        # Stored frames hold physical-coil data; no disk cache while compressed
+        self.close_sidecar()
+        self.coil_compression = compression
+        self.set_render_source(compression if compression is not None else self.kdata)
+        if compression is None:
+            self.set_sidecar_enabled(self.sidecar_checkbox.isChecked())
+            self.compression_label.clear()
+        else:
+            self.compression_label.setText(f"{100 * compression.retained_energy():.2f}% energy")
+            self.compression_label.setToolTip(
+                "Fraction of the calibration k-space signal energy kept by the virtual coils"
+            )
+        self.update_slice()
 
-    def save_image(self):
-        """Save the current composite image (QGraphicsView)."""
-        if not self.image_view.image_item:
+    def set_sidecar_enabled(self, enabled):
+        if enabled:
+            self.open_sidecar()
+        else:
+            self.close_sidecar()
+
+    def open_sidecar(self):
+        """Attach the on-disk frame cache of the current dataset to the renderer."""
+        if self.renderer is None or self.sidecar is not None or self.coil_compression is not None:
             return
-        pixmap = self.image_view.image_item.pixmap()
-        if pixmap and not pixmap.isNull():
-            file_name, _ = QFileDialog.getSaveFileName(
-                self, "Save Image", "", "PNG Files (*.png);;All Files (*)"
-            )
-            if file_name:
-                pixmap.save(file_name)
+        try:
+            self.sidecar = ReconSidecar(self.file_name, self.kdata.shape)
+        except OSError as e:
+            print(f"Disk cache unavailable: {e}")
+            return
+        self.renderer.attach_sidecar(self.sidecar)
+
+    def close_sidecar(self):
+        if self.sidecar is None:
+            return
+        if self.renderer is not None:
+            self.renderer.attach_sidecar(None)
+        # Tasks in flight skip a closed sidecar, so the pool is not drained
+        self.sidecar.close()
+        self.sidecar = None
 
     def add_annotation(self):
         text = self.annotation_input.text()
@@ -196,13 +748,49 @@ class MRIViewer(QMainWindow):
             self.timer.stop()
             self.play_button.setText("Play")
         else:
-            self.timer.start(100)
+            self.play_origin = self.time_slider.findChild(QSlider).value()
+            self.play_clock.start()
+            self.dropped_frames = 0
+            self.timer.start(max(1, round(1000 / self.playback_fps)))
             self.play_button.setText("Pause")
 
+    def set_playback_fps(self, fps):
+        self.playback_fps = fps
+        if self.timer.isActive():
+            # Restart the playback clock from the current frame
+            self.toggle_playback()
+            self.toggle_playback()
+
     def playback_next_frame(self):
-        current_time = self.time_slider.findChild(QSlider).value()
-        next_time = (current_time + 1) % self.nt
-        self.time_slider.findChild(QSlider).setValue(next_time)
+        """
+        Advance playback to the frame due at the current wall-clock time.
+
+        Frames that are not rendered in time are skipped rather than waited
+        for, so playback holds the target frame rate without blocking the
+        event loop; upcoming frames are prefetched in the background.
+        """
+        time_slider = self.time_slider.findChild(QSlider)
+        slice_idx = self.slice_slider.findChild(QSlider).value()
+        mode = self.display_mode()
+        coils = self.coil_views_visible()
+
+        elapsed_frames = self.play_clock.elapsed() * self.playback_fps // 1000
+        target = (self.play_origin + elapsed_frames) % self.nt
+        ahead = [(target + i) % self.nt for i in range(1, self.prefetch_frames + 1)]
+        self.scheduler.prefetch(ahead, slice_idx, mode, coils)
+
+        if target == time_slider.value():
+            return
+        if self.renderer.is_cached(target, slice_idx, mode, coils):
+            self.advance_playback(target)
+        else:
+            self.scheduler.request(target, slice_idx, mode, coils)
+
+    def advance_playback(self, time_idx):
+        """Move the playback position to a rendered frame, counting skipped ones."""
+        time_slider = self.time_slider.findChild(QSlider)
+        self.dropped_frames += (time_idx - time_slider.value() - 1) % self.nt
+        time_slider.setValue(time_idx)
 
     def update_slice(self):
         """Update the 2D composite image plus coil images based on slice/time."""
@@ -211,64 +799,397 @@ class MRIViewer(QMainWindow):
 
         time_idx = self.time_slider.findChild(QSlider).value()
         slice_idx = self.slice_slider.findChild(QSlider).value()
+        mode = self.display_mode()
+        coils = self.coil_views_visible()
+
+        if self.map_kind() is not None:
+            self.show_temporal_map(slice_idx)
+        elif self.renderer.is_cached(time_idx, slice_idx, mode, coils):
+            self.show_frame(time_idx, slice_idx)
+        elif (self.scrubbing() and self.renderer.preview_factor() > 1
+              and mode in self.renderer.stats):
+            # Only a cheap preview while the slider moves; refined on release.
+            # Until the worker has computed the mode's statistics (e.g. just
+            # after a mode switch), frames are requested instead, so the GUI
+            # thread never computes them.
+            self.show_preview(time_idx, slice_idx)
+        else:
+            # Rendered off the GUI thread; shown by on_frame_ready
+            self.scheduler.request(time_idx, slice_idx, mode, coils)
+        self.update_mmode()
+
+    def scrubbing(self):
+        """Whether progressive mode is on and the slice or time slider is being dragged."""
+        return self.progressive_checkbox.isChecked() and any(
+            slider.findChild(QSlider).isSliderDown()
+            for slider in (self.slice_slider, self.time_slider)
+        )
 
+    def show_preview(self, time_idx, slice_idx):
+        """Display the low-resolution preview composite of a frame."""
+        mode = self.display_mode()
+        codes = self.renderer.preview(time_idx, slice_idx, mode)
+        # Zoom changes must not bring back the previous full frame
+        self.composite_pyramid = None
+        self.composite_stats = self.renderer.dataset_stats(mode)
+        with self.profiler.stage('window'):
+            array_2d = self.window_level.apply(codes, self.composite_stats)
+        factor = self.renderer.preview_factor()
+        self.display_composite_image(array_2d, scale=factor)
+        self.statusBar().showMessage(f"Preview at 1/{factor} resolution")
+
+    def on_frame_ready(self, time_idx, slice_idx, mode):
+        """Show a frame finished by the scheduler if it is still wanted."""
+        if self.renderer is None or mode != self.display_mode() or self.map_kind() is not None:
+            return
+        if slice_idx != self.slice_slider.findChild(QSlider).value():
+            return
+        current_time = self.time_slider.findChild(QSlider).value()
+        if time_idx == current_time:
+            self.show_frame(time_idx, slice_idx)
+        elif self.timer.isActive():
+            self.advance_playback(time_idx)
+
+    def show_frame(self, time_idx, slice_idx):
+        """Display the rendered frames for (time_idx, slice_idx) in all views."""
+        frame = (time_idx, slice_idx, self.display_mode())
+        with self.profiler.track(frame):
+            self._show_frame(time_idx, slice_idx)
+        self.profiler.frame_done(frame)
+
+    def _show_frame(self, time_idx, slice_idx):
         # Composite image data
-        slice_data = self.kdata[time_idx, slice_idx]
-        if self.show_kspace:
-            kmag = np.sqrt(np.sum(slice_data[..., 0]**2 + slice_data[..., 1]**2, axis=0))
-            slice_data = np.log1p(kmag)
-        else:
-            slice_data = load_slice(self.kdata, time_idx, slice_idx)
+        mode = self.display_mode()
+        codes = self.renderer.composite(time_idx, slice_idx, mode)
+        if self.composite_pyramid is None or self.composite_pyramid.levels[0] is not codes:
+            self.composite_pyramid = ImagePyramid(codes)
+        self.composite_stats = self.renderer.dataset_stats(mode)
+        self.display_composite_pyramid()
+        if self.roi_dock.isVisible():
+            self.roi_panel.plot.set_marker(time_idx)
+
+        # Coil views are only refreshed while visible; on_tab_change
+        # catches them up when they are shown
+        current_tab = self.tab_widget.currentWidget()
+        if current_tab is self.coil_tab:
+            self.update_coil_images(time_idx, slice_idx)
+        elif hasattr(current_tab, 'coil_index'):
+            self.update_single_coil_tab(current_tab.image_label, current_tab.coil_index)
 
-        slice_data = (slice_data / (slice_data.max() + 1e-9) * 255).astype(np.uint8)
-        self.display_composite_image(slice_data)
+        status = repr(self.frame_cache)
+        if self.timer.isActive():
+            status += f"  |  dropped frames: {self.dropped_frames}"
+        self.statusBar().showMessage(status)
+
+    def map_kind(self):
+        """The temporal map shown instead of the frames ('mean', 'std', 'mip'), or None."""
+        return self.map_box.currentData()
+
+    def set_map_kind(self, index):
+        """Switch between the frames and a temporal map of the current slice."""
+        showing_map = self.map_kind() is not None
+        if showing_map and self.timer.isActive():
+            self.toggle_playback()
+        self.play_button.setEnabled(not showing_map and self.kdata is not None)
+        # A map covers every time frame
+        self.time_slider.setEnabled(not showing_map)
+        self.scheduler.cancel()
+        self.update_slice()
 
-        # Update coil grid
-        self.update_coil_images(time_idx, slice_idx)
+    def show_temporal_map(self, slice_idx):
+        """Display the selected temporal map of a slice, computing it first if needed."""
+        mode = self.display_mode()
+        maps = self.temporal_maps.get((slice_idx, mode))
+        if maps is None:
+            self.request_temporal_maps(slice_idx, mode)
+            return
+        codes, stats = maps.display_frames(self.map_kind())
+        if self.composite_pyramid is None or self.composite_pyramid.levels[0] is not codes[0]:
+            self.composite_pyramid = ImagePyramid(codes[0])
+        self.composite_stats = stats
+        self.display_composite_pyramid()
 
-        # Update single-coil tabs
-        for i in range(self.tab_widget.count()):
-            tab = self.tab_widget.widget(i)
-            if hasattr(tab, 'coil_index'):
-                self.update_single_coil_tab(tab.image_label, tab.coil_index)
+        current_tab = self.tab_widget.currentWidget()
+        if current_tab is self.coil_tab:
+            self.display_coil_frames(codes[1:], stats)
+        elif hasattr(current_tab, 'coil_index'):
+            label, coil_i = current_tab.image_label, current_tab.coil_index
+            factor = fit_factor(self.kdata.shape[3:5], label.width(), label.height())
+            array_2d = self.window_level.apply(
+                block_mean_downsample(codes[coil_i + 1], factor), stats, coil_i)
+            self.display_on_label(label, array_2d)
+        self.statusBar().showMessage(
+            f"{self.map_box.currentText()} of slice {slice_idx} over {self.nt} frames")
+
+    def request_temporal_maps(self, slice_idx, mode):
+        """Compute the temporal maps of a slice in the background."""
+        if self.temporal_pending == (slice_idx, mode):
+            return
+        self.temporal_request += 1
+        request_id = self.temporal_request
+        self.temporal_pending = (slice_idx, mode)
+        task = TemporalTask(
+            request_id, self.renderer, slice_idx, mode,
+            should_stop=lambda: request_id != self.temporal_request,
+        )
+        task.signals.progress.connect(self.on_temporal_progress)
+        task.signals.finished.connect(self.on_temporal_finished)
+        task.signals.failed.connect(self.on_temporal_failed)
+        self.statusBar().showMessage(f"Computing temporal maps of slice {slice_idx}...")
+        self.scheduler.pool.start(task)
+
+    def on_temporal_progress(self, request_id, done, total):
+        if request_id == self.temporal_request:
+            z = self.temporal_pending[0]
+            self.statusBar().showMessage(f"Computing temporal maps of slice {z}: {done}/{total} frames")
+
+    def on_temporal_finished(self, request_id, maps):
+        if request_id != self.temporal_request:
+            return
+        self.temporal_pending = None
+        while len(self.temporal_maps) >= MAX_TEMPORAL_MAPS:
+            # Drop the oldest
+            del self.temporal_maps[next(iter(self.temporal_maps))]
+        self.temporal_maps[(maps.slice_index, maps.mode)] = maps
+        self.update_slice()
+
+    def on_temporal_failed(self, request_id, message):
+        if request_id != self.temporal_request:
+            return
+        self.temporal_pending = None
+        print(f"Failed to compute temporal maps: {message}")
+        self.statusBar().showMessage(f"Failed to compute temporal maps: {message}")
+
+    def set_mmode_line_mode(self, enabled):
+        """Draw M-mode lines on the composite view instead of dragging it."""
+        self.image_view.set_line_mode(enabled)
+        if enabled:
+            self.mmode_dock.show()
+
+    def set_mmode_line(self, line):
+        """Show the x-t image of a line drawn on the composite view."""
+        self.mmode_line = line
+        self.mmode_profile = None
+        self.mmode_dock.show()
+        self.update_mmode()
+
+    def update_mmode(self):
+        """
+        Refresh the M-mode panel for the current slice, mode and time.
+
+        The line is sampled once per line, slice and mode from the slice
+        volume; the volume is filled in the background on first use.
+        """
+        if self.renderer is None or self.mmode_line is None or not self.mmode_dock.isVisible():
+            return
+        slice_idx = self.slice_slider.findChild(QSlider).value()
+        mode = self.display_mode()
+        volume = self.slice_volume
+        if volume is None or (volume.slice_index, volume.mode) != (slice_idx, mode):
+            self.request_slice_volume(slice_idx, mode)
+            return
+        if not volume.complete:
+            return
+        if self.mmode_profile is None:
+            # Scene coordinates put pixel x at [x, x + 1); the volume samples pixel centers
+            line = self.mmode_line
+            self.mmode_profile = volume.line_profile(
+                line.x1() - 0.5, line.y1() - 0.5, line.x2() - 0.5, line.y2() - 0.5)
+        stats = self.renderer.dataset_stats(mode)
+        image = self.window_level.apply(stats.quantize(self.mmode_profile.T), stats)
+        time_idx = self.time_slider.findChild(QSlider).value()
+        self.mmode_panel.set_image(
+            image, time_idx,
+            f"Slice {slice_idx}: {image.shape[0]} points along the line over {self.nt} frames")
+
+    def request_slice_volume(self, slice_idx, mode):
+        """Reconstruct the slice into a new memory-mapped volume in the background."""
+        self.volume_request += 1
+        request_id = self.volume_request
+        self.drop_slice_volume()
+        ny, nx = self.kdata.shape[3:5]
+        try:
+            self.slice_volume = SliceVolume((self.nt, ny, nx), slice_idx, mode)
+        except OSError as e:
+            print(f"Failed to create the M-mode volume: {e}")
+            self.mmode_panel.set_busy(f"Failed to create the M-mode volume: {e}")
+            return
+        task = VolumeTask(
+            request_id, self.slice_volume, self.renderer,
+            should_stop=lambda: request_id != self.volume_request,
+        )
+        task.signals.progress.connect(self.on_volume_progress)
+        task.signals.finished.connect(self.on_volume_finished)
+        task.signals.failed.connect(self.on_volume_failed)
+        self.mmode_panel.set_busy(f"Reconstructing slice {slice_idx}...")
+        self.scheduler.pool.start(task)
+
+    def drop_slice_volume(self):
+        """Close the M-mode volume; any task filling it must have been stopped."""
+        if self.slice_volume is not None:
+            self.slice_volume.close()
+            self.slice_volume = None
+        self.mmode_profile = None
+
+    def on_volume_progress(self, request_id, done, total):
+        if request_id == self.volume_request:
+            self.mmode_panel.set_busy(
+                f"Reconstructing slice {self.slice_volume.slice_index}: {done}/{total} frames")
+
+    def on_volume_finished(self, request_id, complete):
+        if request_id == self.volume_request and complete:
+            self.update_mmode()
+
+    def on_volume_failed(self, request_id, message):
+        if request_id != self.volume_request:
+            return
+        print(f"Failed to fill the M-mode volume: {message}")
+        self.mmode_panel.set_busy(f"Failed to fill the M-mode volume: {message}")
+
+    def coil_views_visible(self):
+        """Whether the coil grid or a single-coil tab is the current tab."""
+        current_tab = self.tab_widget.currentWidget()
+        return current_tab is self.coil_tab or hasattr(current_tab, 'coil_index')
 
-    def display_composite_image(self, array_2d: np.ndarray):
-        """Show a 2D NumPy array in the composite ZoomPanGraphicsView."""
+    def analyze_roi(self, rect):
+        """Compute ROI time curves for the current slice in the background."""
+        if self.kdata is None:
+            return
+        box = roi_box(rect, self.kdata.shape[3:5])
+        if box is None:
+            return
+        self.roi_request += 1
+        request_id = self.roi_request
+        task = RoiTask(
+            request_id, self.renderer,
+            self.slice_slider.findChild(QSlider).value(), self.display_mode(), box,
+            should_stop=lambda: request_id != self.roi_request,
+        )
+        task.signals.finished.connect(self.on_roi_finished)
+        task.signals.failed.connect(
+            lambda rid, msg: print(f"ROI analysis failed: {msg}")
+        )
+        self.roi_task = task
+        self.roi_panel.set_busy("Computing ROI curves...")
+        self.roi_dock.show()
+        self.scheduler.pool.start(task)
+
+    def on_roi_finished(self, request_id, curves):
+        if request_id != self.roi_request:
+            return
+        self.roi_panel.set_curves(curves)
+        self.roi_panel.plot.set_marker(self.time_slider.findChild(QSlider).value())
+
+    def update_window(self):
+        """Apply the window/level sliders; cached frames are only re-mapped."""
+        self.window_level.set(
+            level=self.level_slider.findChild(QSlider).value() / 100,
+            width=self.width_slider.findChild(QSlider).value() / 100,
+        )
+        self.update_slice()
+
+    def display_mode(self):
+        """Current display mode for the renderer (KSPACE or IMAGE)."""
+        return KSPACE if self.show_kspace else IMAGE
+
+    def display_composite_pyramid(self):
+        """Show the pyramid level of the composite frame that matches the zoom."""
+        if self.composite_pyramid is None:
+            return
+        level = ImagePyramid.level_for_scale(self.image_view.view_scale())
+        level = min(level, self.composite_pyramid.max_level)
+        with self.profiler.stage('window'):
+            codes = self.composite_pyramid.level(level)
+            array_2d = self.window_level.apply(codes, self.composite_stats)
+        self.display_composite_image(array_2d, scale=2 ** level)
+
+    def display_composite_image(self, array_2d: np.ndarray, scale=1):
+        """
+        Show a 2D NumPy array in the composite ZoomPanGraphicsView, drawn
+        `scale` times larger so reduced levels cover the full-size scene.
+        """
         h, w = array_2d.shape
-        qimage = QImage(array_2d, w, h, w, QImage.Format_Grayscale8)
-        pixmap = QPixmap.fromImage(qimage)
-        self.image_view.set_pixmap(pixmap)
+        with self.profiler.stage('qimage'):
+            qimage = QImage(array_2d, w, h, w, QImage.Format_Grayscale8)
+            pixmap = QPixmap.fromImage(qimage)
+        with self.profiler.stage('display'):
+            self.image_view.set_pixmap(pixmap, scale)
 
     def update_coil_images(self, time_index, slice_index):
-        """Fill the coil tab with nc coil images in a grid."""
-        if not hasattr(self, 'grid_rows') or not hasattr(self, 'grid_cols'):
-            available_width = self.coil_tab.width()
-            available_height = self.coil_tab.height()
-            margin, spacing = 5, 5
-
-            total_margin_w = 2 * margin + (self.nc - 1) * spacing
-            total_margin_h = 2 * margin + (self.nc - 1) * spacing
-            adj_w = available_width - total_margin_w
-            adj_h = available_height - total_margin_h
-
-            ny, nx = self.kdata.shape[3:5]  # [nt, nz, nc, ny, nx, 2]
-            aspect_ratio = nx / ny
-
-            import math
-            min_whitespace = float('inf')
-            for rows in range(1, self.nc + 1):
-                cols = math.ceil(self.nc / rows)
-                cell_w = adj_w // cols
-                cell_h = int(cell_w / aspect_ratio)
-                if cell_h * rows <= adj_h:
-                    whitespace = (adj_h - cell_h * rows) + (adj_w - cell_w * cols)
-                    if whitespace < min_whitespace:
-                        min_whitespace = whitespace
-                        self.grid_rows, self.grid_cols = rows, cols
-                        self.cell_width, self.cell_height = cell_w, cell_h
-
-            print(f"Grid computed: {self.grid_rows}x{self.grid_cols}, "
-                  f"Cell size: {self.cell_width}x{self.cell_height}px")
+        """Show the nc coil images of a frame in the coil grid or mosaic."""
+        mode = self.display_mode()
+        stats = self.renderer.dataset_stats(mode)
+        coil_frames = self.renderer.coils(time_index, slice_index, mode)
+        self.display_coil_frames(coil_frames, stats)
+
+    def display_coil_frames(self, coil_frames, stats):
+        """Show nc coil frames (codes of `stats`) in the coil grid or mosaic."""
+        if self.mosaic_checkbox.isChecked():
+            self.update_coil_atlas(coil_frames, stats)
+            return
+        with self.profiler.stage('layout'):
+            self.ensure_coil_grid()
+        # Reduce to about the cell size before windowing and the QImage upload
+        factor = fit_factor(self.kdata.shape[3:5], self.cell_width, self.cell_height)
+        for i, (label, codes) in enumerate(zip(self.coil_labels, coil_frames)):
+            with self.profiler.stage('window'):
+                array_2d = self.window_level.apply(block_mean_downsample(codes, factor), stats, i)
+            self.display_on_label(label, array_2d)
+
+    def update_coil_atlas(self, coil_frames, stats):
+        """Compose all coils into the atlas and upload it as one pixmap."""
+        ny, nx = self.kdata.shape[3:5]
+        atlas = self.coil_atlas
+        if atlas is None or (atlas.nc, atlas.ny, atlas.nx) != (self.nc, ny, nx):
+            atlas = self.coil_atlas = CoilAtlas(self.nc, ny, nx)
+        with self.profiler.stage('window'):
+            luts = [self.window_level.lut(stats, c) for c in range(self.nc)]
+            atlas.update(coil_frames, luts)
+        h, w = atlas.array.shape
+        with self.profiler.stage('qimage'):
+            qimage = QImage(atlas.array.data, w, h, w, QImage.Format_Grayscale8)
+            pixmap = QPixmap.fromImage(qimage)
+        with self.profiler.stage('display'):
+            self.coil_atlas_view.set_pixmap(pixmap)
+
+    def set_coil_mosaic(self, enabled):
+        self.coil_stack.setCurrentWidget(
+            self.coil_atlas_view if enabled else self.coil_grid_widget
+        )
+        self.update_slice()
+
+    def on_atlas_double_click(self, pos):
+        if self.coil_atlas is None:
+            return
+        coil = self.coil_atlas.coil_at(pos.x(), pos.y())
+        if coil is not None:
+            self.open_coil_in_new_tab(coil)
+
+    def ensure_coil_grid(self):
+        """(Re)build the coil label grid if the tab size or dataset changed."""
+        ny, nx = self.kdata.shape[3:5]  # [nt, nz, nc, ny, nx]
+        grid = self.coil_grid_widget
+        grid_key = (grid.width(), grid.height(), self.nc, ny, nx)
+        if grid_key == self.coil_grid_key:
+            return
+        self.coil_grid_key = grid_key
+
+        margin, spacing = 5, 5
+        aspect_ratio = nx / ny
+
+        # Largest cells over all row counts; each candidate is limited by
+        # the width or the height, whichever is tighter
+        best = None
+        for rows in range(1, self.nc + 1):
+            cols = math.ceil(self.nc / rows)
+            adj_w = grid.width() - 2 * margin - (cols - 1) * spacing
+            adj_h = grid.height() - 2 * margin - (rows - 1) * spacing
+            cell_w = min(adj_w // cols, int(adj_h // rows * aspect_ratio))
+            if best is None or cell_w > best[2]:
+                best = (rows, cols, cell_w)
+        self.grid_rows, self.grid_cols, cell_w = best
+        self.cell_width = max(cell_w, 1)
+        self.cell_height = max(int(cell_w / aspect_ratio), 1)
 
         while self.coil_layout.count():
             item = self.coil_layout.takeAt(0)
@@ -276,32 +1197,32 @@ class MRIViewer(QMainWindow):
             if w:
                 w.deleteLater()
 
+        self.coil_labels = []
         for i in range(self.nc):
-            coil_data = (self.kdata[time_index, slice_index, i, ..., 0]
-                         + 1j * self.kdata[time_index, slice_index, i, ..., 1])
-            if not self.show_kspace:
-                coil_data = np.abs(np.fft.ifft2(np.fft.fftshift(coil_data)))
-            coil_data = np.log1p(np.abs(coil_data)) if self.show_kspace else coil_data
-            coil_data = coil_data / (coil_data.max() + 1e-9) * 255
-            coil_data = coil_data.astype(np.uint8)
-
-            coil_label = self.create_coil_label(coil_data, self.cell_width, self.cell_height, i)
+            coil_label = self.create_coil_label(self.cell_width, self.cell_height, i)
             self.coil_layout.addWidget(coil_label, i // self.grid_cols, i % self.grid_cols)
+            self.coil_labels.append(coil_label)
 
-    def create_coil_label(self, coil_data, w, h, index):
+    def create_coil_label(self, w, h, index):
         lbl = QLabel()
-        lbl.setFixedSize(w, h)
-        self.display_on_label(lbl, coil_data)
+        lbl.setFixedSize(max(w, 1), max(h, 1))
         lbl.enterEvent = lambda e: self.show_hover_label(lbl, f"Coil {index+1}")
         lbl.leaveEvent = lambda e: self.hover_label.hide()
         lbl.mousePressEvent = lambda e: self.open_coil_in_new_tab(index)
         return lbl
 
+    def on_coil_tab_resize(self):
+        # The grid is rebuilt for the new size on the next update
+        if self.kdata is not None and self.tab_widget.currentWidget() is self.coil_tab:
+            self.update_slice()
+
     def display_on_label(self, label: QLabel, array_2d: np.ndarray):
         hh, ww = array_2d.shape
-        qimage = QImage(array_2d, ww, hh, ww, QImage.Format_Grayscale8)
-        pixmap = QPixmap.fromImage(qimage)
-        label.setPixmap(pixmap.scaled(label.width(), label.height(), Qt.KeepAspectRatio))
+        with self.profiler.stage('qimage'):
+            qimage = QImage(array_2d, ww, hh, ww, QImage.Format_Grayscale8)
+            pixmap = QPixmap.fromImage(qimage).scaled(label.width(), label.height(), Qt.KeepAspectRatio)
+        with self.profiler.stage('display'):
+            label.setPixmap(pixmap)
 
     def open_coil_in_new_tab(self, coil_index):
         for i in range(self.tab_widget.count()):
@@ -315,26 +1236,23 @@ class MRIViewer(QMainWindow):
         img_label.setAlignment(Qt.AlignCenter)
         new_layout.addWidget(img_label, stretch=1)
 
-        self.tab_widget.addTab(new_tab, f"Coil {coil_index+1}")
-        self.tab_widget.setCurrentWidget(new_tab)
-
         new_tab.image_label = img_label
         new_tab.coil_index = coil_index
-        self.update_single_coil_tab(img_label, coil_index)
 
-    def get_coil_image_data(self, t, s, coil_i):
-        data = (self.kdata[t, s, coil_i, ..., 0]
-                + 1j * self.kdata[t, s, coil_i, ..., 1])
-        if not self.show_kspace:
-            data = np.abs(np.fft.ifft2(np.fft.fftshift(data)))
-        data = np.log1p(np.abs(data)) if self.show_kspace else data
-        data = data / (data.max() + 1e-9) * 255
-        return data.astype(np.uint8)
+        # Switching to the tab renders it (see on_tab_change)
+        self.tab_widget.addTab(new_tab, f"Coil {coil_index+1}")
+        self.tab_widget.setCurrentWidget(new_tab)
+
+    def get_coil_image_data(self, t, s, coil_i, factor=1):
+        mode = self.display_mode()
+        codes = block_mean_downsample(self.renderer.coil(t, s, coil_i, mode), factor)
+        return self.window_level.apply(codes, self.renderer.dataset_stats(mode), coil_i)
 
     def update_single_coil_tab(self, label, coil_i):
         t = self.time_slider.findChild(QSlider).value()
         s = self.slice_slider.findChild(QSlider).value()
-        coil_array = self.get_coil_image_data(t, s, coil_i)
+        factor = fit_factor(self.kdata.shape[3:5], label.width(), label.height())
+        coil_array = self.get_coil_image_data(t, s, coil_i, factor)
         self.display_on_label(label, coil_array)
 
     def close_tab(self, index):
@@ -350,47 +1268,52 @@ class MRIViewer(QMainWindow):
         self.hover_label.show()
 
     def resizeEvent(self, event):
-        current_tab = self.tab_widget.currentWidget()
-        if current_tab == self.composite_tab:
+        # The coil grid follows its own tab's resize events
+        if self.tab_widget.currentWidget() is not self.coil_tab:
             self.update_slice()
-        elif current_tab == self.coil_tab:
-            if hasattr(self, 'grid_rows'):
-                del self.grid_rows
-                del self.grid_cols
-            self.update_coil_images(
-                self.time_slider.findChild(QSlider).value(),
-                self.slice_slider.findChild(QSlider).value()
-            )
-        elif hasattr(current_tab, 'image_label'):
-            self.update_single_coil_tab(current_tab.image_label, current_tab.coil_index)
         super().resizeEvent(event)
 
     def toggle_space(self):
         self.show_kspace = not self.show_kspace
         txt = "Switch to K-space" if not self.show_kspace else "Switch to Image Space"
         self.switch_space_button.setText(txt)
+        self.scheduler.cancel()
         self.update_slice()
 
+    def closeEvent(self, event):
+        self.cancel_load()
+        self.cancel_export()
+        self.load_request += 1  # a finished load still queued is closed unused
+        if self.study_browser is not None:
+            self.study_browser.shutdown()
+        self.task_pool.waitForDone()
+        self.timer.stop()
+        self.scheduler.cancel()
+        self.scheduler.wait()
+        self.engine.close()
+        self.close_sidecar()
+        if self.kdata is not None:
+            self.kdata.close()
+        super().closeEvent(event)
+
     def on_tab_change(self, index):
         if index == -1:
             return
-        current_tab = self.tab_widget.widget(index)
-        if current_tab == self.composite_tab:
-            self.update_slice()
-        elif current_tab == self.coil_tab:
-            if hasattr(self, 'grid_rows'):
-                del self.grid_rows
-                del self.grid_cols
-            self.update_coil_images(
-                self.time_slider.findChild(QSlider).value(),
-                self.slice_slider.findChild(QSlider).value()
-            )
-        elif hasattr(current_tab, 'coil_index'):
-            self.update_single_coil_tab(current_tab.image_label, current_tab.coil_index)
+        # Views are only refreshed while visible, so catch up the new tab
+        self.update_slice()
+
+
+def parse_args(argv):
+    """Viewer options; the remaining arguments are left to Qt."""
+    parser = argparse.ArgumentParser(description="Dynamic MRI Viewer")
+    parser.add_argument('--recon-processes', type=int, default=0, metavar='N',
+                        help="reconstruct in N worker processes sharing memory (default: threads)")
+    return parser.parse_known_args(argv)
 
 
 if __name__ == "__main__":
-    app = QApplication(sys.argv)
-    viewer = MRIViewer()
+    args, qt_args = parse_args(sys.argv[1:])
+    app = QApplication(sys.argv[:1] + qt_args)
+    viewer = MRIViewer(recon_processes=args.recon_processes)
     viewer.show()
     sys.exit(app.exec_())
@@ -0,0 +1,171 @@
+import collections
+import contextlib
+import csv
+import json
+import threading
+import time
+
+# Frames kept for the live averages and FPS
+DEFAULT_WINDOW = 30
+# Rows kept in the timing trace
+DEFAULT_TRACE_ROWS = 100000
+# Tracked frames whose stages are held until the frame is shown
+_MAX_PENDING = 256
+
+_NULL_CONTEXT = contextlib.nullcontext()
+# Tracked "frame" whose stages are discarded
+_SUPPRESSED = object()
+
+
+class StageProfiler:
+    """
+    Per-stage timing of the frame pipeline.
+
+    Code wraps each stage in `with profiler.stage('fft'):`. Stages that run
+    inside `with profiler.track(frame):` are attributed to that frame, also
+    across threads: the worker that reconstructs a frame and the GUI thread
+    that shows it track the same (t, z, mode) key, and `frame_done(frame)`
+    collects everything into one trace row. Stages outside a tracked frame
+    (e.g. opening a file) become rows of their own.
+
+    While disabled, `stage` and `track` return a shared no-op context
+    manager, so the hooks cost one attribute check.
+    """
+
+    def __init__(self, enabled=False, window=DEFAULT_WINDOW, max_rows=DEFAULT_TRACE_ROWS):
+        self.enabled = enabled
+        self.trace = collections.deque(maxlen=max_rows)
+        self.stage_names = []  # in order of first appearance
+        self._recent = collections.deque(maxlen=window)
+        self._pending = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._start = time.perf_counter()
+
+    def set_enabled(self, enabled):
+        self.enabled = enabled
+        if not enabled:
+            with self._lock:
+                self._pending.clear()
+
+    def clear(self):
+        """Drop the trace and the live statistics."""
+        with self._lock:
+            self.trace.clear()
+            self._recent.clear()
+            self._pending.clear()
+            self._start = time.perf_counter()
+
+    def stage(self, name):
+        """Context manager timing one stage."""
+        if not self.enabled:
+            return _NULL_CONTEXT
+        return self._timed(name)
+
+    def track(self, frame):
+        """Context manager attributing the stages inside it to `frame`."""
+        if not self.enabled:
+            return _NULL_CONTEXT
+        return self._tracked(frame)
+
+    def suppressed(self):
+        """Context manager discarding the stages inside it (e.g. nested in a timed stage)."""
+        if not self.enabled:
+            return _NULL_CONTEXT
+        return self._tracked(_SUPPRESSED)
+
+    @contextlib.contextmanager
+    def _timed(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    @contextlib.contextmanager
+    def _tracked(self, frame):
+        outer = getattr(self._local, 'frame', None)
+        self._local.frame = frame
+        try:
+            yield
+        finally:
+            self._local.frame = outer
+
+    def add(self, name, seconds):
+        """Record `seconds` spent in stage `name` by the current thread."""
+        frame = getattr(self._local, 'frame', None)
+        if frame is _SUPPRESSED:
+            return
+        ms = seconds * 1e3
+        with self._lock:
+            if name not in self.stage_names:
+                self.stage_names.append(name)
+            if frame is None:
+                self.trace.append(self._row(None, {name: ms}))
+                return
+            stages = self._pending.setdefault(frame, {})
+            stages[name] = stages.get(name, 0.0) + ms
+            if len(self._pending) > _MAX_PENDING:
+                # Frames rendered but never shown (e.g. superseded prefetches)
+                del self._pending[next(iter(self._pending))]
+
+    def frame_done(self, frame):
+        """Close the trace row of a frame that has been shown."""
+        if not self.enabled:
+            return
+        with self._lock:
+            stages = self._pending.pop(frame, {})
+            row = self._row(frame, stages)
+            self.trace.append(row)
+            self._recent.append(row)
+
+    def _row(self, frame, stages):
+        t, z, mode = frame if frame is not None else (None, None, None)
+        return {'time_s': time.perf_counter() - self._start, 't': t, 'z': z, 'mode': mode,
+                'total_ms': sum(stages.values()), 'stages': stages}
+
+    def summary(self):
+        """
+        Live statistics over the most recent frames.
+
+        Returns:
+            dict: 'fps' (shown frames per second, or None) and 'stages',
+            the mean milliseconds per frame of each stage.
+        """
+        with self._lock:
+            rows = list(self._recent)
+        fps = None
+        if len(rows) > 1:
+            span = rows[-1]['time_s'] - rows[0]['time_s']
+            fps = (len(rows) - 1) / span if span > 0 else None
+        stages = {}
+        for row in rows:
+            for name, ms in row['stages'].items():
+                stages[name] = stages.get(name, 0.0) + ms / len(rows)
+        return {'fps': fps, 'stages': stages}
+
+    def dump(self, path):
+        """Write the timing trace to a .json file, or CSV for any other extension."""
+        with self._lock:
+            rows = list(self.trace)
+            names = list(self.stage_names)
+        if path.lower().endswith('.json'):
+            with open(path, 'w') as f:
+                json.dump({'stages': names, 'frames': rows}, f, indent=1)
+            return
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['time_s', 't', 'z', 'mode', 'total_ms'] + [f"{n}_ms" for n in names])
+            for row in rows:
+                writer.writerow(
+                    [f"{row['time_s']:.6f}", row['t'], row['z'], row['mode'], f"{row['total_ms']:.3f}"]
+                    + [f"{row['stages'][n]:.3f}" if n in row['stages'] else '' for n in names]
+                )
+
+    def overlay_text(self):
+        """Short multi-line summary for the on-screen overlay."""
+        summary = self.summary()
+        fps = summary['fps']
+        lines = [f"FPS: {fps:.1f}" if fps is not None else "FPS: -"]
+        lines += [f"{name}: {ms:.2f} ms" for name, ms in summary['stages'].items()]
+        return "\n".join(lines)
@@ -0,0 +1,176 @@
+import importlib.util
+import os
+
+import numpy as np
+
+from profiling import StageProfiler
+
+# SciPy is optional; NumPy's FFT is used instead. scipy.fft is imported on
+# the first transform because importing it takes a large part of startup.
+HAVE_SCIPY = importlib.util.find_spec('scipy') is not None
+
+# Display modes
+KSPACE = 'kspace'
+IMAGE = 'image'
+
+FFT_AXES = (-2, -1)
+
+
+class NumpyFFT:
+    """NumPy FFT backend (single-threaded; `workers` is ignored)."""
+    name = 'numpy'
+
+    def __init__(self, workers=None):
+        self.workers = 1
+
+    def ifft2(self, x, axes=FFT_AXES):
+        return np.fft.ifft2(x, axes=axes)
+
+    def fft2(self, x, axes=FFT_AXES):
+        return np.fft.fft2(x, axes=axes)
+
+
+class ScipyFFT:
+    """scipy.fft backend, multi-threaded over the batch axes via `workers`."""
+    name = 'scipy'
+
+    def __init__(self, workers=None):
+        self.workers = workers or os.cpu_count() or 1
+
+    def ifft2(self, x, axes=FFT_AXES):
+        import scipy.fft
+        return scipy.fft.ifft2(x, axes=axes, workers=self.workers)
+
+    def fft2(self, x, axes=FFT_AXES):
+        import scipy.fft
+        return scipy.fft.fft2(x, axes=axes, workers=self.workers)
+
+
+FFT_BACKENDS = {'numpy': NumpyFFT, 'scipy': ScipyFFT}
+
+
+def get_fft_backend(name=None, workers=None):
+    """
+    Create an FFT backend.
+
+    Args:
+        name (str): 'scipy', 'numpy', or None to use SciPy when installed.
+        workers (int): Worker threads per transform (default: all cores).
+
+    Returns:
+        NumpyFFT or ScipyFFT: The backend.
+    """
+    if name is None:
+        name = 'scipy' if HAVE_SCIPY else 'numpy'
+    if name == 'scipy' and not HAVE_SCIPY:
+        raise ImportError("The 'scipy' FFT backend requires SciPy")
+    try:
+        backend_cls = FFT_BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Unknown FFT backend '{name}'") from None
+    return backend_cls(workers)
+
+
+def rss(data, axis=0):
+    """
+    Root-sum-of-squares magnitude of complex data along the coil axis.
+
+    Args:
+        data (np.ndarray): Complex data, e.g. [nc, ny, nx].
+        axis (int): Axis to combine.
+
+    Returns:
+        np.ndarray: float32 magnitude with `axis` removed.
+    """
+    power = np.square(data.real)
+    power += np.square(data.imag)
+    return np.sqrt(np.sum(power, axis=axis, dtype=np.float32))
+
+
+class ReconEngine:
+    """
+    Reconstructs display data from k-space with one batched transform.
+
+    A slab [nc, ny, nx], or a block of slabs [..., nc, ny, nx], is
+    transformed once and the composite RSS image and the per-coil
+    magnitudes are both derived from that single result. All outputs are
+    float32.
+    """
+
+    def __init__(self, backend=None, workers=None, profiler=None):
+        """
+        Args:
+            backend (str or backend object): FFT backend or its name; see
+                get_fft_backend.
+            workers (int): Worker threads per transform.
+            profiler (StageProfiler): Receives 'fft' and 'rss' stage
+                timings; a disabled one is created if omitted.
+        """
+        if backend is None or isinstance(backend, str):
+            backend = get_fft_backend(backend, workers)
+        self.fft = backend
+        self.profiler = profiler if profiler is not None else StageProfiler()
+
+    def ifft2c(self, kspace):
+        """
+        Centered 2D inverse FFT over the last two axes in single precision.
+
+        Uses the viewer's original shift order, ifftshift(ifft2(fftshift(k))),
+        so odd-sized matrices are centered exactly as before.
+
+        Args:
+            kspace (np.ndarray): Complex k-space data [..., ny, nx].
+
+        Returns:
+            np.ndarray: complex64 image-space data with the same shape.
+        """
+        kspace = np.asarray(kspace, dtype=np.complex64)
+        image = np.fft.ifftshift(
+            self.fft.ifft2(np.fft.fftshift(kspace, axes=FFT_AXES)),
+            axes=FFT_AXES
+        )
+        return image.astype(np.complex64, copy=False)
+
+    def reconstruct(self, kslab, mode):
+        """
+        Reconstruct the composite and per-coil display data of a slab.
+
+        Args:
+            kslab (np.ndarray): Complex k-space [..., nc, ny, nx].
+            mode (str): KSPACE for log-magnitude k-space, IMAGE for
+                magnitude images.
+
+        Returns:
+            tuple: (composite [..., ny, nx], coils [..., nc, ny, nx]), float32.
+        """
+        stage = self.profiler.stage
+        if mode == KSPACE:
+            with stage('rss'):
+                kslab = np.asarray(kslab, dtype=np.complex64)
+                coils = np.abs(kslab)
+                composite = np.log1p(rss(kslab, axis=-3))
+                np.log1p(coils, out=coils)
+        else:
+            with stage('fft'):
+                coils = np.abs(self.ifft2c(kslab))
+            with stage('rss'):
+                composite = np.sqrt(np.sum(np.square(coils), axis=-3))
+        return composite, coils
+
+    def image(self, kslab):
+        """RSS image of a slab [..., nc, ny, nx] (the image-space composite)."""
+        return self.reconstruct(kslab, IMAGE)[0]
+
+    def close(self):
+        """Release the engine's resources (none in-process; see SharedMemoryEngine)."""
+
+
+_default_engine = None
+
+
+def default_engine():
+    """Shared ReconEngine with the default backend."""
+    global _default_engine
+    if _default_engine is None:
+        _default_engine = ReconEngine()
+    return _default_engine
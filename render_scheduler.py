@@ -0,0 +1,148 @@
+import threading
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+# Task priorities in the thread pool (higher runs first)
+FOREGROUND_PRIORITY = 1
+PREFETCH_PRIORITY = 0
+
+
+class _RenderTask(QRunnable):
+    """Runs one renderer call on a pool thread unless it went stale first."""
+
+    def __init__(self, scheduler, renderer, key, token, foreground):
+        super().__init__()
+        self.scheduler = scheduler
+        self.renderer = renderer
+        self.key = key
+        self.token = token
+        self.foreground = foreground
+
+    def run(self):
+        error = ''
+        if not self.scheduler._is_stale(self.token, self.foreground):
+            try:
+                self.renderer.render(*self.key)
+            except Exception as e:
+                error = str(e)
+        self.scheduler._finished(self.key, self.token, self.foreground, error)
+
+
+class RenderScheduler(QObject):
+    """
+    Renders frames into the renderer's cache on a worker thread pool.
+
+    Foreground requests are latest-wins: at most one runs at a time and
+    only the most recent pending request is kept, so fast slider drags
+    never build up a backlog of stale frames. `frameReady` is emitted on
+    the GUI thread once the latest requested frame is in the cache.
+
+    Prefetch requests render frames ahead of the current position at a
+    lower priority and are dropped when the prefetch target changes.
+    """
+    frameReady = pyqtSignal(int, int, str)
+    renderFailed = pyqtSignal(str)
+    _done = pyqtSignal(object, int, bool, str)
+
+    def __init__(self, max_threads=None, parent=None):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        if max_threads:
+            self.pool.setMaxThreadCount(max_threads)
+        self.renderer = None
+        self._lock = threading.Lock()
+        self._generation = 0        # token of the latest foreground request
+        self._prefetch_epoch = 0    # token of the current prefetch run
+        self._prefetch_target = None
+        self._inflight = set()      # keys queued or running
+        self._busy = False
+        self._pending = None
+        self._done.connect(self._on_done)
+
+    def set_renderer(self, renderer):
+        """Switch to a new renderer (dataset), cancelling outstanding work."""
+        self.cancel()
+        self.renderer = renderer
+
+    def request(self, t, z, mode, coils=True):
+        """Render (t, z) in the foreground; only the latest request is kept."""
+        with self._lock:
+            self._generation += 1
+            self._pending = ((t, z, mode, coils), self._generation)
+        if not self._busy:
+            self._start_pending()
+
+    def prefetch(self, frames, z, mode, coils=True):
+        """
+        Render the given time frames ahead of display at low priority.
+
+        Args:
+            frames (list[int]): Time indices, nearest first.
+            z (int): Slice index.
+            mode (str): Display mode.
+            coils (bool): Also render the coil frames.
+        """
+        if self.renderer is None:
+            return
+        target = (z, mode, coils)
+        with self._lock:
+            if target != self._prefetch_target:
+                # Queued prefetches for the old target go stale
+                self._prefetch_epoch += 1
+                self._prefetch_target = target
+            token = self._prefetch_epoch
+            keys = [(t, z, mode, coils) for t in frames]
+            keys = [k for k in keys
+                    if k not in self._inflight and not self.renderer.is_cached(*k)]
+            self._inflight.update(keys)
+        for key in keys:
+            task = _RenderTask(self, self.renderer, key, token, foreground=False)
+            self.pool.start(task, PREFETCH_PRIORITY)
+
+    def cancel(self):
+        """Make all queued and running tasks stale; queued ones exit immediately."""
+        with self._lock:
+            self._generation += 1
+            self._prefetch_epoch += 1
+            self._prefetch_target = None
+            self._pending = None
+
+    def wait(self, msecs=-1):
+        """Block until all queued and running tasks have finished."""
+        return self.pool.waitForDone(msecs)
+
+    def _start_pending(self):
+        with self._lock:
+            if self._pending is None or self.renderer is None:
+                return
+            key, token = self._pending
+            self._pending = None
+            self._inflight.add(key)
+        self._busy = True
+        task = _RenderTask(self, self.renderer, key, token, foreground=True)
+        self.pool.start(task, FOREGROUND_PRIORITY)
+
+    def _is_stale(self, token, foreground):
+        with self._lock:
+            if foreground:
+                return token != self._generation
+            return token != self._prefetch_epoch
+
+    def _finished(self, key, token, foreground, error):
+        # Called on the worker thread
+        with self._lock:
+            self._inflight.discard(key)
+        if foreground or error:
+            self._done.emit(key, token, foreground, error)
+
+    def _on_done(self, key, token, foreground, error):
+        # Called on the GUI thread
+        if error:
+            self.renderFailed.emit(error)
+        if not foreground:
+            return
+        self._busy = False
+        if token == self._generation and not error:
+            t, z, mode, _ = key
+            self.frameReady.emit(t, z, mode)
+        self._start_pending()
@@ -0,0 +1,278 @@
+import math
+import threading
+
+import numpy as np
+
+from frame_cache import FrameCache
+from recon import ReconEngine, KSPACE
+from windowing import CODE_MAX, compute_dataset_stats
+
+# Cache key "coil" of low-resolution previews
+PREVIEW = 'preview'
+# Largest side of a preview frame
+PREVIEW_SIZE = 64
+
+
+class FrameRenderer:
+    """
+    Produces display frames from k-space, backed by a FrameCache.
+
+    Frames are uint16 codes over the dataset-wide intensity range of their
+    channel (see DatasetStats), so they are independent of the display
+    window and are turned into uint8 images by a WindowLevel lookup table.
+
+    Frames are cached under (time, slice, mode, coil) keys, with coil None
+    for the composite image, so the composite view, the coil grid and the
+    single-coil tabs share reconstructed frames. Each [t, z] slab is read
+    and transformed once by the ReconEngine; the composite and all coil
+    frames are derived from that one result.
+
+    With a ReconSidecar attached, frames missing from the memory cache are
+    read from disk when available, and newly reconstructed frames are
+    written to it.
+    """
+
+    def __init__(self, kdata, cache=None, engine=None, sidecar=None, stats_frames=16,
+                 profiler=None, stats=None):
+        """
+        Args:
+            kdata (KSpaceStore or np.ndarray): Complex k-space [nt, nz, nc, ny, nx].
+            cache (FrameCache): Cache for display frames; a new one is
+                created if omitted.
+            engine (ReconEngine): Reconstruction engine; a new one with the
+                default FFT backend is created if omitted.
+            sidecar (ReconSidecar): Optional on-disk frame store.
+            stats_frames (int): Frames sampled for the dataset statistics;
+                0 uses every frame.
+            profiler (StageProfiler): Receives stage timings (default: the
+                engine's profiler).
+            stats (dict): Precomputed DatasetStats by mode.
+        """
+        self.kdata = kdata
+        self.cache = cache if cache is not None else FrameCache()
+        self.engine = engine if engine is not None else ReconEngine()
+        self.sidecar = sidecar
+        self.stats_frames = stats_frames
+        self.profiler = profiler if profiler is not None else self.engine.profiler
+        self.stats = dict(stats or {})  # mode -> DatasetStats
+        self._stats_lock = threading.Lock()
+
+    @property
+    def nc(self):
+        return self.kdata.shape[2]
+
+    def dataset_stats(self, mode):
+        """
+        Dataset-wide statistics of a display mode, computed on first use
+        (or read from the sidecar) and fixed for the renderer's lifetime.
+        """
+        stats = self.stats.get(mode)
+        if stats is None:
+            with self._stats_lock:
+                stats = self.stats.get(mode)
+                if stats is None:
+                    sidecar = self.sidecar
+                    if sidecar is not None:
+                        stats = sidecar.read_stats(mode)
+                    if stats is None:
+                        # Timed as a whole, without the reconstructions inside
+                        with self.profiler.stage('stats'), self.profiler.suppressed():
+                            stats = compute_dataset_stats(
+                                self.kdata, self.engine, mode, max_frames=self.stats_frames
+                            )
+                    self.stats[mode] = stats
+                    if sidecar is not None:
+                        sidecar.write_stats(mode, stats)
+        return stats
+
+    def attach_sidecar(self, sidecar):
+        """Attach an on-disk frame store (None detaches)."""
+        if sidecar is not None:
+            with self._stats_lock:
+                # Stored frames must use the same code ranges as cached ones
+                for mode, stats in self.stats.items():
+                    sidecar.write_stats(mode, stats)
+        self.sidecar = sidecar
+
+    def composite(self, t, z, mode):
+        """Return the composite (RSS) display frame for time `t` and slice `z`."""
+        frame = self.cache.get((t, z, mode, None))
+        if frame is None:
+            frame = self._render(t, z, mode, coils=False)[0]
+        return frame
+
+    def coil(self, t, z, coil, mode):
+        """Return the display frame of a single coil."""
+        frame = self.cache.get((t, z, mode, coil))
+        if frame is None:
+            frame = self._render(t, z, mode, coils=True)[1][coil]
+        return frame
+
+    def coils(self, t, z, mode):
+        """Return the display frames of all coils."""
+        frames = [self.cache.get((t, z, mode, c)) for c in range(self.nc)]
+        if any(frame is None for frame in frames):
+            frames = self._render(t, z, mode, coils=True)[1]
+        return frames
+
+    def render(self, t, z, mode, coils=True):
+        """Make sure the composite (and optionally all coil) frames are cached."""
+        # The lookup records a cache hit or miss for the frame
+        if self.cache.get((t, z, mode, None)) is None or not self.is_cached(t, z, mode, coils):
+            self._render(t, z, mode, coils)
+
+    def render_block(self, t_start, t_stop, z, mode, coils=True):
+        """
+        Render a contiguous block of time frames with one read and one
+        batched transform, caching every frame.
+        """
+        composite, coil_data = self.engine.reconstruct(self.kdata[t_start:t_stop, z], mode)
+        for i, t in enumerate(range(t_start, t_stop)):
+            self._store(t, z, mode, composite[i], coil_data[i] if coils else None)
+
+    def slice_frames(self, z, mode, times=None, coils=True, block_size=8):
+        """
+        Iterate over the float32 frames of a slice in time order.
+
+        Cached frames are dequantized from their display codes (within
+        half a code step of the reconstruction) unless a code is saturated
+        at CODE_MAX, i.e. the frame exceeds the dataset range sampled for
+        the statistics; runs of saturated and uncached frames are
+        reconstructed in blocks with one batched transform each, and the
+        uncached ones are cached on the way. Analysis (ROI curves,
+        temporal maps, M-mode) thus never sees clipped values.
+
+        Args:
+            z (int): Slice.
+            mode (str): Display mode (KSPACE or IMAGE).
+            times (iterable): Time frames, ascending (default: all).
+            coils (bool): Also produce (and cache) the coil frames.
+            block_size (int): Time frames reconstructed per batch.
+
+        Yields:
+            tuple: (t, composite [ny, nx], coils [nc, ny, nx] or None).
+        """
+        times = list(range(self.kdata.shape[0]) if times is None else times)
+        stats = self.dataset_stats(mode)
+        cached = [self._unsaturated_codes(t, z, mode, coils) for t in times]
+        i = 0
+        while i < len(times):
+            t = times[i]
+            if cached[i] is not None:
+                composite, coil_codes = cached[i]
+                coil_data = stats.dequantize_coils(coil_codes) if coils else None
+                yield t, stats.dequantize(composite), coil_data
+                i += 1
+                continue
+            # A run of consecutive frames to reconstruct, up to one block
+            j = i + 1
+            while (j < len(times) and times[j] == times[j - 1] + 1 and j - i < block_size
+                   and cached[j] is None):
+                j += 1
+            t_stop = times[j - 1] + 1
+            composite, coil_data = self.engine.reconstruct(self.kdata[t:t_stop, z], mode)
+            for k in range(j - i):
+                if not self.is_cached(t + k, z, mode, coils):
+                    self._store(t + k, z, mode, composite[k], coil_data[k] if coils else None)
+                yield t + k, composite[k], coil_data[k] if coils else None
+            i = j
+
+    def _unsaturated_codes(self, t, z, mode, coils):
+        """
+        Cached (composite, stacked coil codes or None) of a frame, or None
+        if any of them is missing or saturated.
+        """
+        composite = self.cache.get((t, z, mode, None))
+        if composite is None or composite.max() >= CODE_MAX:
+            return None
+        if not coils:
+            return composite, None
+        coil_frames = [self.cache.get((t, z, mode, c)) for c in range(self.nc)]
+        if any(frame is None for frame in coil_frames):
+            return None
+        coil_codes = np.stack(coil_frames)
+        if coil_codes.max() >= CODE_MAX:
+            return None
+        return composite, coil_codes
+
+    def preview_factor(self, max_size=PREVIEW_SIZE):
+        """Integer downsampling factor of previews (1: no smaller than a full frame)."""
+        ny, nx = self.kdata.shape[3:5]
+        return max(1, math.ceil(max(ny, nx) / max_size))
+
+    def preview(self, t, z, mode, max_size=PREVIEW_SIZE):
+        """
+        Low-resolution composite of a frame, f = preview_factor() times
+        smaller per axis, as uint16 codes of the dataset statistics.
+
+        In image space only the central k-space region is read and inverse
+        transformed, which gives a correct (band-limited) low-resolution
+        image for a fraction of the cost; in k-space every f-th sample is
+        shown. Previews are cached alongside the full frames.
+        """
+        key = (t, z, mode, PREVIEW)
+        codes = self.cache.get(key)
+        if codes is not None:
+            return codes
+        ny, nx = self.kdata.shape[3:5]
+        f = self.preview_factor(max_size)
+        sy, sx = ny // f, nx // f
+        stats = self.dataset_stats(mode)
+        with self.profiler.stage('preview'):
+            if mode == KSPACE:
+                kslab = self.kdata[t, z, :, ::f, ::f][..., :sy, :sx]
+                composite = self.engine.reconstruct(kslab, mode)[0]
+            else:
+                y0, x0 = ny // 2 - sy // 2, nx // 2 - sx // 2
+                kslab = self.kdata[t, z, :, y0:y0 + sy, x0:x0 + sx]
+                # The small transform's 1/(sy*sx) scaling versus 1/(ny*nx)
+                composite = self.engine.reconstruct(kslab, mode)[0] * (sy * sx / (ny * nx))
+            codes = stats.quantize(composite)
+        self.cache.put(key, codes)
+        return codes
+
+    def is_cached(self, t, z, mode, coils=True):
+        """Whether `render(t, z, mode, coils)` would be a pure cache hit."""
+        if (t, z, mode, None) not in self.cache:
+            return False
+        return not coils or all(
+            (t, z, mode, c) in self.cache for c in range(self.nc)
+        )
+
+    def _render(self, t, z, mode, coils):
+        profiler = self.profiler
+        with profiler.track((t, z, mode)):
+            sidecar = self.sidecar
+            if sidecar is not None:
+                with profiler.stage('sidecar_read'):
+                    stored = sidecar.read(t, z, mode, coils)
+                if stored is not None:
+                    return self._cache_frames(t, z, mode, *stored)
+            # Statistics first, so that computing them is not timed as 'read'
+            self.dataset_stats(mode)
+            with profiler.stage('read'):
+                kslab = self.kdata[t, z]
+            composite, coil_data = self.engine.reconstruct(kslab, mode)
+            return self._store(t, z, mode, composite, coil_data if coils else None)
+
+    def _store(self, t, z, mode, composite, coil_data):
+        """Quantize reconstructed data to display codes and cache (and persist) them."""
+        stats = self.dataset_stats(mode)
+        with self.profiler.stage('quantize'):
+            frame = stats.quantize(composite)
+            coil_frames = None
+            if coil_data is not None:
+                coil_frames = stats.quantize_coils(coil_data)
+        sidecar = self.sidecar
+        if sidecar is not None:
+            with self.profiler.stage('sidecar_write'):
+                sidecar.write(t, z, mode, frame, coil_frames)
+        return self._cache_frames(t, z, mode, frame, coil_frames)
+
+    def _cache_frames(self, t, z, mode, frame, coil_frames):
+        self.cache.put((t, z, mode, None), frame)
+        if coil_frames is not None:
+            coil_frames = list(coil_frames)
+            for c, coil_frame in enumerate(coil_frames):
+                self.cache.put((t, z, mode, c), coil_frame)
+        return frame, coil_frames
@@ -0,0 +1,92 @@
+"""
+Rewrite a k-space file into a layout suited to frame-by-frame access.
+
+The data is copied into a complex64 dataset [nt, nz, nc, ny, nx] with one
+chunk per [t, z] slab, so every frame the viewer shows costs exactly one
+chunk read. Optional lossless compression (gzip or lzf) with the shuffle
+filter usually shrinks k-space noticeably at a small decompression cost.
+The source may be any layout KSpaceStore reads; it is copied one slab at a
+time, so files larger than memory can be repacked.
+
+Example:
+    python repack.py scan.mat scan_frames.h5 --compression lzf --shuffle
+"""
+import argparse
+import os
+import sys
+
+import h5py
+import numpy as np
+
+from kspace_store import KSpaceStore
+
+COMPRESSIONS = ('none', 'gzip', 'lzf')
+
+
+def repack(input_path, output_path, key='kspace_full', compression=None,
+           compression_level=None, shuffle=False, progress=None):
+    """
+    Copy the k-space data of a file into a per-frame chunked HDF5 file.
+
+    Args:
+        input_path (str): Source .mat/.h5 file.
+        output_path (str): Destination .h5 file (overwritten).
+        key (str): Source dataset name (see KSpaceStore); the output
+            dataset is always 'kspace_full'.
+        compression (str): None, 'gzip' or 'lzf'.
+        compression_level (int): gzip level 0-9 (default 4).
+        shuffle (bool): Apply the byte shuffle filter before compression.
+        progress (callable): Called with (done, total) after each slab.
+
+    Returns:
+        tuple: (source chunks per frame, bytes written).
+    """
+    if compression == 'none':
+        compression = None
+    if os.path.abspath(input_path) == os.path.abspath(output_path):
+        raise ValueError("Output must differ from the input file")
+    with KSpaceStore(input_path, key) as kdata, h5py.File(output_path, 'w') as out:
+        nt, nz, nc, ny, nx = kdata.shape
+        dset = out.create_dataset(
+            'kspace_full', shape=kdata.shape, dtype=np.complex64,
+            chunks=(1, 1, nc, ny, nx), compression=compression,
+            compression_opts=compression_level if compression == 'gzip' else None,
+            shuffle=shuffle,
+        )
+        for t in range(nt):
+            for z in range(nz):
+                dset[t, z] = kdata[t, z]
+                if progress is not None:
+                    progress(t * nz + z + 1, nt * nz)
+        source_chunks = kdata.chunks_per_frame
+    return source_chunks, os.path.getsize(output_path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Rewrite k-space data with one chunk per [t, z] frame."
+    )
+    parser.add_argument('input', help="k-space .mat/.h5 file")
+    parser.add_argument('output', help="output .h5 file")
+    parser.add_argument('--key', default='kspace_full', help="source dataset name")
+    parser.add_argument('--compression', choices=COMPRESSIONS, default='none',
+                        help="lossless compression filter")
+    parser.add_argument('--level', type=int, default=None, help="gzip compression level (0-9)")
+    parser.add_argument('--shuffle', action='store_true', help="apply the shuffle filter")
+    args = parser.parse_args(argv)
+
+    def report(done, total):
+        print(f"\r{done}/{total} frames", end='', file=sys.stderr, flush=True)
+
+    source_chunks, nbytes = repack(
+        args.input, args.output, key=args.key, compression=args.compression,
+        compression_level=args.level, shuffle=args.shuffle, progress=report,
+    )
+    print(file=sys.stderr)
+    print(f"Chunks read per frame: {source_chunks} before, 1 after; "
+          f"{os.path.getsize(args.input) / 1024 ** 2:.1f} MiB -> {nbytes / 1024 ** 2:.1f} MiB",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
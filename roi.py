@@ -0,0 +1,80 @@
+import math
+
+import numpy as np
+
+
+class RoiCurves:
+    """
+    Time-intensity curves of a rectangular ROI.
+
+    `mean`, `std` and `max` have shape [nt, nc + 1]; channel 0 is the RSS
+    composite and channel c + 1 is coil c.
+    """
+
+    def __init__(self, box, slice_index, mode, mean, std, maximum):
+        self.box = box
+        self.slice_index = slice_index
+        self.mode = mode
+        self.mean = mean
+        self.std = std
+        self.max = maximum
+
+    def curve(self, statistic, channel):
+        """One curve over time, e.g. curve('mean', 0) for the composite mean."""
+        return getattr(self, statistic)[:, channel]
+
+
+def roi_box(rect, shape):
+    """
+    Convert a scene rectangle in image pixel coordinates to a clipped box.
+
+    Args:
+        rect (QRectF): ROI in scene coordinates (1 unit = 1 pixel).
+        shape (tuple): Image shape (ny, nx).
+
+    Returns:
+        tuple: (y0, y1, x0, x1) with y1 > y0 and x1 > x0, or None if the
+        rectangle does not overlap the image.
+    """
+    ny, nx = shape
+    x0 = max(int(math.floor(rect.left())), 0)
+    x1 = min(int(math.ceil(rect.right())), nx)
+    y0 = max(int(math.floor(rect.top())), 0)
+    y1 = min(int(math.ceil(rect.bottom())), ny)
+    if x1 <= x0 or y1 <= y0:
+        return None
+    return y0, y1, x0, x1
+
+
+def roi_time_curves(renderer, slice_index, mode, box, block_size=8, should_stop=None):
+    """
+    Mean, std and max inside an ROI over all time frames of a slice.
+
+    Cached frames are reused unless their display codes are saturated;
+    the others are reconstructed in blocks of time frames (see
+    FrameRenderer.slice_frames), so intensities above the display range
+    are not clipped.
+
+    Args:
+        renderer (FrameRenderer): Source of frames.
+        slice_index (int): Slice to analyze.
+        mode (str): Display mode (KSPACE or IMAGE).
+        box (tuple): (y0, y1, x0, x1) pixel box, see roi_box.
+        block_size (int): Time frames reconstructed per batch.
+        should_stop (callable): Returns True to abandon the computation.
+
+    Returns:
+        RoiCurves: The curves, or None if stopped.
+    """
+    y0, y1, x0, x1 = box
+    nt, _, nc = renderer.kdata.shape[:3]
+    values = np.empty((nt, nc + 1, y1 - y0, x1 - x0), dtype=np.float32)
+    for t, composite, coil_data in renderer.slice_frames(slice_index, mode, block_size=block_size):
+        if should_stop is not None and should_stop():
+            return None
+        values[t, 0] = composite[y0:y1, x0:x1]
+        values[t, 1:] = coil_data[:, y0:y1, x0:x1]
+
+    flat = values.reshape(nt, nc + 1, -1)
+    return RoiCurves(box, slice_index, mode,
+                     flat.mean(axis=-1), flat.std(axis=-1), flat.max(axis=-1))
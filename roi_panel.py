@@ -0,0 +1,139 @@
+import numpy as np
+from PyQt5.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QComboBox, QLabel, QSizePolicy
+from PyQt5.QtCore import QObject, QRunnable, QPointF, Qt, pyqtSignal
+from PyQt5.QtGui import QPainter, QPen, QPolygonF
+
+from roi import roi_time_curves
+
+STATISTICS = ('mean', 'std', 'max')
+
+
+class RoiSignals(QObject):
+    finished = pyqtSignal(int, object)  # request id, RoiCurves
+    failed = pyqtSignal(int, str)
+
+
+class RoiTask(QRunnable):
+    """Computes ROI time curves on a worker thread."""
+
+    def __init__(self, request_id, renderer, slice_index, mode, box, should_stop=None):
+        super().__init__()
+        self.request_id = request_id
+        self.renderer = renderer
+        self.slice_index = slice_index
+        self.mode = mode
+        self.box = box
+        self.should_stop = should_stop
+        self.signals = RoiSignals()
+
+    def run(self):
+        try:
+            curves = roi_time_curves(self.renderer, self.slice_index, self.mode, self.box,
+                                     should_stop=self.should_stop)
+        except Exception as e:
+            self.signals.failed.emit(self.request_id, str(e))
+            return
+        if curves is not None:
+            self.signals.finished.emit(self.request_id, curves)
+
+
+class CurvePlot(QWidget):
+    """Minimal line plot of one curve over time, with a marker at the current frame."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.values = None
+        self.marker = None
+        self.setMinimumHeight(150)
+        self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+
+    def set_curve(self, values):
+        self.values = None if values is None else np.asarray(values, dtype=float)
+        self.update()
+
+    def set_marker(self, index):
+        self.marker = index
+        self.update()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), Qt.black)
+        if self.values is None or len(self.values) == 0:
+            return
+        margin = 30
+        w = max(self.width() - 2 * margin, 1)
+        h = max(self.height() - 2 * margin, 1)
+        v_min, v_max = float(self.values.min()), float(self.values.max())
+        span = v_max - v_min or 1.0
+        n = len(self.values)
+
+        def to_point(i, v):
+            x = margin + (i / max(n - 1, 1)) * w
+            y = margin + h - (v - v_min) / span * h
+            return QPointF(x, y)
+
+        painter.setPen(QPen(Qt.gray))
+        painter.drawRect(margin, margin, w, h)
+        painter.drawText(2, margin + 10, f"{v_max:.3g}")
+        painter.drawText(2, margin + h, f"{v_min:.3g}")
+        painter.drawText(margin, margin + h + 20, "t = 0")
+        painter.drawText(margin + w - 40, margin + h + 20, f"t = {n - 1}")
+
+        if self.marker is not None and 0 <= self.marker < n:
+            painter.setPen(QPen(Qt.darkYellow))
+            x = to_point(self.marker, v_min).x()
+            painter.drawLine(QPointF(x, margin), QPointF(x, margin + h))
+
+        painter.setPen(QPen(Qt.green, 2))
+        painter.drawPolyline(QPolygonF([to_point(i, v) for i, v in enumerate(self.values)]))
+
+
+class RoiPanel(QWidget):
+    """ROI analysis panel: a channel and statistic selector above a curve plot."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.curves = None
+        layout = QVBoxLayout(self)
+
+        selectors = QHBoxLayout()
+        self.channel_box = QComboBox()
+        self.channel_box.currentIndexChanged.connect(self.refresh)
+        self.statistic_box = QComboBox()
+        self.statistic_box.addItems(STATISTICS)
+        self.statistic_box.currentIndexChanged.connect(self.refresh)
+        selectors.addWidget(self.channel_box, stretch=1)
+        selectors.addWidget(self.statistic_box)
+        layout.addLayout(selectors)
+
+        self.info_label = QLabel("Right-click the composite image to switch to ROI selection, then drag a rectangle.")
+        self.info_label.setWordWrap(True)
+        layout.addWidget(self.info_label)
+
+        self.plot = CurvePlot()
+        layout.addWidget(self.plot, stretch=1)
+
+    def set_busy(self, text):
+        self.info_label.setText(text)
+
+    def set_curves(self, curves):
+        self.curves = curves
+        nc = curves.mean.shape[1] - 1
+        channel = max(self.channel_box.currentIndex(), 0)
+        self.channel_box.blockSignals(True)
+        self.channel_box.clear()
+        self.channel_box.addItems(["RSS composite"] + [f"Coil {c + 1}" for c in range(nc)])
+        self.channel_box.setCurrentIndex(min(channel, nc))
+        self.channel_box.blockSignals(False)
+        y0, y1, x0, x1 = curves.box
+        self.info_label.setText(
+            f"Slice {curves.slice_index}, {curves.mode}, "
+            f"ROI x {x0}:{x1}, y {y0}:{y1} ({(x1 - x0) * (y1 - y0)} px)"
+        )
+        self.refresh()
+
+    def refresh(self):
+        if self.curves is None:
+            return
+        channel = max(self.channel_box.currentIndex(), 0)
+        self.plot.set_curve(self.curves.curve(self.statistic_box.currentText(), channel))
@@ -0,0 +1,168 @@
+"""
+Process-pool reconstruction with shared-memory data exchange.
+
+SharedMemoryEngine has the ReconEngine interface, but runs the transforms
+and RSS in worker processes, so concurrent reconstructions (the render
+scheduler's threads, prefetch during playback, blocks of frames) use every
+core instead of contending for the GIL. K-space slabs and reconstructed
+frames are passed through `multiprocessing.shared_memory` segments that are
+reused between calls; only the segment names and slab ranges are pickled.
+"""
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context, shared_memory
+
+import numpy as np
+
+from profiling import StageProfiler
+from recon import ReconEngine, IMAGE
+
+# Slabs smaller than this are reconstructed in-process; the round trip
+# to a worker would cost more than the transform
+MIN_SHARED_BYTES = 1024 ** 2
+
+# Per-process state set up by _init_worker
+_worker_engine = None
+_worker_segments = {}  # segment name -> SharedMemory attached in this worker
+
+
+def _init_worker(backend):
+    global _worker_engine
+    # One FFT thread per process; the pool provides the parallelism
+    _worker_engine = ReconEngine(backend, workers=1)
+
+
+def _attach(name):
+    """Attach a segment created by the parent process (once per worker)."""
+    shm = _worker_segments.get(name)
+    if shm is None:
+        # Spawned workers share the parent's resource tracker, so attaching
+        # re-registers the segment harmlessly; only the parent unlinks it
+        shm = _worker_segments[name] = shared_memory.SharedMemory(name=name)
+    return shm
+
+
+def _frame_views(kspace_buf, out_buf, shape):
+    """K-space [n, nc, ny, nx] and composite [n, ny, nx] / coils [n, nc, ny, nx] views."""
+    n, nc, ny, nx = shape
+    kspace = np.ndarray(shape, dtype=np.complex64, buffer=kspace_buf)
+    composite = np.ndarray((n, ny, nx), dtype=np.float32, buffer=out_buf)
+    coils = np.ndarray(shape, dtype=np.float32, buffer=out_buf, offset=composite.nbytes)
+    return kspace, composite, coils
+
+
+def _reconstruct_range(kspace_name, out_name, shape, mode, start, stop):
+    """Reconstruct slabs [start, stop) of the shared k-space into the shared output."""
+    kspace, composite, coils = _frame_views(
+        _attach(kspace_name).buf, _attach(out_name).buf, shape)
+    composite[start:stop], coils[start:stop] = _worker_engine.reconstruct(kspace[start:stop], mode)
+
+
+class SharedMemoryEngine:
+    """
+    ReconEngine backed by a process pool exchanging data in shared memory.
+
+    A call copies the slab into a shared segment, splits its slabs over
+    the workers and copies the results out of a second segment, so no
+    array is pickled. Segments are kept in a free list by size and reused.
+    """
+
+    def __init__(self, processes=None, backend=None, profiler=None,
+                 min_shared_bytes=MIN_SHARED_BYTES):
+        """
+        Args:
+            processes (int): Worker processes (default: CPU count).
+            backend (str): FFT backend name of the workers; see get_fft_backend.
+            profiler (StageProfiler): Receives 'share' (copies to and from
+                shared memory) and 'recon' (waiting for the workers) stage
+                timings; a disabled one is created if omitted.
+            min_shared_bytes (int): Smaller slabs are reconstructed in-process.
+        """
+        self.processes = processes or os.cpu_count() or 1
+        self.profiler = profiler if profiler is not None else StageProfiler()
+        self.local = ReconEngine(backend, profiler=self.profiler)
+        self.min_shared_bytes = min_shared_bytes
+        # Spawned workers do not inherit the GUI's threads or open files
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.processes, mp_context=get_context('spawn'),
+            initializer=_init_worker, initargs=(self.local.fft.name,),
+        )
+        self._lock = threading.Lock()
+        self._free = {}       # nbytes -> idle segments
+        self._segments = []   # every segment created, for close()
+
+    @property
+    def fft(self):
+        return self.local.fft
+
+    def _acquire(self, nbytes):
+        with self._lock:
+            idle = self._free.get(nbytes)
+            if idle:
+                return idle.pop()
+        shm = shared_memory.SharedMemory(create=True, size=nbytes)
+        with self._lock:
+            self._segments.append(shm)
+        return shm
+
+    def _release(self, shm, nbytes):
+        # Keyed by the requested size; some platforms round shm.size up
+        with self._lock:
+            self._free.setdefault(nbytes, []).append(shm)
+
+    def ifft2c(self, kspace):
+        return self.local.ifft2c(kspace)
+
+    def reconstruct(self, kslab, mode):
+        """
+        Reconstruct the composite and per-coil display data of a slab.
+
+        Same arguments and results as ReconEngine.reconstruct; a block of
+        slabs [nb, nc, ny, nx] is spread over the worker processes.
+        """
+        kslab = np.asarray(kslab)
+        *lead, nc, ny, nx = kslab.shape
+        n = int(np.prod(lead, dtype=np.int64))
+        shape = (n, nc, ny, nx)
+        kspace_bytes = n * nc * ny * nx * np.dtype(np.complex64).itemsize
+        if kspace_bytes < self.min_shared_bytes:
+            return self.local.reconstruct(kslab, mode)
+
+        stage = self.profiler.stage
+        out_bytes = n * (nc + 1) * ny * nx * np.dtype(np.float32).itemsize
+        kspace_shm = self._acquire(kspace_bytes)
+        out_shm = self._acquire(out_bytes)
+        try:
+            kspace, composite, coils = _frame_views(kspace_shm.buf, out_shm.buf, shape)
+            with stage('share'):
+                kspace[...] = kslab.reshape(shape)
+            with stage('recon'):
+                bounds = np.linspace(0, n, min(n, self.processes) + 1).astype(int)
+                futures = [
+                    self._pool.submit(_reconstruct_range, kspace_shm.name, out_shm.name,
+                                      shape, mode, int(start), int(stop))
+                    for start, stop in zip(bounds[:-1], bounds[1:])
+                ]
+                for future in futures:
+                    future.result()
+            with stage('share'):
+                composite = composite.reshape(*lead, ny, nx).copy()
+                coils = coils.reshape(*lead, nc, ny, nx).copy()
+        finally:
+            self._release(kspace_shm, kspace_bytes)
+            self._release(out_shm, out_bytes)
+        return composite, coils
+
+    def image(self, kslab):
+        """RSS image of a slab [..., nc, ny, nx] (the image-space composite)."""
+        return self.reconstruct(kslab, IMAGE)[0]
+
+    def close(self):
+        """Stop the workers and free the shared memory."""
+        self._pool.shutdown(wait=True, cancel_futures=True)
+        with self._lock:
+            segments, self._segments, self._free = self._segments, [], {}
+        for shm in segments:
+            shm.close()
+            shm.unlink()
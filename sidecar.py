@@ -0,0 +1,176 @@
+import os
+import threading
+
+import h5py
+import numpy as np
+
+from windowing import CODE_DTYPE, DatasetStats
+
+SIDECAR_SUFFIX = '.recon.h5'
+SIDECAR_VERSION = 2
+
+# Bits of the per-frame 'filled' flags
+_COMPOSITE = 1
+_COILS = 2
+
+
+def sidecar_path(source_path):
+    """Default sidecar location: '<name>.recon.h5' next to the source file."""
+    return os.path.splitext(source_path)[0] + SIDECAR_SUFFIX
+
+
+class ReconSidecar:
+    """
+    On-disk cache of display frames stored next to a dataset.
+
+    For every display mode the file holds a composite dataset
+    [nt, nz, ny, nx] and a coil dataset [nt, nz, nc, ny, nx] of uint16
+    display codes, chunked so that one [t, z] frame is one chunk, plus
+    per-frame flags recording which frames have been written and, as
+    attributes, the DatasetStats the codes were quantized with. The
+    sidecar is keyed to the source file's size and modification time; if
+    either changed, it is rebuilt empty.
+
+    The sidecar may be closed while other threads still use it: once
+    closed, it reads as empty and ignores writes.
+    """
+
+    def __init__(self, source_path, shape, path=None):
+        """
+        Args:
+            source_path (str): The k-space file the frames are derived from.
+            shape (tuple): K-space shape (nt, nz, nc, ny, nx).
+            path (str): Sidecar location (default: see sidecar_path).
+
+        Raises:
+            OSError: If the sidecar cannot be opened or created.
+        """
+        self.path = path or sidecar_path(source_path)
+        self.shape = tuple(shape)
+        st = os.stat(source_path)
+        self._key = {
+            'version': SIDECAR_VERSION,
+            'source_size': st.st_size,
+            'source_mtime_ns': st.st_mtime_ns,
+            'shape': np.asarray(self.shape, dtype=np.int64),
+        }
+        self._lock = threading.Lock()
+        self._filled = {}
+
+        self.file = None
+        if os.path.exists(self.path):
+            try:
+                self.file = h5py.File(self.path, 'a')
+            except OSError:
+                self.file = None
+            if self.file is not None and not self._is_current():
+                self.file.close()
+                self.file = None
+        if self.file is None:
+            self.file = h5py.File(self.path, 'w')
+            for name, value in self._key.items():
+                self.file.attrs[name] = value
+
+    @property
+    def closed(self):
+        return not self.file.id.valid
+
+    def _is_current(self):
+        attrs = self.file.attrs
+        for name, value in self._key.items():
+            if name not in attrs or not np.array_equal(attrs[name], value):
+                return False
+        return True
+
+    def _group(self, mode):
+        """Datasets for a display mode, created on first use."""
+        if mode in self._filled:
+            return self.file[mode]
+        nt, nz, nc, ny, nx = self.shape
+        group = self.file.require_group(mode)
+        group.require_dataset(
+            'composite', shape=(nt, nz, ny, nx), dtype=CODE_DTYPE, chunks=(1, 1, ny, nx)
+        )
+        group.require_dataset(
+            'coils', shape=(nt, nz, nc, ny, nx), dtype=CODE_DTYPE, chunks=(1, 1, nc, ny, nx)
+        )
+        filled = group.require_dataset('filled', shape=(nt, nz), dtype=np.uint8)
+        self._filled[mode] = filled[()]
+        return group
+
+    def read_stats(self, mode):
+        """The DatasetStats stored for a mode, or None."""
+        with self._lock:
+            if self.closed:
+                return None
+            attrs = self._group(mode).attrs
+            if 'lo' not in attrs:
+                return None
+            return DatasetStats(**{name: attrs[name] for name in
+                                   ('lo', 'hi', 'p_low', 'p_high', 'hist', 'edges')})
+
+    def write_stats(self, mode, stats):
+        """
+        Record the statistics the mode's frames are quantized with. Frames
+        stored with different statistics are discarded.
+        """
+        with self._lock:
+            if self.closed:
+                return
+            group = self._group(mode)
+            if 'lo' in group.attrs:
+                if all(np.array_equal(group.attrs[name], value)
+                       for name, value in stats.as_dict().items()):
+                    return
+                self._filled[mode][:] = 0
+                group['filled'][...] = 0
+            for name, value in stats.as_dict().items():
+                group.attrs[name] = value
+
+    def has(self, t, z, mode, coils=True):
+        """Whether the composite (and coil) frames of (t, z) are stored."""
+        with self._lock:
+            if self.closed:
+                return False
+            self._group(mode)
+            want = _COMPOSITE | (_COILS if coils else 0)
+            return self._filled[mode][t, z] & want == want
+
+    def read(self, t, z, mode, coils=True):
+        """
+        Returns:
+            tuple: (composite [ny, nx], coils [nc, ny, nx] or None) as
+            uint16 codes, or None if the frames are not stored.
+        """
+        with self._lock:
+            if self.closed:
+                return None
+            group = self._group(mode)
+            want = _COMPOSITE | (_COILS if coils else 0)
+            if self._filled[mode][t, z] & want != want:
+                return None
+            composite = group['composite'][t, z]
+            coil_frames = group['coils'][t, z] if coils else None
+        return composite, coil_frames
+
+    def write(self, t, z, mode, composite, coil_frames=None):
+        """Store the display frames of (t, z)."""
+        with self._lock:
+            if self.closed:
+                return
+            group = self._group(mode)
+            flags = self._filled[mode][t, z] | _COMPOSITE
+            group['composite'][t, z] = composite
+            if coil_frames is not None:
+                group['coils'][t, z] = np.asarray(coil_frames)
+                flags |= _COILS
+            self._filled[mode][t, z] = flags
+            group['filled'][t, z] = flags
+
+    def close(self):
+        with self._lock:
+            if not self.closed:
+                self.file.close()
+
+    def __repr__(self):
+        return f"ReconSidecar('{self.path}')"
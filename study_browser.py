@@ -0,0 +1,172 @@
+import os
+import threading
+
+import numpy as np
+from PyQt5.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel, QListWidget, QListWidgetItem,
+    QFileDialog,
+)
+from PyQt5.QtCore import Qt, QObject, QRunnable, QSize, pyqtSignal
+from PyQt5.QtGui import QIcon, QImage, QPixmap
+
+from study_index import StudyIndex, THUMBNAIL_SIZE, index_file
+
+
+class IndexSignals(QObject):
+    indexed = pyqtSignal(int, object)  # request id, StudyEntry
+    finished = pyqtSignal(int)
+
+
+class IndexTask(QRunnable):
+    """Indexes new and changed files of a study directory on a worker thread."""
+
+    def __init__(self, request_id, index_path, paths):
+        super().__init__()
+        self.request_id = request_id
+        self.index_path = index_path
+        self.paths = paths
+        self.signals = IndexSignals()
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def run(self):
+        try:
+            index = StudyIndex(self.index_path)
+        except Exception as e:
+            print(f"Failed to open the study index: {e}")
+            return
+        try:
+            for path in self.paths:
+                if self._cancelled.is_set():
+                    return
+                try:
+                    entry = index_file(path)
+                    index.put(entry)
+                except Exception as e:  # e.g. the file went away
+                    print(f"Failed to index {path}: {e}")
+                    continue
+                self.signals.indexed.emit(self.request_id, entry)
+        finally:
+            index.close()
+        self.signals.finished.emit(self.request_id)
+
+
+def _thumbnail_icon(thumbnail):
+    """Square icon of a uint8 thumbnail (blank while not yet indexed)."""
+    pixmap = QPixmap(THUMBNAIL_SIZE, THUMBNAIL_SIZE)
+    pixmap.fill(Qt.black)
+    if thumbnail is not None:
+        h, w = thumbnail.shape
+        image = QImage(np.ascontiguousarray(thumbnail).data, w, h, w, QImage.Format_Grayscale8)
+        pixmap = QPixmap.fromImage(image).scaled(
+            THUMBNAIL_SIZE, THUMBNAIL_SIZE, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+    return QIcon(pixmap)
+
+
+class StudyBrowser(QWidget):
+    """
+    Thumbnails of the datasets in a study directory.
+
+    Indexed files are listed straight from the StudyIndex; new and changed
+    files appear at once with a blank thumbnail that is filled in by a
+    background IndexTask. Double-clicking a dataset emits `studySelected`
+    with its path; only then is the file fully opened.
+    """
+    studySelected = pyqtSignal(str)
+
+    def __init__(self, pool, index_path=None, parent=None):
+        """
+        Args:
+            pool (QThreadPool): Pool that runs the indexer.
+            index_path (str): Index database (default: see default_index_path).
+            parent (QWidget): Parent widget.
+        """
+        super().__init__(parent)
+        self.pool = pool
+        self.index = StudyIndex(index_path)
+        self.directory = None
+        self.items = {}  # path -> QListWidgetItem
+        self.index_task = None
+        self.index_request = 0
+
+        layout = QVBoxLayout(self)
+        top = QHBoxLayout()
+        self.folder_button = QPushButton("Open Folder")
+        self.folder_button.clicked.connect(self.choose_directory)
+        top.addWidget(self.folder_button)
+        self.status_label = QLabel()
+        top.addWidget(self.status_label, stretch=1)
+        layout.addLayout(top)
+
+        self.list_widget = QListWidget()
+        self.list_widget.setViewMode(QListWidget.IconMode)
+        self.list_widget.setIconSize(QSize(THUMBNAIL_SIZE, THUMBNAIL_SIZE))
+        self.list_widget.setResizeMode(QListWidget.Adjust)
+        self.list_widget.setMovement(QListWidget.Static)
+        self.list_widget.setWordWrap(True)
+        self.list_widget.itemActivated.connect(
+            lambda item: self.studySelected.emit(item.data(Qt.UserRole)))
+        layout.addWidget(self.list_widget, stretch=1)
+
+    def choose_directory(self):
+        directory = QFileDialog.getExistingDirectory(self, "Open Study Folder", self.directory or "")
+        if directory:
+            self.set_directory(directory)
+
+    def set_directory(self, directory):
+        """List a directory from the index and index its new or changed files."""
+        self.cancel_indexing()
+        self.directory = os.path.abspath(directory)
+        self.list_widget.clear()
+        self.items = {}
+        try:
+            listing, stale = self.index.scan(self.directory)
+        except OSError as e:
+            self.status_label.setText(f"Cannot read {directory}: {e}")
+            return
+        for path, entry in listing:
+            item = QListWidgetItem()
+            item.setData(Qt.UserRole, path)
+            self.set_item_entry(item, entry)
+            self.list_widget.addItem(item)
+            self.items[path] = item
+        self.status_label.setText(f"{len(listing)} datasets")
+        if stale:
+            self.index_request += 1
+            self.index_task = IndexTask(self.index_request, self.index.path, stale)
+            self.index_task.signals.indexed.connect(self.on_indexed)
+            self.index_task.signals.finished.connect(self.on_index_finished)
+            self.status_label.setText(f"{len(listing)} datasets, indexing {len(stale)}...")
+            self.pool.start(self.index_task)
+
+    def set_item_entry(self, item, entry):
+        path = item.data(Qt.UserRole)
+        text = os.path.basename(path)
+        if entry is not None and entry.shape is not None:
+            text += "\n" + "x".join(str(n) for n in entry.shape)
+        item.setText(text)
+        item.setIcon(_thumbnail_icon(entry.thumbnail if entry is not None else None))
+        item.setToolTip(f"{path}\n" + (entry.describe() if entry is not None else "Indexing..."))
+
+    def on_indexed(self, request_id, entry):
+        item = self.items.get(entry.path)
+        if request_id == self.index_request and item is not None:
+            self.set_item_entry(item, entry)
+
+    def on_index_finished(self, request_id):
+        if request_id == self.index_request:
+            self.index_task = None
+            self.status_label.setText(f"{len(self.items)} datasets")
+
+    def cancel_indexing(self):
+        if self.index_task is not None:
+            self.index_task.cancel()
+            self.index_task = None
+        self.index_request += 1
+
+    def shutdown(self):
+        """Stop indexing and close the index (the pool is waited on by its owner)."""
+        self.cancel_indexing()
+        self.index.close()
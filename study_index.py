@@ -0,0 +1,186 @@
+"""
+Persistent index of the k-space files in study directories.
+
+For every dataset the index records its dimensions (nt, nz, nc, ny, nx),
+source dtype, file size and modification time, and a small RSS thumbnail
+of the middle frame, in an SQLite database. An entry stays valid until the
+file's size or mtime changes, so listing an indexed directory reads only
+the database; new and changed files are indexed one at a time with a
+single slab read each.
+"""
+import math
+import os
+import sqlite3
+
+import numpy as np
+
+from lod import block_mean_downsample
+from recon import ReconEngine, IMAGE
+from sidecar import SIDECAR_SUFFIX
+from utils import load_kdata
+from windowing import preview_image
+
+STUDY_EXTENSIONS = ('.mat', '.h5', '.hdf5')
+# Largest side of a thumbnail
+THUMBNAIL_SIZE = 128
+# Bumped when the table layout changes; older indexes are rebuilt
+SCHEMA_VERSION = 1
+
+
+def default_index_path():
+    """The per-user index: '$XDG_CACHE_HOME/dynamic-mri-viewer/study_index.sqlite'."""
+    cache = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(cache, 'dynamic-mri-viewer', 'study_index.sqlite')
+
+
+def study_files(directory):
+    """K-space candidates in a directory (not recursive), sorted; sidecars are skipped."""
+    names = sorted(
+        name for name in os.listdir(directory)
+        if name.lower().endswith(STUDY_EXTENSIONS) and not name.endswith(SIDECAR_SUFFIX)
+    )
+    return [os.path.join(directory, name) for name in names]
+
+
+class StudyEntry:
+    """
+    One indexed file. `shape`, `dtype` and `thumbnail` (uint8 [h, w]) are
+    None if the file could not be read as k-space; `error` then says why.
+    """
+
+    def __init__(self, path, size, mtime_ns, shape=None, dtype=None, thumbnail=None, error=None):
+        self.path = path
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.shape = shape
+        self.dtype = dtype
+        self.thumbnail = thumbnail
+        self.error = error
+
+    @property
+    def name(self):
+        return os.path.basename(self.path)
+
+    def describe(self):
+        """One-line summary, e.g. '30x2x8x128x128 float32, 31.5 MiB'."""
+        size = f"{self.size / 1024 ** 2:.1f} MiB"
+        if self.shape is None:
+            return f"{size}, not readable: {self.error}"
+        return f"{'x'.join(str(n) for n in self.shape)} {self.dtype}, {size}"
+
+
+def index_file(path, engine=None):
+    """
+    Read a file's dimensions and build its thumbnail.
+
+    Only the middle [t, z] slab is read and reconstructed; the thumbnail is
+    its RSS image reduced to at most THUMBNAIL_SIZE pixels per side and
+    windowed to its own percentiles.
+
+    Args:
+        path (str): k-space file.
+        engine (ReconEngine): Engine for the thumbnail (default: a
+            single-threaded one).
+
+    Returns:
+        StudyEntry: The entry, with `error` set if the file is not readable.
+    """
+    st = os.stat(path)
+    try:
+        with load_kdata(path) as kdata:
+            nt, nz, nc, ny, nx = kdata.shape
+            engine = engine or ReconEngine(workers=1)
+            image = engine.reconstruct(kdata[nt // 2, nz // 2], IMAGE)[0]
+            dtype = kdata.source_dtype
+            dtype = f"{dtype[0]} real/imag" if dtype.names else str(dtype)
+    except Exception as e:
+        return StudyEntry(path, st.st_size, st.st_mtime_ns, error=str(e))
+    factor = math.ceil(max(ny, nx) / THUMBNAIL_SIZE)
+    thumbnail = preview_image(block_mean_downsample(image, factor))
+    return StudyEntry(path, st.st_size, st.st_mtime_ns, (nt, nz, nc, ny, nx), dtype, thumbnail)
+
+
+class StudyIndex:
+    """
+    SQLite store of StudyEntry records keyed by absolute path.
+
+    A connection belongs to the thread that created it, so every thread
+    (e.g. the background indexer) opens its own StudyIndex on the same file.
+    """
+
+    def __init__(self, path=None):
+        """
+        Args:
+            path (str): Database file (default: default_index_path()).
+        """
+        self.path = path or default_index_path()
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self.db = sqlite3.connect(self.path, timeout=10)
+        if self.db.execute('PRAGMA user_version').fetchone()[0] != SCHEMA_VERSION:
+            self.db.execute('DROP TABLE IF EXISTS studies')
+            self.db.execute('PRAGMA user_version = %d' % SCHEMA_VERSION)
+        self.db.execute(
+            'CREATE TABLE IF NOT EXISTS studies ('
+            ' path TEXT PRIMARY KEY, directory TEXT, size INTEGER, mtime_ns INTEGER,'
+            ' nt INTEGER, nz INTEGER, nc INTEGER, ny INTEGER, nx INTEGER, dtype TEXT,'
+            ' thumb_h INTEGER, thumb_w INTEGER, thumbnail BLOB, error TEXT)'
+        )
+        self.db.execute('CREATE INDEX IF NOT EXISTS studies_directory ON studies (directory)')
+        self.db.commit()
+
+    def entries(self, directory):
+        """Indexed entries of a directory, by path (possibly stale; see scan)."""
+        directory = os.path.abspath(directory)
+        rows = self.db.execute(
+            'SELECT path, size, mtime_ns, nt, nz, nc, ny, nx, dtype, thumb_h, thumb_w,'
+            ' thumbnail, error FROM studies WHERE directory = ?', (directory,)
+        )
+        entries = {}
+        for path, size, mtime_ns, nt, nz, nc, ny, nx, dtype, h, w, blob, error in rows:
+            shape = thumbnail = None
+            if nt is not None:
+                shape = (nt, nz, nc, ny, nx)
+                thumbnail = np.frombuffer(blob, dtype=np.uint8).reshape(h, w)
+            entries[path] = StudyEntry(path, size, mtime_ns, shape, dtype, thumbnail, error)
+        return entries
+
+    def scan(self, directory):
+        """
+        Compare a directory with the index, without opening any dataset.
+
+        Entries of files that no longer exist are removed.
+
+        Returns:
+            tuple: (entries list in file order, with None for files that
+            need indexing; list of the paths to index).
+        """
+        directory = os.path.abspath(directory)
+        indexed = self.entries(directory)
+        listing, stale = [], []
+        for path in study_files(directory):
+            st = os.stat(path)
+            entry = indexed.pop(path, None)
+            if entry is None or (entry.size, entry.mtime_ns) != (st.st_size, st.st_mtime_ns):
+                entry = None
+                stale.append(path)
+            listing.append((path, entry))
+        if indexed:
+            self.db.executemany('DELETE FROM studies WHERE path = ?', [(p,) for p in indexed])
+            self.db.commit()
+        return listing, stale
+
+    def put(self, entry):
+        """Insert or replace an entry."""
+        shape = entry.shape or (None,) * 5
+        h, w = entry.thumbnail.shape if entry.thumbnail is not None else (None, None)
+        blob = entry.thumbnail.tobytes() if entry.thumbnail is not None else None
+        path = os.path.abspath(entry.path)
+        self.db.execute(
+            'INSERT OR REPLACE INTO studies VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            (path, os.path.dirname(path), entry.size, entry.mtime_ns, *shape,
+             entry.dtype, h, w, blob, entry.error),
+        )
+        self.db.commit()
+
+    def close(self):
+        self.db.close()
@@ -0,0 +1,168 @@
+import numpy as np
+from PyQt5.QtCore import QObject, QRunnable, pyqtSignal
+
+from windowing import DatasetStats, DEFAULT_PERCENTILES
+
+# (label, kind) of the temporal maps, in the order shown in the viewer
+MAP_KINDS = (
+    ("Temporal mean", 'mean'),
+    ("Temporal std", 'std'),
+    ("Temporal MIP", 'mip'),
+)
+
+
+class TemporalAccumulator:
+    """
+    Streaming per-pixel mean, variance and maximum over time frames.
+
+    Frames are added one at a time with Welford's algorithm, so a series is
+    visited once and only the running mean, the sum of squared deviations
+    and the maximum are kept, never the frames themselves.
+    """
+
+    def __init__(self, shape):
+        self.count = 0
+        self.mean = np.zeros(shape, dtype=np.float64)
+        self.m2 = np.zeros(shape, dtype=np.float64)
+        self.max = np.full(shape, -np.inf, dtype=np.float32)
+
+    def update(self, frames):
+        """Add a block of frames [nb, *shape]."""
+        for frame in frames:
+            self.count += 1
+            delta = frame - self.mean
+            self.mean += delta / self.count
+            # delta * (frame - new mean), the numerically stable update
+            self.m2 += delta * (frame - self.mean)
+            np.maximum(self.max, frame, out=self.max)
+
+    def std(self):
+        """Population standard deviation (as np.std) of the frames added so far."""
+        return np.sqrt(self.m2 / max(self.count, 1)).astype(np.float32)
+
+
+def map_stats(channels, percentiles=DEFAULT_PERCENTILES, bins=256):
+    """
+    Display statistics of one map, so it gets a window of its own (a std
+    map covers a much smaller range than the frames).
+
+    Args:
+        channels (np.ndarray): Map [nc + 1, ny, nx], channel 0 the composite.
+        percentiles (tuple): Low/high percentiles of the default window.
+        bins (int): Histogram bins per channel.
+
+    Returns:
+        DatasetStats: Statistics of every channel of the map.
+    """
+    flat = channels.reshape(len(channels), -1)
+    lo = np.minimum(flat.min(axis=1), 0)
+    hi = np.maximum(flat.max(axis=1), lo + 1e-6)
+    p_low, p_high = np.percentile(flat, percentiles, axis=1)
+    p_high = np.maximum(p_high, p_low + 1e-6)
+    hist = np.empty((len(flat), bins), dtype=np.int64)
+    edges = np.empty((len(flat), bins + 1), dtype=np.float32)
+    for c in range(len(flat)):
+        hist[c], edges[c] = np.histogram(flat[c], bins=bins, range=(lo[c], hi[c]))
+    return DatasetStats(lo, hi, p_low, p_high, hist, edges)
+
+
+class TemporalMaps:
+    """
+    Temporal mean, standard deviation and maximum intensity projection of
+    one slice. Each map has shape [nc + 1, ny, nx]; channel 0 is the RSS
+    composite and channel c + 1 is coil c.
+    """
+
+    def __init__(self, slice_index, mode, mean, std, mip):
+        self.slice_index = slice_index
+        self.mode = mode
+        self.maps = {'mean': mean, 'std': std, 'mip': mip}
+        self._display = {}
+
+    def map(self, kind):
+        """One map, e.g. map('std')."""
+        return self.maps[kind]
+
+    def display_frames(self, kind):
+        """
+        A map as display codes with its own statistics, computed on first use.
+
+        Returns:
+            tuple: (uint16 codes [nc + 1, ny, nx], DatasetStats).
+        """
+        entry = self._display.get(kind)
+        if entry is None:
+            channels = self.maps[kind]
+            stats = map_stats(channels)
+            codes = np.concatenate((stats.quantize(channels[0])[None],
+                                    stats.quantize_coils(channels[1:])))
+            entry = self._display[kind] = (codes, stats)
+        return entry
+
+
+def temporal_maps(renderer, slice_index, mode, block_size=8, progress=None, should_stop=None):
+    """
+    Temporal mean, std and MIP of a slice in one pass over its time frames.
+
+    Cached frames are reused unless their display codes are saturated;
+    the others are reconstructed in blocks of time frames (see
+    FrameRenderer.slice_frames), so the MIP is not capped at the display
+    range. Frames not yet cached are cached, so scrubbing the slice
+    afterwards is served from the cache.
+
+    Args:
+        renderer (FrameRenderer): Source of frames.
+        slice_index (int): Slice to analyze.
+        mode (str): Display mode (KSPACE or IMAGE).
+        block_size (int): Time frames reconstructed per batch.
+        progress (callable): Called with (done, total) frames as they are added.
+        should_stop (callable): Returns True to abandon the computation.
+
+    Returns:
+        TemporalMaps: The maps, or None if stopped.
+    """
+    nt, _, nc, ny, nx = renderer.kdata.shape
+    acc = TemporalAccumulator((nc + 1, ny, nx))
+    frame = np.empty((1, nc + 1, ny, nx), dtype=np.float32)
+    for t, composite, coil_data in renderer.slice_frames(slice_index, mode, block_size=block_size):
+        if should_stop is not None and should_stop():
+            return None
+        frame[0, 0] = composite
+        frame[0, 1:] = coil_data
+        acc.update(frame)
+        if progress is not None:
+            progress(t + 1, nt)
+
+    return TemporalMaps(slice_index, mode, acc.mean.astype(np.float32), acc.std(), acc.max)
+
+
+class TemporalSignals(QObject):
+    progress = pyqtSignal(int, int, int)  # request id, frames done, total
+    finished = pyqtSignal(int, object)    # request id, TemporalMaps
+    failed = pyqtSignal(int, str)
+
+
+class TemporalTask(QRunnable):
+    """Computes the temporal maps of a slice on a worker thread."""
+
+    def __init__(self, request_id, renderer, slice_index, mode, should_stop=None):
+        super().__init__()
+        self.request_id = request_id
+        self.renderer = renderer
+        self.slice_index = slice_index
+        self.mode = mode
+        self.should_stop = should_stop
+        self.signals = TemporalSignals()
+
+    def run(self):
+        try:
+            maps = temporal_maps(
+                self.renderer, self.slice_index, self.mode,
+                progress=lambda done, total: self.signals.progress.emit(self.request_id, done, total),
+                should_stop=self.should_stop,
+            )
+        except Exception as e:
+            self.signals.failed.emit(self.request_id, str(e))
+            return
+        if maps is not None:
+            self.signals.finished.emit(self.request_id, maps)
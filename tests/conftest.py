@@ -0,0 +1,32 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+# The viewer's modules live at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def random_kspace():
+    """Factory of random complex64 k-space, random_kspace(shape, seed=0)."""
+    def make(shape, seed=0):
+        rng = np.random.default_rng(seed)
+        return (rng.standard_normal(shape) + 1j * rng.standard_normal(shape)).astype(np.complex64)
+    return make
+
+
+@pytest.fixture
+def saturating_stats():
+    """
+    Factory of image-space statistics {IMAGE: DatasetStats} taken from a
+    copy of the k-space at a fifth of its amplitude, so that every frame of
+    the original exceeds their range and saturates its display codes.
+    """
+    from recon import ReconEngine, IMAGE
+    from windowing import compute_dataset_stats
+
+    def make(kdata):
+        return {IMAGE: compute_dataset_stats(kdata * 0.2, ReconEngine('numpy'), IMAGE)}
+    return make
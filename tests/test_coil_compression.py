@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+
+from coil_compression import CompressedKSpace
+from recon import ReconEngine, IMAGE
+
+
+def test_compressed_shape_and_orthonormal_matrix(random_kspace):
+    kdata = random_kspace((4, 2, 6, 16, 16))
+    compressed = CompressedKSpace(kdata, 3)
+    assert compressed.shape == (4, 2, 3, 16, 16)
+    assert compressed[1, 0].shape == (3, 16, 16)
+    assert compressed[0:2, 1].shape == (2, 3, 16, 16)
+    matrix = compressed.matrix(0)
+    np.testing.assert_allclose(matrix @ matrix.conj().T, np.eye(3), atol=1e-5)
+    assert 0 < compressed.retained_energy() < 1
+
+
+def test_all_virtual_coils_keep_the_rss_image(random_kspace):
+    kdata = random_kspace((2, 1, 4, 12, 10))
+    compressed = CompressedKSpace(kdata, 4)
+    engine = ReconEngine('numpy')
+    # A unitary coil combination leaves the root sum of squares unchanged
+    np.testing.assert_allclose(engine.image(compressed[1, 0]), engine.image(kdata[1, 0]),
+                               rtol=1e-4)
+    assert compressed.retained_energy() == pytest.approx(1)
+
+
+def test_per_slice_matrices(random_kspace):
+    kdata = random_kspace((4, 2, 5, 16, 16))
+    compressed = CompressedKSpace(kdata, 2, per_slice=True)
+    assert not np.allclose(compressed.matrix(0), compressed.matrix(1))
+
+
+def test_slice_must_be_an_integer(random_kspace):
+    compressed = CompressedKSpace(random_kspace((2, 2, 3, 8, 8)), 2)
+    with pytest.raises(IndexError):
+        compressed[0, 0:2]
@@ -0,0 +1,48 @@
+import os
+
+import h5py
+import numpy as np
+
+from coil_compression import CompressedKSpace
+from export_panel import ExportTask
+from recon import ReconEngine, IMAGE
+from utils import load_kdata
+from windowing import compute_dataset_stats
+
+
+def _write_kspace(path, kspace):
+    with h5py.File(path, 'w') as f:
+        group = f.create_group('kspace_full')
+        group['real'] = kspace.real
+        group['imag'] = kspace.imag
+
+
+def _run(task):
+    failures = []
+    task.signals.failed.connect(failures.append)
+    task.run()
+    assert not failures
+
+
+def test_export_with_virtual_coils(tmp_path, random_kspace):
+    file_name = str(tmp_path / 'k.mat')
+    _write_kspace(file_name, random_kspace((3, 1, 5, 8, 10), seed=2))
+    n_virtual = 2
+    # The viewer passes the statistics of its compressed source
+    with load_kdata(file_name) as kdata:
+        compressed = CompressedKSpace(kdata, n_virtual)
+        stats = compute_dataset_stats(compressed, ReconEngine('numpy'), IMAGE)
+        expected = ReconEngine('numpy').reconstruct(compressed[0:3, 0], IMAGE)[1]
+
+    png_dir = tmp_path / 'png'
+    _run(ExportTask(file_name, str(png_dir), 'png', n_virtual=n_virtual, mode=IMAGE,
+                    coils=True, stats=stats))
+    names = os.listdir(png_dir)
+    assert len(names) == 3 * (1 + n_virtual)
+    assert not any('coil03' in name for name in names)
+
+    npy_path = str(tmp_path / 'cine.npy')
+    _run(ExportTask(file_name, npy_path, 'npy', n_virtual=n_virtual, mode=IMAGE, coils=True))
+    coils = np.load(str(tmp_path / 'cine_coils.npy'))
+    assert coils.shape == (3, 1, n_virtual, 8, 10)
+    np.testing.assert_allclose(coils[:, 0], expected, rtol=1e-4, atol=1e-6)
@@ -0,0 +1,33 @@
+import numpy as np
+
+from frame_cache import FrameCache
+
+
+def _frame(nbytes=100):
+    return np.zeros(nbytes, dtype=np.uint8)
+
+
+def test_evicts_least_recently_used_within_budget():
+    cache = FrameCache(max_bytes=300)
+    for t in range(3):
+        cache.put((t, 0, 'image', None), _frame())
+    cache.get((0, 0, 'image', None))  # 0 becomes the most recently used
+    cache.put((3, 0, 'image', None), _frame())
+
+    assert (1, 0, 'image', None) not in cache
+    assert all((t, 0, 'image', None) in cache for t in (0, 2, 3))
+    assert cache.nbytes == 300
+    assert cache.evictions == 1
+
+
+def test_replacing_and_shrinking():
+    cache = FrameCache(max_bytes=300)
+    cache.put('a', _frame())
+    cache.put('a', _frame(200))
+    assert cache.nbytes == 200 and len(cache) == 1
+    cache.put('b', _frame(100))
+    cache.resize(150)
+    assert 'a' not in cache and 'b' in cache
+    # A frame larger than the whole budget is not cached
+    cache.put('c', _frame(400))
+    assert 'c' not in cache
@@ -0,0 +1,53 @@
+import h5py
+import numpy as np
+import pytest
+
+from kspace_store import KSpaceStore
+
+SHAPE = (3, 2, 4, 6, 5)
+
+
+def _write(path, kspace, layout):
+    with h5py.File(path, 'w') as f:
+        if layout == 'group':
+            group = f.create_group('kspace_full')
+            group['real'] = kspace.real
+            group['imag'] = kspace.imag
+        elif layout == 'compound':
+            dtype = np.dtype([('real', '<f4'), ('imag', '<f4')])
+            data = np.empty(kspace.shape, dtype)
+            data['real'], data['imag'] = kspace.real, kspace.imag
+            f['kspace_full'] = data
+        elif layout == 'compound_f8':
+            dtype = np.dtype([('r', '<f8'), ('i', '<f8')])
+            data = np.empty(kspace.shape, dtype)
+            data['r'], data['i'] = kspace.real, kspace.imag
+            f['kspace'] = data
+        elif layout == 'complex128':
+            f['kdata'] = kspace.astype(np.complex128)
+        elif layout == 'pairs':
+            f.create_dataset('data', data=np.stack((kspace.real, kspace.imag), axis=-1),
+                             chunks=(1, 1, 4, 6, 5, 2))
+
+
+@pytest.mark.parametrize('layout', ['group', 'compound', 'compound_f8', 'complex128', 'pairs'])
+def test_layouts_read_as_complex64(tmp_path, random_kspace, layout):
+    kspace = random_kspace(SHAPE)
+    path = str(tmp_path / 'k.h5')
+    _write(path, kspace, layout)
+    with KSpaceStore(path) as store:
+        assert store.shape == SHAPE
+        assert store.dtype == np.complex64
+        slab = store[1, 0]
+        assert slab.dtype == np.complex64
+        np.testing.assert_array_equal(slab, kspace[1, 0])
+        np.testing.assert_array_equal(store[0:2, 1], kspace[0:2, 1])
+    assert store.closed
+
+
+def test_missing_kspace_is_an_error(tmp_path):
+    path = str(tmp_path / 'k.h5')
+    with h5py.File(path, 'w') as f:
+        f['other'] = np.zeros(3)
+    with pytest.raises(KeyError):
+        KSpaceStore(path)
@@ -0,0 +1,23 @@
+import numpy as np
+
+from mmode import SliceVolume
+from recon import ReconEngine, IMAGE
+from renderer import FrameRenderer
+
+
+def test_volume_of_a_partly_cached_saturated_slice(random_kspace, saturating_stats):
+    kdata = random_kspace((5, 2, 2, 12, 11), seed=4)
+    engine = ReconEngine('numpy')
+    renderer = FrameRenderer(kdata, engine=engine, stats=saturating_stats(kdata))
+    renderer.render(0, 1, IMAGE)
+    renderer.render(3, 1, IMAGE)
+
+    volume = SliceVolume((5, 12, 11), 1, IMAGE)
+    try:
+        assert volume.fill(renderer)
+        composite = engine.reconstruct(kdata[:, 1], IMAGE)[0]
+        np.testing.assert_allclose(volume.data, composite, rtol=1e-5)
+        # A row through pixel centers samples the pixels exactly
+        np.testing.assert_allclose(volume.line_profile(0, 4, 10, 4), composite[:, 4, :], rtol=1e-5)
+    finally:
+        volume.close()
@@ -0,0 +1,68 @@
+import threading
+import time
+
+import pytest
+from PyQt5.QtCore import QCoreApplication
+
+from render_scheduler import RenderScheduler
+
+
+@pytest.fixture
+def app():
+    return QCoreApplication.instance() or QCoreApplication([])
+
+
+class _GatedRenderer:
+    """Records rendered keys; the first render waits until released."""
+
+    def __init__(self):
+        self.rendered = []
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def render(self, t, z, mode, coils=True):
+        if not self.rendered:
+            self.started.set()
+            self.release.wait(5)
+        self.rendered.append(t)
+
+
+def _process_until(app, condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        app.processEvents()
+        time.sleep(0.005)
+
+
+def test_latest_request_wins(app):
+    scheduler = RenderScheduler(max_threads=2)
+    renderer = _GatedRenderer()
+    scheduler.set_renderer(renderer)
+    ready = []
+    scheduler.frameReady.connect(lambda t, z, mode: ready.append(t))
+
+    scheduler.request(0, 0, 'image')
+    assert renderer.started.wait(5)
+    # Requests made while a render runs replace each other
+    for t in (1, 2, 3):
+        scheduler.request(t, 0, 'image')
+    renderer.release.set()
+    _process_until(app, lambda: ready)
+    scheduler.wait()
+
+    assert renderer.rendered == [0, 3]
+    assert ready == [3]
+
+
+def test_cancelled_requests_are_not_rendered(app):
+    scheduler = RenderScheduler(max_threads=1)
+    renderer = _GatedRenderer()
+    scheduler.set_renderer(renderer)
+    scheduler.request(0, 0, 'image')
+    assert renderer.started.wait(5)
+    scheduler.request(1, 0, 'image')
+    scheduler.cancel()
+    renderer.release.set()
+    scheduler.wait()
+    _process_until(app, lambda: False, timeout=0.1)
+    assert renderer.rendered == [0]
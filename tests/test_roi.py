@@ -0,0 +1,42 @@
+import numpy as np
+
+from recon import ReconEngine, IMAGE
+from renderer import FrameRenderer
+from roi import roi_time_curves
+
+BOX = (2, 9, 1, 8)
+
+
+def _composite_box(kdata):
+    return ReconEngine('numpy').reconstruct(kdata[:, 0], IMAGE)[0][:, 2:9, 1:8]
+
+
+def test_saturated_frames_are_reconstructed(random_kspace, saturating_stats):
+    kdata = random_kspace((6, 1, 2, 12, 10), seed=1)
+    renderer = FrameRenderer(kdata, engine=ReconEngine('numpy'), stats=saturating_stats(kdata))
+    uncached = roi_time_curves(renderer, 0, IMAGE, BOX)
+    for t in range(0, kdata.shape[0], 2):
+        renderer.render(t, 0, IMAGE)
+    partly_cached = roi_time_curves(renderer, 0, IMAGE, BOX)
+
+    composite = _composite_box(kdata)
+    for curves in (uncached, partly_cached):
+        np.testing.assert_allclose(curves.curve('max', 0), composite.max(axis=(1, 2)), rtol=1e-5)
+        np.testing.assert_allclose(curves.curve('mean', 0), composite.mean(axis=(1, 2)), rtol=1e-5)
+
+
+def test_cached_frames_are_reused(random_kspace):
+    kdata = random_kspace((6, 1, 2, 12, 10), seed=1)
+    renderer = FrameRenderer(kdata, engine=ReconEngine('numpy'), stats_frames=0)
+    for t in range(kdata.shape[0]):
+        renderer.render(t, 0, IMAGE)
+    calls = []
+    reconstruct = renderer.engine.reconstruct
+    renderer.engine.reconstruct = lambda *args: calls.append(args) or reconstruct(*args)
+
+    curves = roi_time_curves(renderer, 0, IMAGE, BOX)
+    assert not calls
+    # Dequantized codes are within half a code step of the reconstruction
+    step = float(renderer.dataset_stats(IMAGE).hi[0]) / 65535
+    composite = _composite_box(kdata)
+    np.testing.assert_allclose(curves.curve('max', 0), composite.max(axis=(1, 2)), atol=step)
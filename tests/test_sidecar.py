@@ -0,0 +1,56 @@
+import os
+
+import numpy as np
+
+from sidecar import ReconSidecar
+
+SHAPE = (3, 2, 2, 4, 5)  # nt, nz, nc, ny, nx
+
+
+def _source(tmp_path, content=b'k-space'):
+    path = tmp_path / 'k.mat'
+    path.write_bytes(content)
+    return str(path)
+
+
+def _frames():
+    composite = np.arange(20, dtype=np.uint8).reshape(4, 5)
+    return composite, np.stack((composite, composite + 1))
+
+
+def test_frames_survive_reopening(tmp_path):
+    source = _source(tmp_path)
+    composite, coils = _frames()
+    sidecar = ReconSidecar(source, SHAPE)
+    sidecar.write(1, 0, 'image', composite, coils)
+    sidecar.close()
+
+    sidecar = ReconSidecar(source, SHAPE)
+    assert sidecar.has(1, 0, 'image')
+    assert not sidecar.has(0, 0, 'image', coils=False)
+    stored_composite, stored_coils = sidecar.read(1, 0, 'image')
+    np.testing.assert_array_equal(stored_composite, composite)
+    np.testing.assert_array_equal(stored_coils, coils)
+    sidecar.close()
+
+
+def test_changed_source_invalidates_frames(tmp_path):
+    source = _source(tmp_path)
+    sidecar = ReconSidecar(source, SHAPE)
+    sidecar.write(1, 0, 'image', *_frames())
+    sidecar.close()
+
+    with open(source, 'ab') as f:
+        f.write(b' more')
+    sidecar = ReconSidecar(source, SHAPE)
+    assert not sidecar.has(1, 0, 'image', coils=False)
+    sidecar.close()
+    assert os.path.exists(sidecar.path)
+
+
+def test_closed_sidecar_reads_empty_and_ignores_writes(tmp_path):
+    sidecar = ReconSidecar(_source(tmp_path), SHAPE)
+    sidecar.close()
+    sidecar.write(0, 0, 'image', *_frames())
+    assert not sidecar.has(0, 0, 'image')
+    assert sidecar.read(0, 0, 'image') is None
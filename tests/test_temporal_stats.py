@@ -0,0 +1,20 @@
+import numpy as np
+
+from recon import ReconEngine, IMAGE
+from renderer import FrameRenderer
+from temporal_stats import temporal_maps
+
+
+def test_maps_of_a_partly_cached_saturated_slice(random_kspace, saturating_stats):
+    kdata = random_kspace((7, 1, 2, 10, 9), seed=3)
+    engine = ReconEngine('numpy')
+    renderer = FrameRenderer(kdata, engine=engine, stats=saturating_stats(kdata))
+    for t in (1, 2, 5):
+        renderer.render(t, 0, IMAGE)
+    maps = temporal_maps(renderer, 0, IMAGE, block_size=3)
+
+    composite, coils = engine.reconstruct(kdata[:, 0], IMAGE)
+    frames = np.concatenate((composite[:, None], coils), axis=1)
+    np.testing.assert_allclose(maps.map('mean'), frames.mean(axis=0), rtol=1e-5)
+    np.testing.assert_allclose(maps.map('std'), frames.std(axis=0), rtol=1e-4, atol=1e-6)
+    np.testing.assert_array_equal(maps.map('mip'), frames.max(axis=0))
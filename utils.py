@@ -1,6 +1,7 @@
-import vtk
 import h5py
-import numpy as np
+
+from kspace_store import KSpaceStore
+from recon import default_engine
 
 
 def loadmat(filename):
@@ -42,46 +43,38 @@ def loadmat_group(group):
     return data
 
 
-def load_kdata(filename):
+def load_kdata(filename, **cache_options):
     """
-    Load k-space data from a .mat file.
+    Open the k-space data in a .mat file without reading it into memory.
 
     Args:
         filename (str): Path to the .mat file.
+        **cache_options: HDF5 chunk cache settings forwarded to KSpaceStore
+            (cache_bytes, cache_slots, cache_w0).
 
     Returns:
-        np.ndarray: K-space data with shape [nt, nz, nc, ny, nx, 2].
+        KSpaceStore: Lazy complex64 k-space data with shape [nt, nz, nc, ny, nx].
     """
-    data = loadmat(filename)
-    kdata_real = data['kspace_full']['real']
-    kdata_imag = data['kspace_full']['imag']
-    kdata_combined = np.stack((kdata_real, kdata_imag), axis=-1)
-    return kdata_combined
+    return KSpaceStore(filename, **cache_options)
 
 
-def load_slice(kdata, time_index, slice_index):
+def load_slice(kdata, time_index, slice_index, engine=None):
     """
     Load and process a specific slice from k-space.
 
     Args:
-        kdata (np.ndarray): K-space data with shape [nt, nz, nc, ny, nx, 2].
+        kdata (KSpaceStore or np.ndarray): Complex k-space data with shape
+            [nt, nz, nc, ny, nx].
         time_index (int): Index of the time frame.
         slice_index (int): Index of the slice.
+        engine (ReconEngine): Reconstruction engine (default: shared engine).
 
     Returns:
-        np.ndarray: Processed image for the specific slice.
+        np.ndarray: Processed float32 image for the specific slice.
     """
     # Select specific slice and time frame
-    kdata_slice = kdata[time_index, slice_index, :, :, :, :]  # Shape: [nc, ny, nx, 2]
-
-    # Convert to complex
-    kdata_complex = kdata_slice[..., 0] + 1j * kdata_slice[..., 1]
+    kdata_slice = kdata[time_index, slice_index]  # Shape: [nc, ny, nx]
 
     # Perform IFFT and RSS for this slice
-    image_space = np.fft.ifftshift(
-        np.fft.ifft2(np.fft.fftshift(kdata_complex, axes=(-2, -1)), axes=(-2, -1)),
-        axes=(-2, -1)
-    )
-    rss_image = np.sqrt(np.sum(np.abs(image_space) ** 2, axis=0))
-
-    return rss_image
\ No newline at end of file
+    engine = engine or default_engine()
+    return engine.image(kdata_slice)
@@ -0,0 +1,181 @@
+import weakref
+
+import numpy as np
+
+# Frames are quantized to 16-bit codes over each channel's dataset-wide range
+CODE_MAX = 65535
+CODE_DTYPE = np.uint16
+
+# Headroom above the sampled maximum, so unsampled frames rarely saturate
+RANGE_HEADROOM = 1.25
+
+DEFAULT_PERCENTILES = (0.5, 99.5)
+
+
+class DatasetStats:
+    """
+    Dataset-wide intensity statistics of one display mode.
+
+    Channel 0 is the composite image and channel c + 1 is coil c. For each
+    channel the statistics hold the value range [lo, hi] that frames are
+    quantized over, the low/high percentiles used as the default display
+    window, and a histogram of the sampled values.
+    """
+
+    def __init__(self, lo, hi, p_low, p_high, hist, edges):
+        self.lo = np.asarray(lo, dtype=np.float32)
+        self.hi = np.asarray(hi, dtype=np.float32)
+        self.p_low = np.asarray(p_low, dtype=np.float32)
+        self.p_high = np.asarray(p_high, dtype=np.float32)
+        self.hist = np.asarray(hist)
+        self.edges = np.asarray(edges)
+        span = np.maximum(self.hi - self.lo, 1e-12)
+        self._scale = (CODE_MAX / span).astype(np.float32)
+
+    @staticmethod
+    def channel(coil):
+        """Channel index of a coil (None for the composite)."""
+        return 0 if coil is None else coil + 1
+
+    def quantize(self, data, coil=None):
+        """Map an image of one channel to uint16 codes."""
+        c = self.channel(coil)
+        codes = (data - self.lo[c]) * self._scale[c]
+        np.clip(codes, 0, CODE_MAX, out=codes)
+        return codes.astype(CODE_DTYPE)
+
+    def quantize_coils(self, coils):
+        """Map coil images [..., nc, ny, nx] to uint16 codes."""
+        lo = self.lo[1:, None, None]
+        codes = (coils - lo) * self._scale[1:, None, None]
+        np.clip(codes, 0, CODE_MAX, out=codes)
+        return codes.astype(CODE_DTYPE)
+
+    def dequantize(self, codes, coil=None):
+        """Approximate float32 values of uint16 codes of one channel."""
+        c = self.channel(coil)
+        return codes.astype(np.float32) / self._scale[c] + self.lo[c]
+
+    def dequantize_coils(self, codes):
+        """Approximate float32 values of coil codes [..., nc, ny, nx]."""
+        return codes.astype(np.float32) / self._scale[1:, None, None] + self.lo[1:, None, None]
+
+    def as_dict(self):
+        return {'lo': self.lo, 'hi': self.hi, 'p_low': self.p_low,
+                'p_high': self.p_high, 'hist': self.hist, 'edges': self.edges}
+
+
+def preview_image(data, percentiles=DEFAULT_PERCENTILES):
+    """
+    uint8 image of one frame windowed to its own percentiles, for display
+    before the dataset statistics are known.
+    """
+    p_low, p_high = np.percentile(data, percentiles)
+    scale = 255.0 / max(p_high - p_low, 1e-6)
+    image = (data - p_low) * scale
+    np.clip(image, 0, 255, out=image)
+    return image.astype(np.uint8)
+
+
+def sample_frames(nt, nz, max_frames):
+    """Evenly spaced (t, z) pairs covering the dataset, at most `max_frames`."""
+    total = nt * nz
+    if not max_frames or total <= max_frames:
+        flat = np.arange(total)
+    else:
+        flat = np.unique(np.linspace(0, total - 1, max_frames).round().astype(int))
+    return [divmod(int(i), nz) for i in flat]
+
+
+def compute_dataset_stats(kdata, engine, mode, max_frames=16, samples_per_frame=16384,
+                          bins=256, percentiles=DEFAULT_PERCENTILES, progress=None):
+    """
+    One streaming pass over (a subsample of) the dataset's frames.
+
+    Args:
+        kdata (KSpaceStore or np.ndarray): Complex k-space [nt, nz, nc, ny, nx].
+        engine (ReconEngine): Engine used to reconstruct the frames.
+        mode (str): Display mode (KSPACE or IMAGE).
+        max_frames (int): Number of evenly spaced frames visited; 0 visits all.
+        samples_per_frame (int): Pixels sampled per frame for percentiles
+            and histograms (the maxima use every pixel).
+        bins (int): Histogram bins per channel.
+        percentiles (tuple): Low/high percentiles of the default window.
+        progress (callable): Called with (done, total) after each frame.
+
+    Returns:
+        DatasetStats: Statistics for the composite and every coil.
+    """
+    nt, nz, nc, ny, nx = kdata.shape
+    frames = sample_frames(nt, nz, max_frames)
+    rng = np.random.default_rng(0)
+    npix = min(samples_per_frame, ny * nx)
+    pixels = np.sort(rng.choice(ny * nx, npix, replace=False))
+
+    lo = np.full(nc + 1, np.inf, dtype=np.float32)
+    hi = np.zeros(nc + 1, dtype=np.float32)
+    samples = []
+    for i, (t, z) in enumerate(frames):
+        composite, coils = engine.reconstruct(kdata[t, z], mode)
+        flat = np.concatenate((composite[None], coils)).reshape(nc + 1, -1)
+        np.minimum(lo, flat.min(axis=1), out=lo)
+        np.maximum(hi, flat.max(axis=1), out=hi)
+        samples.append(flat[:, pixels])
+        if progress is not None:
+            progress(i + 1, len(frames))
+
+    lo = np.minimum(lo, 0)
+    hi = np.maximum(hi * RANGE_HEADROOM, lo + 1e-6)
+    pooled = np.concatenate(samples, axis=1)
+    p_low, p_high = np.percentile(pooled, percentiles, axis=1)
+    p_high = np.maximum(p_high, p_low + 1e-6)
+    hist = np.empty((nc + 1, bins), dtype=np.int64)
+    edges = np.empty((nc + 1, bins + 1), dtype=np.float32)
+    for c in range(nc + 1):
+        hist[c], edges[c] = np.histogram(pooled[c], bins=bins, range=(lo[c], hi[c]))
+    return DatasetStats(lo, hi, p_low, p_high, hist, edges)
+
+
+class WindowLevel:
+    """
+    User-adjustable display window applied through uint8 lookup tables.
+
+    `level` and `width` are relative to each channel's default window
+    [p_low, p_high]: level 0.5 and width 1.0 show exactly that window.
+    Changing them only rebuilds the (small) lookup tables; cached frames
+    are left untouched. Tables are kept per DatasetStats object only while
+    it is alive, so replaced statistics do not pile up.
+    """
+
+    def __init__(self, level=0.5, width=1.0):
+        self.level = level
+        self.width = width
+        self._luts = weakref.WeakKeyDictionary()  # stats -> {channel: lut}
+
+    def set(self, level=None, width=None):
+        if level is not None:
+            self.level = level
+        if width is not None:
+            self.width = max(width, 1e-3)
+        self._luts.clear()
+
+    def lut(self, stats, coil=None):
+        """uint8 lookup table from the codes of one channel to display values."""
+        c = stats.channel(coil)
+        luts = self._luts.get(stats)
+        if luts is None:
+            luts = self._luts[stats] = {}
+        lut = luts.get(c)
+        if lut is None:
+            span = stats.p_high[c] - stats.p_low[c]
+            d_lo = stats.p_low[c] + (self.level - self.width / 2) * span
+            d_hi = stats.p_low[c] + (self.level + self.width / 2) * span
+            values = stats.dequantize(np.arange(CODE_MAX + 1, dtype=np.uint32), coil)
+            lut = np.clip((values - d_lo) / max(d_hi - d_lo, 1e-12), 0, 1)
+            lut = (lut * 255 + 0.5).astype(np.uint8)
+            luts[c] = lut
+        return lut
+
+    def apply(self, codes, stats, coil=None):
+        """Map uint16 codes of one channel to a uint8 display image."""
+        return np.take(self.lut(stats, coil), codes)
@@ -1,13 +1,18 @@
-from PyQt5.QtWidgets import QGraphicsView, QGraphicsScene, QGraphicsPixmapItem
-from PyQt5.QtCore import pyqtSignal, QRectF, Qt
-from PyQt5.QtGui import QPixmap, QMouseEvent
+from PyQt5.QtWidgets import QGraphicsView, QGraphicsScene, QGraphicsPixmapItem, QGraphicsLineItem
+from PyQt5.QtCore import pyqtSignal, QRectF, QPointF, QLineF, Qt
+from PyQt5.QtGui import QPixmap, QMouseEvent, QPen
 
 class ZoomPanGraphicsView(QGraphicsView):
     """
     A custom QGraphicsView for zoom/pan and optional ROI selection.
     Right-click toggles between ScrollHandDrag and RubberBandDrag.
+    Double-clicking emits the clicked position in scene coordinates.
+    In line mode, left-dragging draws a line that stays on the image.
     """
     roiSelected = pyqtSignal(QRectF)
+    lineSelected = pyqtSignal(QLineF)
+    imageDoubleClicked = pyqtSignal(QPointF)
+    zoomChanged = pyqtSignal(float)
 
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -16,6 +21,9 @@ class ZoomPanGraphicsView(QGraphicsView):
         self._zoom_factor = 1.25
         self.setDragMode(QGraphicsView.NoDrag)
         self._had_pixmap_before = False
+        self._line_mode = False
+        self._line_start = None
+        self.line_item = None
 
     def set_pixmap_item(self, item):
         """
@@ -33,20 +41,36 @@ class ZoomPanGraphicsView(QGraphicsView):
             # Fit only the first time, or on a 'reset view' action
             self.fitInView(self.image_item, Qt.KeepAspectRatio)
             self._had_pixmap_before = True
+            self.zoomChanged.emit(self.view_scale())
 
-    def set_pixmap(self, pixmap: QPixmap):
-        """Replaces the displayed pixmap, preserving the current zoom if desired."""
+    def set_pixmap(self, pixmap: QPixmap, scale=1.0):
+        """
+        Replaces the displayed pixmap, preserving the current zoom if desired.
+
+        `scale` draws the pixmap larger in the scene, so a reduced-resolution
+        image keeps the scene (and ROI) coordinates of the full-size image.
+        """
         if self.image_item is None:
             # We create a new QGraphicsPixmapItem if it doesn't exist yet
             self.image_item = QGraphicsPixmapItem()
             self.scene().addItem(self.image_item)
 
         self.image_item.setPixmap(pixmap)
+        if self.image_item.scale() != scale:
+            self.image_item.setScale(scale)
+            # Reduced levels are smoothed; full resolution keeps crisp pixels
+            self.image_item.setTransformationMode(
+                Qt.SmoothTransformation if scale > 1 else Qt.FastTransformation)
 
         # Optional: if you want to auto-fit on the first assignment
         if not self._had_pixmap_before:
             self.fitInView(self.image_item, Qt.KeepAspectRatio)
             self._had_pixmap_before = True
+            self.zoomChanged.emit(self.view_scale())
+
+    def view_scale(self):
+        """Current zoom: screen pixels per scene unit."""
+        return self.transform().m11()
 
     def reset_view(self):
         """
@@ -54,6 +78,29 @@ class ZoomPanGraphicsView(QGraphicsView):
         """
         if self.image_item:
             self.fitInView(self.image_item, Qt.KeepAspectRatio)
+            self.zoomChanged.emit(self.view_scale())
+
+    def set_line_mode(self, enabled):
+        """Draw lines with the left button instead of dragging."""
+        self._line_mode = enabled
+        if enabled:
+            self.setDragMode(QGraphicsView.NoDrag)
+
+    def show_line(self, line):
+        """Show (or with None, hide) the drawn line, in scene coordinates."""
+        if line is None:
+            if self.line_item is not None:
+                self.scene().removeItem(self.line_item)
+                self.line_item = None
+            return
+        if self.line_item is None:
+            pen = QPen(Qt.yellow, 2)
+            pen.setCosmetic(True)  # constant width at any zoom
+            self.line_item = QGraphicsLineItem()
+            self.line_item.setPen(pen)
+            self.line_item.setZValue(1)
+            self.scene().addItem(self.line_item)
+        self.line_item.setLine(line)
 
     def wheelEvent(self, event):
         """Zoom in/out with the mouse wheel."""
@@ -63,11 +110,16 @@ class ZoomPanGraphicsView(QGraphicsView):
             else:
                 zoom_factor = 1 / self._zoom_factor
             self.scale(zoom_factor, zoom_factor)
+            self.zoomChanged.emit(self.view_scale())
             event.accept()
         else:
             super().wheelEvent(event)
 
     def mousePressEvent(self, event: QMouseEvent):
+        if self._line_mode and event.button() == Qt.LeftButton:
+            self._line_start = self.mapToScene(event.pos())
+            self.show_line(QLineF(self._line_start, self._line_start))
+            return
         # Right click toggles drag modes (demo behavior)
         if event.button() == Qt.RightButton:
             if self.dragMode() == QGraphicsView.ScrollHandDrag:
@@ -77,7 +129,25 @@ class ZoomPanGraphicsView(QGraphicsView):
         else:
             super().mousePressEvent(event)
 
+    def mouseDoubleClickEvent(self, event: QMouseEvent):
+        if event.button() == Qt.LeftButton:
+            self.imageDoubleClicked.emit(self.mapToScene(event.pos()))
+        super().mouseDoubleClickEvent(event)
+
+    def mouseMoveEvent(self, event: QMouseEvent):
+        if self._line_start is not None:
+            self.show_line(QLineF(self._line_start, self.mapToScene(event.pos())))
+            return
+        super().mouseMoveEvent(event)
+
     def mouseReleaseEvent(self, event: QMouseEvent):
+        if self._line_start is not None and event.button() == Qt.LeftButton:
+            line = QLineF(self._line_start, self.mapToScene(event.pos()))
+            self._line_start = None
+            self.show_line(line)
+            if line.length() >= 1:
+                self.lineSelected.emit(line)
+            return
         # If using RubberBandDrag, we can emit a signal for the selected ROI
         if self.dragMode() == QGraphicsView.RubberBandDrag:
             rubber_band_rect = self.rubberBandRect()